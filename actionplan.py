@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+# actionplan.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+# action kinds
+MOVE = 'move'        # move mouse to x, y
+CLICK = 'click'      # move mouse to x, y and click button there
+HOLD = 'hold'        # press and hold button
+RELEASE = 'release'  # release button
+KEY = 'key'          # press and release key
+WAIT = 'wait'        # wait duration seconds
+
+# clicks with these tags can be repeated without changing anything
+IDEMPOTENT_TAGS = ('close', 'nothing', 'resetChicken')
+# clicks with these tags do not move the courier/chicken
+COURIER_NEUTRAL_TAGS = ('close', 'shopButton', 'nothing')
+
+
+class Action:
+    """One low level peripheral action of a GameController macro.
+
+    Attributes:
+        kind -- One of MOVE, CLICK, HOLD, RELEASE, KEY, WAIT
+        x, y -- Screen coordinates (MOVE, CLICK)
+        button -- 1: leftclick, 2: middleclick, 3: rightclick
+        (CLICK, HOLD, RELEASE)
+        key -- Keyboard key (KEY)
+        duration -- Seconds to wait (WAIT)
+        tag -- Name of the clicked location (for example 'close'), used by
+        the optimizer
+    """
+    __slots__ = ('kind', 'x', 'y', 'button', 'key', 'duration', 'tag')
+
+    def __init__(self, kind, x=None, y=None, button=None, key=None,
+                 duration=None, tag=None):
+        self.kind = kind
+        self.x = x
+        self.y = y
+        self.button = button
+        self.key = key
+        self.duration = duration
+        self.tag = tag
+
+    def __repr__(self):
+        if(self.kind == WAIT):
+            return 'Action(wait {0}s)'.format(self.duration)
+        return 'Action({0} {1},{2} {3} {4})'.format(
+            self.kind, self.x, self.y, self.button or self.key or '',
+            self.tag or '')
+
+
+def optimize(plan):
+    """Removes redundant actions of a plan which usually consists of several
+    commands in a row. Returns a new list of actions.
+
+    - waits in a row are merged into one
+    - repeated clicks on idempotent locations (close, nothing, resetChicken)
+      are dropped
+    - opening the shop and closing it right away (only waits in between)
+      is dropped: the end of one command reopens the shop and the start
+      of the next one closes it again
+    - resetting the chicken is dropped if it has not moved since the last
+      reset
+
+    Keyword arguments:
+        plan -- list of Action
+    """
+    optimized = []
+    # chicken reset and not moved since
+    chickenReset = False
+    for action in plan:
+        last = optimized[-1] if optimized else None
+        if(action.kind == WAIT):
+            if(last is not None and last.kind == WAIT):
+                optimized[-1] = Action(
+                    WAIT, duration=last.duration + action.duration)
+            elif(action.duration > 0):
+                optimized.append(action)
+            continue
+
+        if(action.kind == CLICK and last is not None and
+           last.kind == CLICK and action.tag in IDEMPOTENT_TAGS and
+           action.tag == last.tag):
+            continue
+        if(action.kind == CLICK and action.tag == 'close'):
+            # the shop button is only clicked with the shop closed, so
+            # open and close again changes nothing
+            opened = len(optimized) - 1
+            while opened >= 0 and optimized[opened].kind == WAIT:
+                opened -= 1
+            if(opened >= 0 and optimized[opened].kind == CLICK and
+               optimized[opened].tag == 'shopButton'):
+                del optimized[opened]
+                if(0 < opened < len(optimized) and
+                   optimized[opened-1].kind == WAIT):
+                    # the waits around it are in a row now
+                    optimized[opened-1:opened+1] = [Action(
+                        WAIT, duration=optimized[opened-1].duration +
+                        optimized[opened].duration)]
+                continue
+
+        if(action.tag == 'resetChicken'):
+            if(chickenReset):
+                continue
+            chickenReset = True
+        elif(action.kind != CLICK or
+             action.tag not in COURIER_NEUTRAL_TAGS):
+            chickenReset = False
+        optimized.append(action)
+    return optimized
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+# benchmark.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import timeit
+from collections import OrderedDict
+
+import validator
+import gamecontroller
+import iocontroller
+import peripherals
+import tpacLaunch
+import twitchclient
+import clocks
+
+# typical chat: mostly non-command chatter, some commands, some typos
+SAMPLE_LINES = [
+    'hello everyone',
+    'LUL that was a bad move',
+    'PogChamp',
+    'why would you sell that',
+    '!m aa a1',
+    '!move bb c2',
+    '!decline',
+    '!stay',
+    '!p 3',
+    '!shop on',
+    '!r',
+    '!m aa zz',
+    '!lol',
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!',
+]
+
+# one valid command per pattern (see validator.PATTERNS)
+SAMPLE_COMMANDS = OrderedDict([
+    ('move', '!m aa a1'),
+    ('movedirection', '!m left'),
+    ('movefromslots', '!aa top'),
+    ('grab', '!g h8'),
+    ('bench', '!b a2'),
+    ('sell', '!s g7'),
+    ('rq', '!rq'),
+    ('reroll', '!r'),
+    ('buyxp', '!x 3'),
+    ('shop', '!shop on'),
+    ('lock', '!l'),
+    ('pick', '!p 1'),
+    ('itemtohero', '!i 4 aa'),
+    ('tab', '!tab 3'),
+    ('random', '!random'),
+    ('search', '!search'),
+    ('accept', '!accept'),
+    ('decline', '!decline'),
+    ('reconnect', '!reconnect'),
+    ('calib', '!calib'),
+    ('run', '!run left'),
+    ('lockitem', '!il 5'),
+    ('stay', '!stay'),
+    ('write', '!write'),
+    ('exec', '!exec'),
+    ('stack', '!stack !m aa a1')
+])
+
+# not measured by the dispatch benchmark: rq starts a real countdown and
+# random does something else every time
+UNTIMED_KINDS = ('rq', 'random')
+
+SETTINGS = """[Settings]
+HOST = 127.0.0.1
+PORT = 6667
+AUTH = oauth:benchmark
+USERNAME = benchmark
+APP = benchmark
+CHAT_CHANNEL = benchmark
+LENGTH = 10
+HOTKEYS = m,b,s,r,x
+RESOLUTION = 1920x1080
+OUTPUT_DIR = {0}
+MODE = anarchy
+BACKEND = null
+"""
+
+
+def legacyValidateCommand(command):
+    '''Linear scan over every pattern as done before the token table.
+    Kept to compare the current validator against.
+
+    Keyword arguments:
+        command -- Command (string) to be validated
+    '''
+    if(command[:1] != '!'):
+        return None
+    for pattern in validator.PATTERNS:
+        if(re.match(validator.PATTERNS[pattern], command, re.IGNORECASE)):
+            return pattern
+    return False
+
+
+def timeValidator(function, lines, repeat=5, number=2000):
+    '''Returns the best time per line in microseconds
+
+    Keyword arguments:
+        function -- Validator function that takes a chat line
+        lines -- Chat lines to validate
+        repeat -- How often the measurement is repeated
+        number -- How often all lines are validated per measurement
+    '''
+    def run():
+        for line in lines:
+            function(line)
+    best = min(timeit.repeat(run, repeat=repeat, number=number))
+    return best / (number * len(lines)) * 1e6
+
+
+def benchmarkValidator():
+    '''Compares the legacy validator with validator.validateCommand per
+    sample line and prints the results'''
+    print('{0:<30}{1:>12}{2:>12}{3:>9}'.format(
+        'line', 'legacy us', 'current us', 'speedup'))
+    for line in SAMPLE_LINES:
+        legacy = timeValidator(legacyValidateCommand, [line])
+        current = timeValidator(validator.validateCommand, [line])
+        print('{0:<30}{1:>12.3f}{2:>12.3f}{3:>8.1f}x'.format(
+            line[:29], legacy, current, legacy / current))
+
+
+def measure(function, repeat=3):
+    """Returns the best time of one call in microseconds
+
+    Keyword arguments:
+        function -- Function without arguments
+        repeat -- How often the measurement is repeated
+    """
+    timer = timeit.Timer(function)
+    # calls per measurement so that one measurement takes at least 0.2s
+    number, dummy = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e6
+
+
+def benchmarkValidation(results, repeat):
+    """validator.validateCommand per pattern, for chat and malformed
+    commands"""
+    for kind, line in SAMPLE_COMMANDS.items():
+        results['validate.' + kind] = measure(
+            lambda: validator.validateCommand(line), repeat)
+    chat = [line for line in SAMPLE_LINES if line[:1] != '!']
+    results['validate.chat'] = measure(
+        lambda: [validator.validateCommand(line) for line in chat],
+        repeat) / len(chat)
+    malformed = ['!m aa zz', '!lol', '!!!!!!!!!!!!!!!!!!!!!!!!!!', '!p 9']
+    results['validate.malformed'] = measure(
+        lambda: [validator.validateCommand(line) for line in malformed],
+        repeat) / len(malformed)
+
+
+def benchmarkIngest(results, repeat):
+    """twitchclient.parseCommands on the sample lines as received from
+    Twitch"""
+    data = ''.join(
+        ':viewer{0}!viewer{0}@viewer{0}.tmi.twitch.tv PRIVMSG #channel '
+        ':{1}\r\n'.format(i, line)
+        for i, line in enumerate(SAMPLE_LINES)).encode('UTF-8')
+    results['ingest.chat'] = measure(
+        lambda: twitchclient.parseCommands(data), repeat) / len(SAMPLE_LINES)
+
+
+def benchmarkDispatch(results, repeat, directory):
+    """GameController.findAndExecute per command kind with the null backend,
+    so only compiling and optimizing the action plan is measured. The
+    delayed commands (tab tour, accept) run on a virtual clock as part of
+    it"""
+    myIO = iocontroller.IOController(directory)
+    # overlay files are written in the background as in the running bot
+    myIO.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        gc = gamecontroller.GameController(
+            'benchmark', ['m', 'b', 's', 'r', 'x'], ['1920', '1080'],
+            ioController=myIO, backend=peripherals.NullBackend(),
+            clock=clocks.VirtualClock())
+    for kind, line in SAMPLE_COMMANDS.items():
+        if(kind in UNTIMED_KINDS):
+            continue
+        command = validator.parseCommand(line)
+        results['dispatch.' + kind] = measure(
+            lambda: (gc.findAndExecute(command), gc.runTimers(),
+                     gc.commandStack.clear()), repeat)
+
+
+def benchmarkSetup(results, repeat, directory):
+    """Vote counting (Setup.most_common), the command history
+    (Setup.addToCommandList) and the overlay files (IOController)"""
+    settingsFile = os.path.join(directory, 'settings.txt')
+    with open(settingsFile, 'w') as f:
+        f.write(SETTINGS.format(directory))
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup = tpacLaunch.Setup(settingsFile)
+    myIO = setup.myIO
+    results['io.writeFile'] = measure(
+        lambda: myIO.writeFile('commands.txt', setup.commands.text), repeat)
+    # overlay files are written in the background as in the running bot
+    myIO.start(setup.overlay_rate)
+    results['io.updateFile'] = measure(
+        lambda: myIO.updateFile('commands.txt', setup.commands), repeat)
+
+    rng = random.Random(0)
+    commands = [validator.parseCommand(line)
+                for line in SAMPLE_COMMANDS.values()]
+    for size in (10, 1000, 100000):
+        votes = [rng.choice(commands) for dummy in range(size)]
+        results['most_common.{0}'.format(size)] = measure(
+            lambda: setup.most_common(votes), repeat)
+
+    command = commands[0]
+    setup.mode = 'anarchy'
+    results['addToCommandList.anarchy'] = measure(
+        lambda: setup.addToCommandList('viewer', command), repeat)
+    setup.mode = 'democracy'
+    results['addToCommandList.democracy'] = measure(
+        lambda: setup.addToCommandList('viewer', command), repeat)
+
+
+def runBenchmarks(repeat=3):
+    """Runs all benchmarks and returns name -> microseconds per call"""
+    results = OrderedDict()
+    with tempfile.TemporaryDirectory() as directory:
+        benchmarkValidation(results, repeat)
+        benchmarkIngest(results, repeat)
+        benchmarkDispatch(results, repeat, directory)
+        benchmarkSetup(results, repeat, directory)
+    return results
+
+
+def saveResults(filename, results):
+    """Writes the results as baseline (JSON)"""
+    with open(filename, 'w') as f:
+        json.dump({'python': platform.python_version(),
+                   'machine': platform.machine(),
+                   'results': results}, f, indent=2)
+
+
+def compareResults(baseline, results, tolerance):
+    """Prints the results next to the baseline. Returns the names of the
+    benchmarks that got slower by more than tolerance (share)"""
+    regressions = []
+    print('{0:<32}{1:>14}{2:>14}{3:>9}'.format(
+        'benchmark', 'baseline us', 'current us', 'change'))
+    for name, current in results.items():
+        before = baseline.get(name)
+        if(before is None):
+            print('{0:<32}{1:>14}{2:>14.3f}'.format(name, '-', current))
+            continue
+        change = current / before - 1
+        mark = ''
+        if(change > tolerance):
+            regressions.append(name)
+            mark = '  REGRESSION'
+        print('{0:<32}{1:>14.3f}{2:>14.3f}{3:>+8.0%}{4}'.format(
+            name, before, current, change, mark))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the hot paths of the bot')
+    parser.add_argument('--save', metavar='FILE',
+                        help='store the results as baseline')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare the results with a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against the baseline '
+                        '(default 0.2 = 20%%)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--legacy', action='store_true',
+                        help='compare the validator with the legacy one')
+    args = parser.parse_args()
+    if(args.legacy):
+        benchmarkValidator()
+        sys.exit()
+    results = runBenchmarks(args.repeat)
+    regressions = []
+    if(args.compare):
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)['results']
+        regressions = compareResults(baseline, results, args.tolerance)
+    else:
+        compareResults({}, results, args.tolerance)
+    if(args.save):
+        saveResults(args.save, results)
+    if(regressions):
+        print('{0} regression(s)'.format(len(regressions)))
+        sys.exit(1)
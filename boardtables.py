@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+# boardtables.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import math
+from types import MappingProxyType
+
+import coordmaps
+import geometry
+
+# hand-captured coordinates: (width, height, coordmap)
+REFERENCES = (
+    (1024, 768, coordmaps.COORDMAP_RESOLUTION_4TO3),
+    (1920, 1080, coordmaps.COORDMAP_RESOLUTION_16TO9),
+    (1280, 800, coordmaps.COORDMAP_RESOLUTION_16TO10)
+)
+
+# offsets of the lock label inside the rightclick menu of an item
+ITEM_LOCK_OFFSET_FIRST_ROW = (54, 31)
+ITEM_LOCK_OFFSET_OTHER_ROWS = (75, 0)  # 6 old
+
+# the chicken routes were taken with 1920x1080
+CHICKEN_ROUTES_RESOLUTION = (1920, 1080)
+CHICKEN_ROUTES = {
+    'left': coordmaps.CHICKENLEFT,
+    'top': coordmaps.CHICKENTOP,
+    'right': coordmaps.CHICKENRIGHT,
+    'bot': coordmaps.CHICKENBOT
+}
+
+# Dota scales its view with the screen height and extends it to the sides
+# for wider screens (Hor+). A location is anchored to the left edge, the
+# center or the right edge if its position relative to that anchor (in
+# screen heights) differs less than this between the references
+ANCHOR_TOLERANCE = 0.025
+ANCHORS = (('left', 0.0), ('center', 0.5), ('right', 1.0))
+
+# (width, height) -> BoardTables, shared by all game controllers
+tablesByResolution = {}
+
+
+def normalize(point, width, height, anchor=0.5):
+    """Returns the position of a screen point relative to an anchor in
+    screen heights
+
+    Keyword arguments:
+        point -- (x, y)
+        width -- Screen width
+        height -- Screen height
+        anchor -- Horizontal anchor (0: left edge, 0.5: center, 1: right edge)
+    """
+    x, y = point
+    return (x - anchor * width) / height, y / height
+
+
+def denormalize(point, width, height, anchor=0.5):
+    """Inverse of normalize, returns int screen coordinates"""
+    u, v = point
+    return int(round(anchor * width + u * height)), int(round(v * height))
+
+
+def referencePoint(coordmap, name):
+    """Returns a location of a coordmap as (x, y) floats"""
+    return float(coordmap[name]['x']), float(coordmap[name]['y'])
+
+
+def nearestReference(width, height):
+    """Returns the reference (width, height, coordmap) with the aspect ratio
+    closest to the given resolution"""
+    aspectRatio = width / height
+    return min(REFERENCES, key=lambda reference: abs(
+        math.log(aspectRatio * reference[1] / reference[0])))
+
+
+def findAnchor(name):
+    """Returns the horizontal anchor of a location (see ANCHORS) or None if
+    it does not keep its position relative to any anchor"""
+    bestAnchor = None
+    bestSpread = ANCHOR_TOLERANCE
+    for dummy, anchor in ANCHORS:
+        points = [normalize(referencePoint(coordmap, name), width, height,
+                            anchor)
+                  for width, height, coordmap in REFERENCES]
+        spread = max(max(p[i] for p in points) - min(p[i] for p in points)
+                     for i in (0, 1))
+        if(spread <= bestSpread):
+            bestAnchor = anchor
+            bestSpread = spread
+    return bestAnchor
+
+
+def fitBoard():
+    """Fits the homography from board coordinates to the centered screen
+    coordinates (see normalize) of all references.
+    Board coordinates are (column, row) with a1 = (0, 0) and h8 = (7, 7)"""
+    boardPoints = []
+    screenPoints = []
+    for width, height, coordmap in REFERENCES:
+        for row in range(8):
+            for column, letter in ((0, 'a'), (7, 'h')):
+                point = referencePoint(coordmap, letter + str(row + 1))
+                boardPoints.append((column, row))
+                screenPoints.append(normalize(point, width, height))
+    return geometry.fitHomography(boardPoints, screenPoints)
+
+
+def intermediatePoint(pointA, pointB, intervals, idx):
+    """Returns the point idx steps from pointA towards pointB if the distance
+    between them is split into intervals steps.
+
+    Keyword arguments:
+        pointA -- (x, y)
+        pointB -- (x, y)
+        intervals -- Number of steps between pointA and pointB
+        idx -- [step] or [step in x, step in y]
+    """
+    aX, aY = pointA
+    bX, bY = pointB
+    distanceBetweenEachPointX = (aX - bX)/intervals
+    distanceBetweenEachPointY = (aY - bY)/intervals
+    if(len(idx) == 1):
+        newCoordX = aX - idx[0] * distanceBetweenEachPointX
+        newCoordY = aY - idx[0] * distanceBetweenEachPointY
+    else:
+        newCoordX = aX - idx[0] * distanceBetweenEachPointX
+        newCoordY = aY - idx[1] * distanceBetweenEachPointY
+    return int(newCoordX), int(newCoordY)
+
+
+def getTables(width, height):
+    """Returns the BoardTables of a resolution, computed on first use
+
+    Keyword arguments:
+        width -- Screen width
+        height -- Screen height
+    """
+    tables = tablesByResolution.get((width, height))
+    if(tables is None):
+        tables = tablesByResolution.setdefault(
+            (width, height), BoardTables(width, height))
+    return tables
+
+
+class BoardTables:
+    """Screen coordinates of every clickable target for one resolution,
+    computed once. All coordinates are (x, y) int tuples, the tables are
+    read-only so they can be shared.
+    Fields and chicken routes are on the chessboard plane and are mapped by
+    the board homography (see fitBoard), the other locations are scaled
+    from the reference with the closest aspect ratio.
+
+    Attributes:
+        reference -- (width, height, coordmap) of the used reference
+        fields -- 72 fields by field index (validator.fieldToIndex):
+        a1..h8, then the bench aa..hh
+        picks -- 5 pieces of the shop
+        players -- 8 player avatars by placement
+        abilities -- 5 chicken abilities
+        itemSlots -- 9 chicken item slots
+        itemLocks -- 9 lock labels of the rightclick menu of the item slots
+        chickenRoutes -- side (left, top, right, bot) -> waypoints of !run
+        buttons -- name of a location in the coordmap -> coordinates
+    """
+
+    def __init__(self, width, height):
+        """Computes all tables.
+
+        Keyword arguments:
+            width -- Screen width
+            height -- Screen height
+        """
+        self.reference = nearestReference(width, height)
+        referenceWidth, referenceHeight, coordmap = self.reference
+
+        buttons = {}
+        for name in coordmap:
+            point = referencePoint(coordmap, name)
+            anchor = findAnchor(name)
+            if(anchor is None):
+                # no fixed layout, stretch the reference
+                buttons[name] = (int(point[0] * width / referenceWidth),
+                                 int(point[1] * height / referenceHeight))
+            else:
+                buttons[name] = denormalize(
+                    normalize(point, referenceWidth, referenceHeight,
+                              anchor), width, height, anchor)
+        self.buttons = MappingProxyType(buttons)
+
+        board = fitBoard()
+        toBoard = board.inverse()
+        # the bench is a row in front of the chessboard
+        benchFirst, benchLast = (
+            [sum(values) / len(REFERENCES) for values in zip(*toBoard.apply(
+                normalize(referencePoint(reference, name), refWidth,
+                          refHeight)
+                for refWidth, refHeight, reference in REFERENCES))]
+            for name in ('aa', 'hh'))
+        boardPoints = [(column, row) for row in range(8)
+                       for column in range(8)]
+        for column in range(8):
+            boardPoints.append((
+                benchFirst[0] + (benchLast[0] - benchFirst[0]) * column / 7,
+                benchFirst[1] + (benchLast[1] - benchFirst[1]) * column / 7))
+        routeWidth, routeHeight = CHICKEN_ROUTES_RESOLUTION
+        routeSlices = {}
+        for side, route in CHICKEN_ROUTES.items():
+            start = len(boardPoints)
+            boardPoints.extend(toBoard.apply(
+                normalize(referencePoint(route, name), routeWidth,
+                          routeHeight)
+                for name in route))
+            routeSlices[side] = slice(start, len(boardPoints))
+        # all points of the chessboard plane in one go
+        screenPoints = [denormalize(point, width, height)
+                        for point in board.apply(boardPoints)]
+        self.fields = tuple(screenPoints[:72])
+        self.chickenRoutes = MappingProxyType(
+            {side: tuple(screenPoints[routeSlice])
+             for side, routeSlice in routeSlices.items()})
+
+        self.picks = tuple(
+            intermediatePoint(buttons['pickFirst'], buttons['pickLast'], 4,
+                              [i])
+            for i in range(5))
+        self.players = tuple(
+            intermediatePoint(buttons['playerPosFirst'],
+                              buttons['playerPosLast'], 7, [i])
+            for i in range(8))
+        self.abilities = tuple(
+            intermediatePoint(buttons['chickenAbility1'],
+                              buttons['chickenAbility5'], 4, [i])
+            for i in range(5))
+
+        # We have 3x3 item matrix, after 3 and 6 the next row starts
+        self.itemSlots = tuple(
+            intermediatePoint(buttons['chickSlot1'], buttons['chickSlot9'], 3,
+                              [slot % 3, slot // 3])
+            for slot in range(9))
+        itemLocks = []
+        for slot, (x, y) in enumerate(self.itemSlots):
+            # the rightclick menu changes position depending on row
+            if(slot < 3):
+                offsetX, offsetY = ITEM_LOCK_OFFSET_FIRST_ROW
+            else:
+                offsetX, offsetY = ITEM_LOCK_OFFSET_OTHER_ROWS
+            itemLocks.append((x + offsetX, y + offsetY))
+        self.itemLocks = tuple(itemLocks)
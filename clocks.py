@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# clocks.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import asyncio
+import heapq
+import itertools
+import time
+from threading import Condition
+
+
+class Clock:
+    """Real time. All timing of the bot goes through a clock, so it can be
+    replaced by a VirtualClock"""
+
+    def time(self):
+        """Returns the current time in seconds (only differences count)"""
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        """Blocks the calling thread
+
+        Keyword arguments:
+            seconds -- Time to sleep
+        """
+        time.sleep(seconds)
+
+    async def wait(self, seconds):
+        """Suspends the calling coroutine
+
+        Keyword arguments:
+            seconds -- Time to wait
+        """
+        await asyncio.sleep(seconds)
+
+    async def waitForEvent(self, event, seconds=None):
+        """Suspends the calling coroutine until the event is set or the time
+        is up. Returns whether the event was set
+
+        Keyword arguments:
+            event -- asyncio.Event
+            seconds -- Time to wait at most, None for no limit
+        """
+        try:
+            await asyncio.wait_for(event.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        return event.is_set()
+
+
+class VirtualClock(Clock):
+    """Simulated time that jumps ahead instead of sleeping.
+    Every sleeping thread or waiting coroutine has a deadline. The one with
+    the earliest deadline wakes up first and moves the time to its
+    deadline, so sleeps that overlap in real code overlap here as well.
+    The time never goes backwards"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+        # heap of (deadline, ticket) of everyone sleeping
+        self.sleepers = []
+        self.tickets = itertools.count()
+        self.condition = Condition()
+
+    def time(self):
+        return self.now
+
+    def schedule(self, seconds):
+        """Registers a sleeper and returns its heap entry"""
+        with self.condition:
+            entry = (self.now + max(0.0, seconds), next(self.tickets))
+            heapq.heappush(self.sleepers, entry)
+            return entry
+
+    def wakeUp(self, entry):
+        """Moves the time to the deadline of the entry if it is the earliest
+        one. Returns whether it was"""
+        with self.condition:
+            if(self.sleepers[0] is not entry):
+                return False
+            heapq.heappop(self.sleepers)
+            self.now = max(self.now, entry[0])
+            self.condition.notify_all()
+            return True
+
+    def cancel(self, entry):
+        """Removes a sleeper that stopped waiting early"""
+        with self.condition:
+            if(entry in self.sleepers):
+                self.sleepers.remove(entry)
+                heapq.heapify(self.sleepers)
+                self.condition.notify_all()
+
+    def sleep(self, seconds):
+        entry = self.schedule(seconds)
+        with self.condition:
+            while not self.wakeUp(entry):
+                self.condition.wait()
+
+    async def wait(self, seconds):
+        entry = self.schedule(seconds)
+        try:
+            # let the other coroutines run until this one is the next to
+            # wake up
+            while True:
+                await asyncio.sleep(0)
+                if self.wakeUp(entry):
+                    return
+        finally:
+            # cancelled coroutines must not block the other sleepers
+            self.cancel(entry)
+
+    async def waitForEvent(self, event, seconds=None):
+        entry = None
+        if(seconds is not None):
+            entry = self.schedule(seconds)
+        try:
+            while True:
+                await asyncio.sleep(0)
+                if event.is_set():
+                    return True
+                if(entry is not None and self.wakeUp(entry)):
+                    return False
+        finally:
+            if(entry is not None):
+                self.cancel(entry)
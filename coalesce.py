@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# coalesce.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import validator
+
+# commands of a group only change one state (the shop, the view), so the
+# latest of several waiting ones is the only one that counts
+SUPERSEDING = {
+    'shop': 'shop',
+    'tab': 'view',
+}
+# commands that are folded into a waiting one instead of merged
+FOLDED = ('buyxp',)
+# commands that are never merged, each one adds to the command stack
+UNMERGED = ('stack',)
+# the game buys xp at most 4 times per command (see buyXP)
+MAX_XP = 4
+# the remembered commands are cleaned up when there are more than this
+RECENT_LIMIT = 256
+
+
+class Coalescer:
+    """Saves game input in front of the executor queue.
+    A command identical to one accepted less than window seconds ago is
+    merged into it, a shop or tab command drops the waiting shop or tab
+    commands of the chat right before it and several waiting !x are folded into one
+    (up to !x 4).
+
+    Attributes:
+        merged -- Number of commands merged into identical ones
+        superseded -- Number of waiting commands dropped by a later one
+        folded -- Number of commands folded into a waiting one
+    """
+
+    def __init__(self, window=1.0):
+        """Creates the coalescer
+
+        Keyword arguments:
+            window -- Seconds in which identical commands are merged,
+            0 to never merge
+        """
+        self.window = window
+        # command -> time it was accepted last
+        self.recent = {}
+        self.merged = 0
+        self.superseded = 0
+        self.folded = 0
+
+    def add(self, queue, command, now):
+        """Adds a command to the waiting commands unless it is merged or
+        folded. Returns whether it was added
+
+        Keyword arguments:
+            queue -- collections.deque of waiting commands, oldest first
+            command -- parsed command (validator.Command)
+            now -- Current time (see clocks)
+        """
+        kind = command.kind
+        if(kind in FOLDED):
+            return not self.fold(queue, command)
+        if(self.window > 0 and kind not in UNMERGED):
+            accepted = self.recent.get(command)
+            if(accepted is not None and now - accepted < self.window):
+                self.merged += 1
+                return False
+            self.remember(command, now)
+        group = SUPERSEDING.get(kind)
+        if(group is not None):
+            # commands of the bot itself (the tab tour) are never dropped
+            while (queue and not queue[-1].internal and
+                   SUPERSEDING.get(queue[-1].kind) == group):
+                queue.pop()
+                self.superseded += 1
+        queue.append(command)
+        return True
+
+    def fold(self, queue, command):
+        """Adds the xp of a !x to the waiting !x commands with room left.
+        Returns whether all of it was folded, otherwise the command holds
+        the remaining xp"""
+        amount = command.args[0]
+        for i, waiting in enumerate(queue):
+            if(waiting.kind != command.kind or waiting.args[0] >= MAX_XP):
+                continue
+            added = min(amount, MAX_XP - waiting.args[0])
+            queue[i] = self.xpCommand(waiting, waiting.args[0] + added)
+            amount -= added
+            if(amount == 0):
+                self.folded += 1
+                return True
+        if(amount != command.args[0]):
+            command.args = (amount,)
+            command.text = '!x {0}'.format(amount)
+        queue.append(command)
+        return False
+
+    def xpCommand(self, waiting, amount):
+        """Returns a !x command with the timestamps of a waiting one"""
+        command = validator.Command(
+            waiting.kind, (amount,), '!x {0}'.format(amount))
+        command.received = waiting.received
+        command.validated = waiting.validated
+        return command
+
+    def remember(self, command, now):
+        """Remembers when a command was accepted"""
+        recent = self.recent
+        if(len(recent) >= RECENT_LIMIT):
+            self.recent = recent = {
+                key: accepted for key, accepted in recent.items()
+                if now - accepted < self.window}
+        recent[command] = now
+
+    def counts(self):
+        """Returns the numbers of merged, superseded and folded commands"""
+        return {'merged': self.merged, 'superseded': self.superseded,
+                'folded': self.folded}
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# commandhistory.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+from collections import deque
+from threading import Lock
+
+
+class CommandHistory:
+    """Ring buffer of the most recent commands for the stream view.
+    Adding a command costs the same however long the history is, the
+    overlay text (one command per line) is only joined when it is written.
+    Hand the history itself to IOController.updateFile, it is rendered
+    with str() by the background writer"""
+
+    def __init__(self, length):
+        self.length = max(1, length)
+        # lines with line ending, oldest first
+        self.lines = deque(maxlen=self.length)
+        # commands are added by the chat reader while the writer renders
+        self.lock = Lock()
+
+    def add(self, line):
+        """Adds a line and drops the oldest one if the history is full
+
+        Keyword arguments:
+            line -- Text to show, without line ending
+        """
+        with self.lock:
+            self.lines.append(line + '\n')
+
+    @property
+    def text(self):
+        """Overlay text, oldest command first"""
+        with self.lock:
+            return ''.join(self.lines)
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        with self.lock:
+            lines = list(self.lines)
+        for line in lines:
+            yield line[:-1]
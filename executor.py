@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# executor.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import traceback
+from collections import deque
+from threading import Condition, Thread
+
+# what happens to a command that arrives while the queue is full:
+# dropoldest -- the longest waiting command is dropped
+# dropnewest -- the arriving command is dropped
+# coalesce -- the arriving command is merged into an identical waiting one,
+#             otherwise the longest waiting command is dropped
+POLICIES = ('dropoldest', 'dropnewest', 'coalesce')
+
+
+class CommandExecutor:
+    """Executes parsed commands one after another in a worker thread.
+    Chat reading only queues the commands, so it never waits for the
+    (slow) game input. The queue is bounded, overflow is handled by the
+    configured policy"""
+
+    def __init__(self, gameController, maxLength=20, policy='dropoldest',
+                 metrics=None, coalescer=None):
+        if(policy not in POLICIES):
+            raise ValueError('Unknown queue policy: {0}'.format(policy))
+        self.gc = gameController
+        # metrics.BotMetrics that times the executed commands
+        self.metrics = metrics
+        # coalesce.Coalescer that merges commands before they are queued
+        self.coalescer = coalescer
+        self.maxLength = max(1, maxLength)
+        self.policy = policy
+        self.queue = deque()
+        self.condition = Condition()
+        self.dropped = 0
+        # internal commands in the queue, they are not counted as its length
+        self.internalWaiting = 0
+        # commands of the batch that is being executed right now
+        self.executing = 0
+        self.running = False
+        self.worker = None
+
+    def start(self):
+        """Starts the worker thread"""
+        self.running = True
+        self.worker = Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        """Stops the worker thread after the current command.
+        Waiting commands stay in the queue"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def submit(self, command, priority=False):
+        """Queues a command for execution. Returns False if the command was
+        merged by the coalescer or dropped or merged because the queue is
+        full. Commands of the bot itself (command.internal, for example the
+        end of the ragequit countdown) are never merged or dropped and do
+        not count toward the length of the queue
+
+        Keyword arguments:
+            command -- parsed command (validator.Command)
+            priority -- Execute it before the waiting commands
+        """
+        with self.condition:
+            queue = self.queue
+            if(command.internal):
+                queue.append(command)
+                self.internalWaiting += 1
+                self.condition.notify()
+                return True
+            if(self.coalescer is None):
+                queue.append(command)
+            elif not self.coalescer.add(queue, command, self.gc.clock.time()):
+                return False
+            if(len(queue) - self.internalWaiting > self.maxLength):
+                self.dropped += 1
+                if(self.policy == 'dropnewest' or (
+                        self.policy == 'coalesce' and
+                        queue.count(command) > 1)):
+                    queue.pop()
+                    return False
+                self.dropOldest()
+            if(priority and queue and queue[-1] is command):
+                queue.pop()
+                queue.appendleft(command)
+            self.condition.notify()
+            return True
+
+    def dropOldest(self):
+        """Drops the longest waiting command that is not internal"""
+        queue = self.queue
+        for i, waiting in enumerate(queue):
+            if not waiting.internal:
+                del queue[i]
+                return
+
+    def pending(self):
+        """Returns the number of commands that are not done yet: the
+        waiting ones and the batch being executed"""
+        return len(self.queue) + self.executing
+
+    def run(self):
+        """Worker loop: executes waiting commands until stopped.
+        All commands waiting at once are executed as one batch, so the
+        game controller can skip actions they have in common"""
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                batch = list(self.queue)
+                self.queue.clear()
+                self.internalWaiting = 0
+                self.executing = len(batch)
+            clock = self.gc.clock
+            start = clock.time()
+            try:
+                self.gc.executeBatch(batch)
+            except Exception:
+                # a failing command must not stop the game input
+                traceback.print_exc()
+            self.executing = 0
+            if(self.metrics is not None):
+                self.metrics.batchExecuted(batch, start, clock.time())
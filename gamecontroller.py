@@ -16,71 +16,105 @@
 
 
 import subprocess
-import time
 import random
-import math
-from collections import OrderedDict
-from threading import Thread
+from collections import OrderedDict, deque
+from threading import Lock
 
 import validator
+import actionplan
+import uistate
+import clocks
 import iocontroller
-import coordmaps
+import boardtables
 import peripherals
+import timing
+import scheduling
 
 
 class GameController:
     """Controls the game input. Emulates mouse and keyboard input via pynput.
-    Each Dota AutoChess action is mapped as function"""
-
-    myIO = iocontroller.IOController()
-    myPeripheral = peripherals.Peripherals()
-    commandStack = []
-    # default delay after interacting with the dota menu
-    sleepBetweenMenu = 1
-    dota2WindowID = ''
-    allowRagequit = False
+    Each Dota AutoChess action is mapped as function. The functions do not
+    move the mouse themselves but add their actions to an action plan
+    (see actionplan) which is optimized and then run by the peripherals"""
+
     TWITCHEMOTES = ['monkaS', '4Head', 'FailFish', 'DansGame', 'LUL', 'Kappa',
                     'NotLikeThis', 'OSFrog', 'PJSalt', 'WutFace', 'cmonBruh',
                     'TriHard', 'PogChamp', 'ResidentSleeper']
 
-    COORDMAP = {}
-
-    itemoffsetFirstRowX = 54
-    itemoffsetFirstRowy = 31
-    itemoffsetSecondRowX = 75
-    itemoffsetSecondRowy = 0  # 6 old
-
-    def __init__(self, channelName, hotkeys, resolution):
+    def __init__(self, channelName, hotkeys, resolution, timingProfiles=None,
+                 ioController=None, backend=None, clock=None, stackDepth=10,
+                 scheduler=None):
         self.channelName = channelName
         self.hotkeys = hotkeys
         self.resolution = resolution
-
-        aR4To3 = (int(self.resolution[0])/int(self.resolution[1]) * 3/4)
-        aR16To9 = (int(self.resolution[0])/int(self.resolution[1]) * 9/16)
-        aR16To10 = (int(self.resolution[0])/int(self.resolution[1]) * 10/16)
-        if(math.isclose(aR4To3, 1.0, rel_tol=0.05)):
-            print('4:3!')
-            diffResoX = int(self.resolution[0])/1024
-            diffResoY = int(self.resolution[1])/768
-            self.COORDMAP = coordmaps.COORDMAP_RESOLUTION_4TO3
-
-        elif(math.isclose(aR16To9, 1.0, rel_tol=0.05)):
-            print('16:9!')
-            diffResoX = int(self.resolution[0])/1920
-            diffResoY = int(self.resolution[1])/1080
-            self.COORDMAP = coordmaps.COORDMAP_RESOLUTION_16TO9
-
-        elif(math.isclose(aR16To10, 1.0, rel_tol=0.05)):
-            print('16:10!')
-            diffResoX = int(self.resolution[0])/1280
-            diffResoY = int(self.resolution[1])/800
-            self.COORDMAP = coordmaps.COORDMAP_RESOLUTION_16TO10
-
-        for coord in self.COORDMAP:
-            relativeXValue = float(self.COORDMAP[coord]['x']) * diffResoX
-            relativeYValue = float(self.COORDMAP[coord]['y']) * diffResoY
-            self.COORDMAP[coord]['x'] = str(int(relativeXValue))
-            self.COORDMAP[coord]['y'] = str(int(relativeYValue))
+        # writes the text files for the stream view (ragequit countdown)
+        self.myIO = ioController or iocontroller.IOController()
+        # parsed commands of !stack waiting for !exec, at most stackDepth
+        self.commandStack = deque()
+        self.stackDepth = max(1, stackDepth)
+        self.dota2WindowID = ''
+        self.allowRagequit = False
+        # timers of the running ragequit countdown
+        self.ragequitTimers = []
+        # delays of the macros and after each peripheral action
+        self.timing = timingProfiles or timing.TimingProfiles()
+        # all waiting is done with this clock (see clocks)
+        self.clock = clock or clocks.Clock()
+        # sends the input to the game (see peripherals.BACKENDS)
+        self.myPeripheral = peripherals.Peripherals(
+            self.timing, backend, self.clock)
+        # runs countdowns and delayed commands (see later)
+        self.scheduler = scheduler or scheduling.Scheduler(self.clock)
+        # gets the delayed commands, for example the executor of the bot.
+        # By default they wait in delayedCommands for runDelayed(), the
+        # scheduler must not block on the game input
+        self.delayedCommands = deque()
+        self.commandSink = self.delayedCommands.append
+        # actions of the commands currently being compiled
+        self.plan = []
+        self.planLock = Lock()
+        # shop and chicken state as left behind by the compiled actions
+        self.ui = uistate.UIState()
+
+        # screen coordinates of every target, computed once
+        width, height = int(self.resolution[0]), int(self.resolution[1])
+        self.tables = boardtables.getTables(width, height)
+        print('{0}x{1}: using the {2}x{3} reference coordinates'.format(
+            width, height, self.tables.reference[0],
+            self.tables.reference[1]))
+
+        # maps each command kind (see validator.PATTERNS) to its action.
+        # The handlers get the parsed arguments of the command
+        self.commandHandlers = {
+            'move': self.movePiece,
+            'movedirection': self.movePieceDirection,
+            'movefromslots': self.movePieceFromSlot,
+            'bench': self.benchPiece,
+            'sell': self.sellPiece,
+            'reroll': self.rerollPieces,
+            'buyxp': self.buyXP,
+            'shop': self.showSelection,
+            'pick': self.pickPiece,
+            'lock': self.lockSelection,
+            'grab': self.grabItem,
+            'itemtohero': self.moveItem,
+            'tab': self.tabTour,
+            'random': self.randomAction,
+            'rq': self.leaveGame,
+            'lockitem': self.toggleLockItem,
+            'run': self.grabItemChickenloop,
+            'stay': self.abortRagequit,
+            'write': self.writeMessage,
+            'stack': self.addToStack,
+            'exec': self.executeStack,
+            'search': self.searchGame,
+            'accept': self.acceptGame,
+            'calib': self.camCalibration,
+            'reconnect': self.reconnectGame,
+            'decline': self.declineGame,
+            # not a chat command, the end of the ragequit countdown
+            'quit': self.quitGame
+        }
 
     def searchGame(self):
         """Initiates the search for a Dota AutoChess game inside Dota."""
@@ -90,51 +124,37 @@ class GameController:
         # self.pressKeyWithPynput(KeyboardKey.esc)
 
         # go to main menu first
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['dotaMainMenuBtn']['x'],
-            self.COORDMAP['dotaMainMenuBtn']['y'], '1')
-        time.sleep(self.sleepBetweenMenu)
+        self.clickButton('dotaMainMenuBtn')
+        self.wait(self.timing.get('menu'))
         # navigate to arcade
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['dotaArcadeBtn']['x'],
-            self.COORDMAP['dotaArcadeBtn']['y'], '1')
-        time.sleep(self.sleepBetweenMenu)
+        self.clickButton('dotaArcadeBtn')
+        self.wait(self.timing.get('menu'))
         # navigate to browse
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['dotaBrowseBtn']['x'],
-            self.COORDMAP['dotaBrowseBtn']['y'], '1')
-        time.sleep(self.sleepBetweenMenu)
+        self.clickButton('dotaBrowseBtn')
+        self.wait(self.timing.get('menu'))
         # navigate to autochess inside browselist (first entry)
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['dotaBrowseListAutoChessBtn']['x'],
-            self.COORDMAP['dotaBrowseListAutoChessBtn']['y'], '1')
-        time.sleep(self.sleepBetweenMenu)
+        self.clickButton('dotaBrowseListAutoChessBtn')
+        self.wait(self.timing.get('menu'))
         # navigate to autochess
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['dotaAutoChessBtn']['x'],
-            self.COORDMAP['dotaAutoChessBtn']['y'], '1')
-        time.sleep(self.sleepBetweenMenu)
+        self.clickButton('dotaAutoChessBtn')
+        self.wait(self.timing.get('menu'))
         # start autochess search
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['dotaPlayAutoChessBtn']['x'],
-            self.COORDMAP['dotaPlayAutoChessBtn']['y'], '1')
+        self.clickButton('dotaPlayAutoChessBtn')
         # automatically accept the first lobby to reduce user burden.
-        # Estimated time after a lobby is ready
-        waitForFirstLobby = 5
-        time.sleep(waitForFirstLobby)
-        self.acceptGame()
+        # Estimated time after a lobby is ready, the game input is free
+        # for other commands meanwhile
+        self.later(self.timing.get('firstlobby'), 'accept')
 
     def acceptGame(self):
         """Press the accept button in Dota"""
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['dotaAcceptBtn']['x'],
-            self.COORDMAP['dotaAcceptBtn']['y'], '1')
+        self.clickButton('dotaAcceptBtn')
+        # a new game starts
+        self.ui.forget()
 
     def declineGame(self):
         """Decline a lobby (useful if lobbies keep failing)"""
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['dotaDeclineBtn']['x'],
-            self.COORDMAP['dotaDeclineBtn']['y'], '1')
+        self.clickButton('dotaDeclineBtn')
+        self.ui.forget()
 
     def leaveGame(self):
         """Initiates a process of leaving the current AutoChess game
@@ -144,13 +164,14 @@ class GameController:
             print('ragequit already in process')
             return
         self.allowRagequit = True
-        # start counter in seperate thread
-        rageQuitJob = Thread(target=self.rageQuitProcess, args=())
-        rageQuitJob.start()
+        self.rageQuitProcess()
 
     def abortRagequit(self):
         """Stop quitting the current AutoChess game"""
         self.allowRagequit = False
+        for timer in self.ragequitTimers:
+            timer.cancel()
+        self.ragequitTimers = []
         # clear text file for stream view
         self.myIO.resetFile("ragequit.txt")
 
@@ -160,66 +181,62 @@ class GameController:
         Can be stopped by writing !stay in chat"""
         # how long should the message be displayed and the quitting delayed?
         targetTime = 20
-        starttime = time.time()
-        while True:
-            if(time.time() - starttime < targetTime):
-                if(self.allowRagequit):
-                    # write remaining time for chat
-                    # (adding +1s because of lazy cutting of decimals)
-                    self.myIO.writeFile(
-                        "ragequit.txt",
-                        "Time left till ragequit!: {0} \nTo abort write !stay"
-                        .format(
-                            str(1.0 + targetTime - (time.time() - starttime))
-                            .split('.')[0]
-                        ))
-                    # let one second pass to prevent spam
-                    time.sleep(1)
-                else:
-                    # quitting aborted, clean the file
-                    self.myIO.resetFile("ragequit.txt")
-                    break
-            else:
-                # time's up
-                break
-
-        # Ragequit still allowed?
-        if(self.allowRagequit):
-            # Press the dota arrow button on the upper left corner
-            self.myPeripheral.moveMouse(
-                self.COORDMAP['dotaArrowBtn']['x'],
-                self.COORDMAP['dotaArrowBtn']['y'], '1')
-            time.sleep(self.sleepBetweenMenu)
-            # Press the dota disconnect button on the bottom right corner
-            self.myPeripheral.moveMouse(
-                self.COORDMAP['dotaDisconnectBtn']['x'],
-                self.COORDMAP['dotaDisconnectBtn']['y'], '1')
-            time.sleep(self.sleepBetweenMenu)
-            # circumvent dac rating popup
-            self.clickNothing()
-            time.sleep(self.sleepBetweenMenu)
-            # Press the dota leave button above the re/disconnect button
-            # TODO: Test if this works without the workaround now
-            # since we use pynput
-            self.myPeripheral.moveMouse(
-                self.COORDMAP['dotaLeaveBtn']['x'],
-                self.COORDMAP['dotaLeaveBtn']['y'], '1')
-            time.sleep(self.sleepBetweenMenu)
-            # Press the dota acccept button for leaving
-            # in the middle of the screen
-            self.myPeripheral.moveMouse(
-                self.COORDMAP['dotaLeaveAcceptBtn']['x'],
-                self.COORDMAP['dotaLeaveAcceptBtn']['y'], '1')
-            # clean file for stream view
-            self.myIO.resetFile("ragequit.txt")
-
+        deadline = self.clock.time() + targetTime
+
+        def showCountdown():
+            # write remaining time for chat
+            # (adding +1s because of lazy cutting of decimals)
+            self.myIO.updateFile(
+                "ragequit.txt",
+                "Time left till ragequit!: {0} \nTo abort write !stay"
+                .format(str(1.0 + deadline - self.clock.time())
+                        .split('.')[0]))
+
+        def quitNow():
+            for timer in self.ragequitTimers:
+                timer.cancel()
+            self.ragequitTimers = []
+            # Ragequit still allowed?
+            if(self.allowRagequit):
+                # quitGame checks again, !stay works until it runs
+                self.commandSink(self.delayedCommand('quit'))
+                # clean file for stream view
+                self.myIO.resetFile("ragequit.txt")
+
+        # the countdown is shown once a second until the deadline
+        self.ragequitTimers = [
+            self.scheduler.schedule(0, showCountdown, interval=1),
+            self.scheduler.schedule(targetTime, quitNow)]
+
+    def quitGame(self):
+        """Abandons the current AutoChess game unless the ragequit was
+        aborted with !stay meanwhile"""
+        if not self.allowRagequit:
+            return
         self.allowRagequit = False
+        # Press the dota arrow button on the upper left corner
+        self.clickButton('dotaArrowBtn')
+        self.wait(self.timing.get('menu'))
+        # Press the dota disconnect button on the bottom right corner
+        self.clickButton('dotaDisconnectBtn')
+        self.wait(self.timing.get('menu'))
+        # circumvent dac rating popup
+        self.clickNothing()
+        self.wait(self.timing.get('menu'))
+        # Press the dota leave button above the re/disconnect button
+        # TODO: Test if this works without the workaround now
+        # since we use pynput
+        self.clickButton('dotaLeaveBtn')
+        self.wait(self.timing.get('menu'))
+        # Press the dota acccept button for leaving
+        # in the middle of the screen
+        self.clickButton('dotaLeaveAcceptBtn')
+        self.ui.forget()
 
     def reconnectGame(self):
         """Reconnect game after disconnected from server"""
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['dotaDisconnectBtn']['x'],
-            self.COORDMAP['dotaDisconnectBtn']['y'], '1')
+        self.clickButton('dotaDisconnectBtn')
+        self.ui.forget()
 
     def camCalibration(self, promote=False):
         """Needs to be done once at the start of each game!
@@ -250,9 +267,7 @@ class GameController:
         self.closeSelection()
         if(playerPlacementID != -1):
             # timeToStayOnPlayer = 3
-            x, y = self.getLocationOfIntermediatePoint(
-                self.COORDMAP['playerPosFirst'],
-                self.COORDMAP['playerPosLast'], 7, [(int(playerPlacementID)-1)])
+            x, y = self.tables.players[playerPlacementID-1]
             # cheeky message to be displayed to make it feel more interactive
             # with the other players
             # allChatMessage = 'Chat wants to inspect the current position: '+
@@ -260,7 +275,7 @@ class GameController:
             # self.writeAllChat(allChatMessage)
             # clicking on the avatar of the specific player leads us to their
             # camposition
-            self.myPeripheral.moveMouse(x, y, '1')
+            self.click(x, y, '1')
             # move mouse away from avatars so the popovertext is not blocking
             # the view
             self.clickNothing()
@@ -273,18 +288,19 @@ class GameController:
             # self.camCalibration()
         else:
             self.clickNothing()
-            tabTourDuration = 5
+            tabTourDuration = self.timing.get('tabtour')
             timeToLingerOnPlayer = tabTourDuration/8
-            for i in range(8):
-                x, y = self.getLocationOfIntermediatePoint(
-                    self.COORDMAP['playerPosFirst'],
-                    self.COORDMAP['playerPosLast'], 7, [i])
-                self.myPeripheral.moveMouse(x, y, '1')
-                # move mouse away from avatars so the popovertext is not
-                # blocking the view
-                self.clickNothing()
-
-                time.sleep(timeToLingerOnPlayer)
+            x, y = self.tables.players[0]
+            self.click(x, y, '1')
+            # move mouse away from avatars so the popovertext is not
+            # blocking the view
+            self.clickNothing()
+            # the other players follow as delayed commands, the game input
+            # is free for other commands meanwhile
+            for player in range(2, len(self.tables.players) + 1):
+                self.later(timeToLingerOnPlayer * (player - 1), 'tab', player)
+        # the view moved to another chessboard
+        self.ui.forget()
 
     def pickPiece(self, target):
         """Buy a chess piece from the shop.
@@ -293,10 +309,8 @@ class GameController:
             target -- Number between 1-5
         """
         self.showSelection('on')
-        x, y = self.getLocationOfIntermediatePoint(
-            self.COORDMAP['pickFirst'],
-            self.COORDMAP['pickLast'], 4, [(int(target)-1)])
-        self.myPeripheral.moveMouse(x, y, '1')
+        x, y = self.tables.picks[target-1]
+        self.click(x, y, '1')
         self.clickNothing()
 
     def movePiece(self, source, target):
@@ -305,21 +319,20 @@ class GameController:
         bench
 
         Keyword arguments:
-            source -- Field on the chessboard (aa,a1..h8)
-            target -- Field on the chessboard (aa,a1..h8)
+            source -- Field index on the chessboard (validator.fieldToIndex)
+            target -- Field index on the chessboard (validator.fieldToIndex)
         """
         # make sure shop is closed while moving pieces
         self.showSelection('off')
         self.resetChickenPos()
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['chickenAbility1']['x'],
-            self.COORDMAP['chickenAbility1']['y'], '1')
+        self.clickButton('chickenAbility1')
         x, y = self.convertToLocation(source)
-        self.myPeripheral.moveMouse(x, y, '1')
+        self.click(x, y, '1')
 
         # self.pressKeyWithPynput(self.hotkeys[0])
         x, y = self.convertToLocation(target)
-        self.myPeripheral.moveMouse(x, y, '1')
+        self.click(x, y, '1')
+        self.ui.chickenHome = False
         self.clickNothing()
         # show shop after movement for comfort
         self.showSelection('on')
@@ -330,19 +343,19 @@ class GameController:
         If no direction is specified the piece will be put in the middle
 
         Keyword arguments:
-            slot -- Bench/slot position of chess piece
+            slot -- Field index of the bench/slot position of chess piece
             direction -- Direction can be left, right, top or bot
         """
         if direction == 'left':
-            self.movePiece(slot, 'b3')
+            self.movePiece(slot, validator.fieldToIndex('b3'))
         elif direction == 'right':
-            self.movePiece(slot, 'g3')
+            self.movePiece(slot, validator.fieldToIndex('g3'))
         elif direction == 'top':
-            self.movePiece(slot, 'd4')
+            self.movePiece(slot, validator.fieldToIndex('d4'))
         elif direction == 'bot':
-            self.movePiece(slot, 'e1')
+            self.movePiece(slot, validator.fieldToIndex('e1'))
         else:
-            self.movePiece(slot, 'd3')
+            self.movePiece(slot, validator.fieldToIndex('d3'))
 
     # TODO: check if this is needed anymore (probably obsolete)
 
@@ -364,103 +377,102 @@ class GameController:
     def moveBot(self):
         """Shortcut command: Moves the first piece to the backline"""
         self.resetChickenPos()
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['chickenAbility1']['x'],
-            self.COORDMAP['chickenAbility1']['y'], '1')
-        x, y = self.convertToLocation('aa')
-        self.myPeripheral.moveMouse(x, y, '1')
+        self.clickButton('chickenAbility1')
+        x, y = self.convertToLocation(validator.fieldToIndex('aa'))
+        self.click(x, y, '1')
         # self.pressKeyWithPynput(self.hotkeys[0])
 
-        x, y = self.convertToLocation('e1')
-        self.myPeripheral.moveMouse(x, y, '1')
+        x, y = self.convertToLocation(validator.fieldToIndex('e1'))
+        self.click(x, y, '1')
+        self.ui.chickenHome = False
         self.clickNothing()
         self.showSelection('on')
 
     def moveTop(self):
         """Shortcut command: Moves the first piece to the frontline"""
         self.resetChickenPos()
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['chickenAbility1']['x'],
-            self.COORDMAP['chickenAbility1']['y'], '1')
+        self.clickButton('chickenAbility1')
 
-        x, y = self.convertToLocation('aa')
-        self.myPeripheral.moveMouse(x, y, '1')
+        x, y = self.convertToLocation(validator.fieldToIndex('aa'))
+        self.click(x, y, '1')
         # self.pressKeyWithPynput(self.hotkeys[0])
-        x, y = self.convertToLocation('d4')
-        self.myPeripheral.moveMouse(x, y, '1')
+        x, y = self.convertToLocation(validator.fieldToIndex('d4'))
+        self.click(x, y, '1')
+        self.ui.chickenHome = False
         self.clickNothing()
         self.showSelection('on')
 
     def moveRight(self):
         """Shortcut command: Moves the first piece to the right side"""
         self.resetChickenPos()
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['chickenAbility1']['x'],
-            self.COORDMAP['chickenAbility1']['y'], '1')
-        x, y = self.convertToLocation('aa')
-        self.myPeripheral.moveMouse(x, y, '1')
+        self.clickButton('chickenAbility1')
+        x, y = self.convertToLocation(validator.fieldToIndex('aa'))
+        self.click(x, y, '1')
         # self.pressKeyWithPynput(self.hotkeys[0])
-        x, y = self.convertToLocation('g3')
-        self.myPeripheral.moveMouse(x, y, '1')
+        x, y = self.convertToLocation(validator.fieldToIndex('g3'))
+        self.click(x, y, '1')
+        self.ui.chickenHome = False
         self.clickNothing()
         self.showSelection('on')
 
     def moveLeft(self):
         """Shortcut command: Moves the first piece to the left side"""
         self.resetChickenPos()
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['chickenAbility1']['x'],
-            self.COORDMAP['chickenAbility1']['y'], '1')
-        x, y = self.convertToLocation('aa')
-        self.myPeripheral.moveMouse(x, y, '1')
+        self.clickButton('chickenAbility1')
+        x, y = self.convertToLocation(validator.fieldToIndex('aa'))
+        self.click(x, y, '1')
         # self.pressKeyWithPynput(self.hotkeys[0])
-        x, y = self.convertToLocation('b3')
-        self.myPeripheral.moveMouse(x, y, '1')
+        x, y = self.convertToLocation(validator.fieldToIndex('b3'))
+        self.click(x, y, '1')
+        self.ui.chickenHome = False
         self.clickNothing()
         self.showSelection('on')
 
     def closeSelection(self):
         '''Closes the shop via X button in the right upper corner'''
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['close']['x'], self.COORDMAP['close']['y'], '1')
+        if(self.ui.shopOpen is False):
+            # already closed
+            return
+        self.clickButton('close')
+        self.ui.shopOpen = False
 
     def showSelection(self, isOn):
         """Shows/hides the shop.
 
         Keyword arguments:
-            isOn -- Show/hide (bool)
+            isOn -- Show/hide ('on'/'off')
         """
-        # Make sure to close the shop via X button before since we do not have
-        # game feedback and therefore need to prevent toggling wrongly
+        if(isOn == 'on' and self.ui.shopOpen):
+            # already shown
+            return
+        # Make sure to close the shop via X button before unless it is known
+        # to be closed, since the shop button toggles the shop
         self.closeSelection()
         if(isOn == 'on'):
             # reopen shop in this case, otherwise keep it closed
-            self.myPeripheral.moveMouse(
-                self.COORDMAP['shopButton']['x'],
-                self.COORDMAP['shopButton']['y'], '1')
+            self.clickButton('shopButton')
+            self.ui.shopOpen = True
 
     def lockSelection(self):
         """Locks the shop to prevent automatic rerolling"""
         # first open selection
         self.showSelection('on')
         # click on the lock icon
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['lock']['x'], self.COORDMAP['lock']['y'], '1')
+        self.clickButton('lock')
 
     def benchPiece(self, target):
         """Removes an active chess piece from the chessboard and puts it on the bench.
 
         Keyword arguments:
-            target -- target chessboard position
+            target -- target chessboard position (field index)
         """
         self.showSelection('off')
         self.resetChickenPos()
-        x, y = self.getLocationOfIntermediatePoint(
-            self.COORDMAP['chickenAbility1'],
-            self.COORDMAP['chickenAbility5'], 4, [1])
-        self.myPeripheral.moveMouse(x, y, '1')
+        x, y = self.tables.abilities[1]
+        self.click(x, y, '1')
         x, y = self.convertToLocation(target)
-        self.myPeripheral.moveMouse(x, y, '1')
+        self.click(x, y, '1')
+        self.ui.chickenHome = False
         # self.pressKeyWithPynput(self.hotkeys[1])
         self.clickNothing()
         self.showSelection('on')
@@ -470,16 +482,15 @@ class GameController:
         Target is a field on the chessboard and on the bench
 
         Keyword arguments:
-            target -- target chessboard position
+            target -- target chessboard position (field index)
         """
         self.showSelection('off')
         self.resetChickenPos()
-        x, y = self.getLocationOfIntermediatePoint(
-            self.COORDMAP['chickenAbility1'],
-            self.COORDMAP['chickenAbility5'], 4, [2])
-        self.myPeripheral.moveMouse(x, y, '1')
+        x, y = self.tables.abilities[2]
+        self.click(x, y, '1')
         x, y = self.convertToLocation(target)
-        self.myPeripheral.moveMouse(x, y, '1')
+        self.click(x, y, '1')
+        self.ui.chickenHome = False
         # self.pressKeyWithPynput(self.hotkeys[2])
         self.clickNothing()
         self.showSelection('on')
@@ -488,10 +499,8 @@ class GameController:
         """Rerolls the shop selection."""
         self.showSelection('off')
         self.resetChickenPos()
-        x, y = self.getLocationOfIntermediatePoint(
-            self.COORDMAP['chickenAbility1'],
-            self.COORDMAP['chickenAbility5'], 4, [3])
-        self.myPeripheral.moveMouse(x, y, '1')
+        x, y = self.tables.abilities[3]
+        self.click(x, y, '1')
         # self.pressKeyWithPynput(self.hotkeys[3])
         self.clickNothing()
         self.showSelection('on')
@@ -502,13 +511,11 @@ class GameController:
         Keyword arguments:
             amount -- How many times xp should be bought (1-4)
         """
-        waitBetweenClicks = 0.8
-        for dummy in range(int(amount)):
-            self.myPeripheral.moveMouse(
-                self.COORDMAP['chickenAbility5']['x'],
-                self.COORDMAP['chickenAbility5']['y'], '1')
+        waitBetweenClicks = self.timing.get('xpclick')
+        for dummy in range(amount):
+            self.clickButton('chickenAbility5')
             # self.pressKeyWithPynput(self.hotkeys[4])
-            time.sleep(waitBetweenClicks)
+            self.wait(waitBetweenClicks)
         self.clickNothing()
 
     def toggleLockItem(self, slot):
@@ -518,102 +525,71 @@ class GameController:
             slot -- number between 1-9
         """
         # TODO: check if special delay is still needed since pynput
-        waitForRightClickMenu = 0.5
-        # We have 3x3 item matrix
-        # after 3 and 6 the next row starts
-        countingXSteps = (int(slot)-1) % 3
-        # reduce slot number slightly so 1,2,3 / 3.0 casted to int becomes 0;
-        # 4,5,6 become 1; and 7,8,9 become 2
-        countingYSteps = int((int(slot)-1)/3)
-        x, y = self.getLocationOfIntermediatePoint(
-            self.COORDMAP['chickSlot1'],
-            self.COORDMAP['chickSlot9'], 3, [countingXSteps, countingYSteps])
-        self.myPeripheral.moveMouse(x, y, '3')
-        time.sleep(waitForRightClickMenu)
+        waitForRightClickMenu = self.timing.get('rightclickmenu')
+        x, y = self.tables.itemSlots[slot-1]
+        self.click(x, y, '3')
+        self.wait(waitForRightClickMenu)
         # the rightclick menu changes position depending on row
-        lockLabelPosX = str(int(x)+int(self.itemoffsetFirstRowX))
-        lockLabelPosY = str(int(y)+int(self.itemoffsetFirstRowy))
-        if(int(slot) > 3):
-            # slot is below first row
-            lockLabelPosX = str(int(x)+int(self.itemoffsetSecondRowX))
-            lockLabelPosY = str(int(y)+int(self.itemoffsetSecondRowy))
-        self.myPeripheral.moveMouse(lockLabelPosX, lockLabelPosY, '1')
+        x, y = self.tables.itemLocks[slot-1]
+        self.click(x, y, '1')
 
     def moveItem(self, slot, target):
         '''Move item from chicken slot to target hero coordinates.
 
         Keyword arguments:
             slot -- Itemslot of the chicken (1-9)
-            target -- target chessboard/bench position
+            target -- target chessboard/bench position (field index)
         '''
         # close shop before
         self.showSelection('off')
-        distanceX = int(self.COORDMAP['chickSlot9']['x']) - \
-            int(self.COORDMAP['chickSlot1']['x'])
-        distanceY = int(self.COORDMAP['chickSlot9']['y']) - \
-            int(self.COORDMAP['chickSlot1']['y'])
-        # We have 3x3 item matrix
-        distanceToEachCenterX = distanceX / 3
-        distanceToEachCenterY = distanceY / 3
-        # after 3 and 6 the next row starts
-        newXCoord = int(self.COORDMAP['chickSlot1']['x']) + \
-            ((int(slot)-1) % 3) * distanceToEachCenterX
-        # reduce slot number slightly so 1,2,3 / 3.0 casted to int becomes 0;
-        # 4,5,6 become 1; and 7,8,9 become 2
-        newYCoord = int(self.COORDMAP['chickSlot1']['y']) + \
-            int((int(slot)-1)/3.0) * distanceToEachCenterY
-        self.dragAndDrop({'x': newXCoord, 'y': newYCoord}, target)
+        self.dragAndDrop(self.tables.itemSlots[slot-1], target)
+        self.ui.chickenHome = False
         # give chicken time to run to the destination
         # TODO: dynamic time depending on target location
-        waitForChickenDelivery = 5
-        time.sleep(waitForChickenDelivery)
+        waitForChickenDelivery = self.timing.get('chickendelivery')
+        self.wait(waitForChickenDelivery)
         self.resetChickenPos()
 
     def grabItem(self, target):
         """Let's the chicken pick up dropped items
 
         Keyword arguments:
-            target -- target chessboard position
+            target -- target chessboard position (field index)
         """
         # close shop first
         self.showSelection('off')
         x, y = self.convertToLocation(target)
-        self.myPeripheral.moveMouse(x, y, '3')
+        self.click(x, y, '3')
+        self.ui.chickenHome = False
         # TODO: dynamic time depending on target location
-        waitForChickenDelivery = 5
-        time.sleep(waitForChickenDelivery)
+        waitForChickenDelivery = self.timing.get('chickendelivery')
+        self.wait(waitForChickenDelivery)
         self.resetChickenPos()
 
     def executeStack(self):
-        """Executes a stack/queue of commands sequentially."""
-        for command in self.commandStack:
-            self.findAndExecute(command)
-        # clear command stack afterwards
-        self.commandStack = []
+        """Executes a stack/queue of commands sequentially.
+        Their actions become part of the current action plan, so the whole
+        stack is optimized as one batch (see actionplan.optimize)"""
+        stack = self.commandStack
+        # clear command stack beforehand (stacked commands may stack again)
+        self.commandStack = deque()
+        for command in stack:
+            handler = self.commandHandlers.get(command.kind)
+            if(handler):
+                handler(*command.args)
 
     def addToStack(self, commandForStack):
-        """Add a command to stack/queue for later execution
+        """Add a command to stack/queue for later execution.
+        The nested command was already parsed and validated by the validator
 
         Keyword arguments:
-            commandForStack -- Command as string
+            commandForStack -- Parsed command (validator.Command)
         """
-        # TODO: set a limit on stack?
+        if(len(self.commandStack) >= self.stackDepth):
+            print('command stack full, ignored: ' + commandForStack.text)
+            return
         self.commandStack.append(commandForStack)
 
-    def stackCommand(self, commandForStack):
-        """Add a command to stack/queue for later execution
-
-        Keyword arguments:
-            commandForStack -- Command as string
-        """
-        # remove '!stack ' beforehand
-        idxSpace = commandForStack.find(' ')
-        patchedCommand = commandForStack[idxSpace+1:]
-        # check the nested command
-        if validator.validateCommand(patchedCommand):
-            # valid, add to stack
-            self.addToStack(patchedCommand)
-
     # TODO: optimize, reduce redundancy
     def grabItemChickenloop(self, side):
         """Let's the chicken/courier walk alongside a side of the chessboard
@@ -626,108 +602,89 @@ class GameController:
         # make sure the shop is hidden to not interfere with our clicks
         self.showSelection('off')
         # give chicken time to reach starting pos
-        timeToReachStartPos = 3
+        timeToReachStartPos = self.timing.get('chickenstart')
+        self.ui.chickenHome = False
         if(side == 'left'):
             # pos chicken at A1 first
-            x, y = self.convertToLocation('a1')
-            self.myPeripheral.moveMouse(x, y, '3')
-            time.sleep(timeToReachStartPos)
-            for coord in coordmaps.CHICKENLEFT:
-                self.myPeripheral.moveMouse(
-                    coordmaps.CHICKENLEFT[coord]['x'],
-                    coordmaps.CHICKENLEFT[coord]['y'], '3')
+            x, y = self.convertToLocation(validator.fieldToIndex('a1'))
+            self.click(x, y, '3')
+            self.wait(timeToReachStartPos)
+            for x, y in self.tables.chickenRoutes['left']:
+                self.click(x, y, '3')
         elif(side == 'top'):
             # pos chicken at A8 first
-            x, y = self.convertToLocation('a8')
-            self.myPeripheral.moveMouse(x, y)
-            time.sleep(timeToReachStartPos)
-            for coord in coordmaps.CHICKENTOP:
-                self.myPeripheral.moveMouse(
-                    coordmaps.CHICKENTOP[coord]['x'],
-                    coordmaps.CHICKENTOP[coord]['y'])
+            x, y = self.convertToLocation(validator.fieldToIndex('a8'))
+            self.moveTo(x, y)
+            self.wait(timeToReachStartPos)
+            for x, y in self.tables.chickenRoutes['top']:
+                self.moveTo(x, y)
         elif(side == 'right'):
             # pos chicken at H8 first
-            x, y = self.convertToLocation('h8')
-            self.myPeripheral.moveMouse(x, y)
-            time.sleep(timeToReachStartPos)
-            for coord in coordmaps.CHICKENRIGHT:
-                self.myPeripheral.moveMouse(
-                    coordmaps.CHICKENRIGHT[coord]['x'],
-                    coordmaps.CHICKENRIGHT[coord]['y'])
+            x, y = self.convertToLocation(validator.fieldToIndex('h8'))
+            self.moveTo(x, y)
+            self.wait(timeToReachStartPos)
+            for x, y in self.tables.chickenRoutes['right']:
+                self.moveTo(x, y)
         elif(side == 'bot'):
             # pos chicken at H1 first
-            x, y = self.convertToLocation('h1')
-            self.myPeripheral.moveMouse(x, y)
-            time.sleep(timeToReachStartPos)
-            for coord in coordmaps.CHICKENBOT:
-                self.myPeripheral.moveMouse(
-                    coordmaps.CHICKENBOT[coord]['x'],
-                    coordmaps.CHICKENBOT[coord]['y'])
+            x, y = self.convertToLocation(validator.fieldToIndex('h1'))
+            self.moveTo(x, y)
+            self.wait(timeToReachStartPos)
+            for x, y in self.tables.chickenRoutes['bot']:
+                self.moveTo(x, y)
 
         # send chicken back to default position
         self.resetChickenPos()
 
     def resetChickenPos(self):
         """Sends chicken back to default position"""
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['resetChicken']['x'],
-            self.COORDMAP['resetChicken']['y'], '3')
+        if(self.ui.chickenHome):
+            # still there
+            return
+        self.clickButton('resetChicken', '3')
+        self.ui.chickenHome = True
 
     def testAllFields(self):
-        """Testfunction that will move the mouse to every field"""
+        """Testfunction that will move the mouse to every field.
+        Run it with runActions"""
         # give time to switch to dota/focus dota window
         waitForAltTab = 5
         durationLingerOnOneField = 0.1
-        time.sleep(waitForAltTab)
-        startOffset = ord('a')
-        for i in range(1, 9):
-            for j in range(8):
-                tempChar = str(chr(startOffset + j))
-                x, y = self.convertToLocation(tempChar+str(i))
-                self.myPeripheral.moveMouse(x, y)
-                time.sleep(durationLingerOnOneField)
+        self.wait(waitForAltTab)
+        for field in range(validator.BENCH_OFFSET):
+            x, y = self.convertToLocation(field)
+            self.moveTo(x, y)
+            self.wait(durationLingerOnOneField)
 
     def convertToLocation(self, field):
         """Returns pixel coordinates of a given field (AA,A1..H8)
 
         Keyword arguments:
-            field -- Field (AA,A1..H8)
+            field -- Field index (see validator.fieldToIndex)
         """
-        aAsNr = ord('a')
-        firstChar = field[:1]
-        secondChar = field[1:]
-        firstCharNr = ord(firstChar)
-        diffNr = firstCharNr - aAsNr
-        if(firstChar == secondChar):
-            x, y = self.getLocationOfIntermediatePoint(
-                self.COORDMAP['aa'], self.COORDMAP['hh'], 7, [diffNr])
-        else:
-            x, y = self.getLocationOfIntermediatePoint(
-                self.COORDMAP['a'+secondChar],
-                self.COORDMAP['h'+secondChar], 7, [diffNr])
-        return x, y
+        return self.tables.fields[field]
 
     def dragAndDrop(self, source, target):
         """Drags & drops from source to target location.
         This is used for items.
 
         Keyword arguments:
-            source -- coordinates of source item location [x,y]
-            target -- Field name ('aa','a1'..'h8')
+            source -- coordinates of source item location (x, y)
+            target -- Field index (see validator.fieldToIndex)
         """
         # TODO: check if dragExtraWaitTime is even needed anymore since we
         # switched to pynput
-        dragExtraWaitTime = 1
-        self.myPeripheral.moveMouse(source['x'], source['y'])
-        time.sleep(dragExtraWaitTime)
+        dragExtraWaitTime = self.timing.get('drag')
+        self.moveTo(source[0], source[1])
+        self.wait(dragExtraWaitTime)
         # hold mouse button
-        self.myPeripheral.holdMouse('1')
-        time.sleep(dragExtraWaitTime)
+        self.hold('1')
+        self.wait(dragExtraWaitTime)
         x, y = self.convertToLocation(target)
-        self.myPeripheral.moveMouse(x, y)
-        time.sleep(dragExtraWaitTime)
+        self.moveTo(x, y)
+        self.wait(dragExtraWaitTime)
         # release mouse button
-        self.myPeripheral.releaseMouse('1')
+        self.release('1')
 
     # def pressKeyWithPynput(self, key):
     #     """Presses specified key on keyboard with pykeyboard module
@@ -769,25 +726,16 @@ class GameController:
             self.pickPiece(random.randint(1, 5))
         elif(randomNumber == 1):
             # sell random unit on bench
-            charNr = random.randint(0, 7)
-            sellChar = chr(charNr+ord('a'))
-            sellChar += sellChar
-            self.sellPiece(sellChar)
+            self.sellPiece(validator.BENCH_OFFSET + random.randint(0, 7))
         elif(randomNumber == 2):
-            # move random unit to random pos
-            rand1X = random.randint(0, 7)  # A-H
-            rand1Y = random.randint(1, 8)  # 1-8
-            rand2X = random.randint(0, 7)
-            rand2Y = random.randint(1, 8)
-            source = chr(rand1X + ord('a')) + rand1Y
-            target = chr(rand2X + ord('a')) + rand2Y
+            # move random unit to random pos (A1-H8)
+            source = random.randint(0, validator.BENCH_OFFSET - 1)
+            target = random.randint(0, validator.BENCH_OFFSET - 1)
             self.movePiece(source, target)
             # bench reroll
         elif(randomNumber == 3):
             # bench random unit
-            rand1X = random.randint(0, 7)  # A-H
-            rand1Y = random.randint(1, 8)  # 1-8
-            target = chr(rand1X + ord('a')) + rand1Y
+            target = random.randint(0, validator.BENCH_OFFSET - 1)
             self.benchPiece(target)
         elif(randomNumber == 4):
             # reroll
@@ -797,93 +745,184 @@ class GameController:
         '''Click on the right side of the chessboard where nothing is to interact with.
         Can be used to click empty space as well for resetting commandchain
         (autochess bug)'''
-        self.myPeripheral.moveMouse(
-            self.COORDMAP['nothing']['x'], self.COORDMAP['nothing']['y'], '1')
-
-    def getLocationOfIntermediatePoint(self, pointA, pointB, intervals, idx):
-        aX = int(pointA['x'])
-        aY = int(pointA['y'])
-        bX = int(pointB['x'])
-        bY = int(pointB['y'])
-        diffDistanceX = aX - bX
-        diffDistanceY = aY - bY
-        distanceBetweenEachPointX = diffDistanceX/intervals
-        distanceBetweenEachPointY = diffDistanceY/intervals
-        if(len(idx) == 1):
-            newCoordX = aX - idx[0] * distanceBetweenEachPointX
-            newCoordY = aY - idx[0] * distanceBetweenEachPointY
-        elif(len(idx) == 2):
-            newCoordX = aX - idx[0] * distanceBetweenEachPointX
-            newCoordY = aY - idx[1] * distanceBetweenEachPointY
-
-        return newCoordX, newCoordY
+        self.clickButton('nothing')
+
+    def writeMessage(self, message):
+        """Writes a chat message into the Dota allchat.
+        Disabled until a profanity filter exists (see writeAllChat)
+
+        Keyword arguments:
+            message -- Textmessage to be send
+        """
+        pass
+
+    def click(self, x, y, clickType='1', tag=None):
+        """Adds moving the mouse to the desired coordinates and clicking
+        there to the action plan
+
+        Keyword arguments:
+            x -- x coordinate inside screen resolution
+            y -- y coordinate inside screen resolution
+            clickType -- 1: leftclick, 2: middleclick, 3: rightclick
+            tag -- Name of the clicked location (used by the optimizer)
+        """
+        self.plan.append(actionplan.Action(
+            actionplan.CLICK, int(x), int(y), button=clickType, tag=tag))
+
+    def clickButton(self, name, clickType='1'):
+        """Adds a click on a location of the coordmap to the action plan
+
+        Keyword arguments:
+            name -- Name of the location in the coordmap (see coordmaps)
+            clickType -- 1: leftclick, 2: middleclick, 3: rightclick
+        """
+        x, y = self.tables.buttons[name]
+        self.click(x, y, clickType, name)
+
+    def moveTo(self, x, y):
+        """Adds moving the mouse to the desired coordinates to the action plan
+
+        Keyword arguments:
+            x -- x coordinate inside screen resolution
+            y -- y coordinate inside screen resolution
+        """
+        self.plan.append(actionplan.Action(actionplan.MOVE, int(x), int(y)))
+
+    def hold(self, clickType):
+        """Adds pressing and holding a mouse button to the action plan"""
+        self.plan.append(actionplan.Action(
+            actionplan.HOLD, button=clickType))
+
+    def release(self, clickType):
+        """Adds releasing a mouse button to the action plan"""
+        self.plan.append(actionplan.Action(
+            actionplan.RELEASE, button=clickType))
+
+    def wait(self, seconds):
+        """Adds waiting to the action plan
+
+        Keyword arguments:
+            seconds -- Time to wait
+        """
+        self.plan.append(actionplan.Action(
+            actionplan.WAIT, duration=seconds))
+
+    def delayedCommand(self, kind, *args):
+        """Returns a command of the bot itself (not parsed from chat)
+
+        Keyword arguments:
+            kind -- Key of commandHandlers
+            args -- Arguments of the handler
+        """
+        command = validator.Command(kind, args, ' '.join(
+            ['!' + kind] + [str(arg) for arg in args]))
+        command.internal = True
+        return command
+
+    def later(self, seconds, kind, *args):
+        """Hands a command over to the commandSink after some seconds.
+        Returns the scheduling.Timer
+
+        Keyword arguments:
+            seconds -- Delay
+            kind -- Key of commandHandlers
+            args -- Arguments of the handler
+        """
+        return self.scheduler.schedule(
+            seconds, self.commandSink, self.delayedCommand(kind, *args))
+
+    def runDelayed(self):
+        """Executes the delayed commands that wait in delayedCommands (see
+        commandSink) as one batch. Returns their number"""
+        commands = []
+        while self.delayedCommands:
+            commands.append(self.delayedCommands.popleft())
+        if(commands):
+            self.executeBatch(commands)
+        return len(commands)
+
+    def runTimers(self, seconds=None):
+        """Runs the timers and the delayed commands without an event loop
+        (instead of scheduler.run()), for replays and benchmarks. Sleeps
+        with the clock until the next timer is due
+
+        Keyword arguments:
+            seconds -- Time to keep running, None to run until no timer is
+            left
+        """
+        clock = self.clock
+        end = None if seconds is None else clock.time() + seconds
+        while True:
+            delay = self.scheduler.runDue()
+            if(self.runDelayed()):
+                # the commands may have scheduled new timers
+                continue
+            if(end is not None):
+                left = end - clock.time()
+                if(left <= 0):
+                    return
+                delay = left if delay is None else min(delay, left)
+            elif(delay is None):
+                return
+            clock.sleep(delay)
+
+    def compileCommands(self, commands):
+        """Returns the optimized action plan of several commands in a row
+
+        Keyword arguments:
+            commands -- list of parsed commands (validator.Command)
+        """
+        with self.planLock:
+            self.plan = []
+            for command in commands:
+                handler = self.commandHandlers.get(command.kind)
+                if(handler):
+                    handler(*command.args)
+            plan = self.plan
+            self.plan = []
+        return actionplan.optimize(plan)
+
+    def runActions(self, function, *args):
+        """Runs an action function (for example quitGame) right away
+
+        Keyword arguments:
+            function -- GameController function that adds to the action plan
+            args -- Arguments of the function
+        """
+        with self.planLock:
+            self.plan = []
+            function(*args)
+            plan = self.plan
+            self.plan = []
+        self.myPeripheral.run(actionplan.optimize(plan))
+
+    def setTimingProfile(self, profile):
+        """Switches the delays to another timing profile.
+        Applies to all commands compiled afterwards
+
+        Keyword arguments:
+            profile -- Name of the profile (see timing.TimingProfiles)
+        """
+        self.timing.select(profile)
+
+    def executeBatch(self, commands):
+        """Executes several commands in a row as one optimized action plan
+
+        Keyword arguments:
+            commands -- list of parsed commands (validator.Command)
+        """
+        plan = self.compileCommands(commands)
+        try:
+            self.myPeripheral.run(plan)
+        except Exception:
+            # the plan stopped somewhere, the tracked state is not reliable
+            self.ui.forget()
+            raise
 
     def findAndExecute(self, command):
-        """Checks which command is invoked and executes the command accordingly
+        """Executes the action of a parsed command
 
         Keyword arguments:
-            command -- commandstring to execute
+            command -- Parsed command (validator.Command)
         """
-        splitted = command.split(' ')
-        if validator.validateCommand(command) == "move":
-            if(len(splitted) > 2):
-                self.movePiece(splitted[1], splitted[2])
-            else:
-                self.movePieceDirection(splitted[1])
-        elif validator.validateCommand(command) == 'bench':
-            self.benchPiece(splitted[1])
-        elif validator.validateCommand(command) == 'sell':
-            self.sellPiece(splitted[1])
-        elif validator.validateCommand(command) == 'reroll':
-            self.rerollPieces()
-        elif validator.validateCommand(command) == 'buyxp':
-            self.buyXP(splitted[1])
-        elif validator.validateCommand(command) == 'shop':
-            self.showSelection(splitted[1])
-        elif validator.validateCommand(command) == 'pick':
-            self.pickPiece(splitted[1])
-        elif validator.validateCommand(command) == 'lock':
-            self.lockSelection()
-        elif validator.validateCommand(command) == 'grab':
-            self.grabItem(splitted[1])
-        elif validator.validateCommand(command) == 'itemtohero':
-            self.moveItem(splitted[1], splitted[2])
-        elif validator.validateCommand(command) == 'tab':
-            if(len(splitted) > 1):
-                self.tabTour(splitted[1])
-            else:
-                self.tabTour()
-        elif validator.validateCommand(command) == 'random':
-            self.randomAction()
-        elif validator.validateCommand(command) == 'rq':
-            self.leaveGame()
-        elif validator.validateCommand(command) == 'lockitem':
-            self.toggleLockItem(splitted[1])
-        elif validator.validateCommand(command) == 'run':
-            self.grabItemChickenloop(splitted[1])
-        elif validator.validateCommand(command) == 'stay':
-            self.abortRagequit()
-        elif validator.validateCommand(command) == 'write':
-            tempword = ''
-            for i in range(1, len(splitted)):
-                tempword += splitted[i] + ' '
-            # self.writeAllChat(tempword)
-        elif validator.validateCommand(command) == 'stack':
-            self.stackCommand(command)
-        elif validator.validateCommand(command) == 'exec':
-            self.executeStack()
-        elif validator.validateCommand(command) == 'movefromslots':
-            if len(splitted) > 1:
-                self.movePieceFromSlot(splitted[0][1:], splitted[1])
-            else:
-                self.movePieceFromSlot(splitted[0][1:], 'd3')
-        elif validator.validateCommand(command) == 'search':
-            self.searchGame()
-        elif validator.validateCommand(command) == 'accept':
-            self.acceptGame()
-        elif validator.validateCommand(command) == 'calib':
-            self.camCalibration(True)
-        elif validator.validateCommand(command) == 'reconnect':
-            self.reconnectGame()
-        elif validator.validateCommand(command) == 'decline':
-            self.declineGame()
+        self.executeBatch([command])
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# geometry.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+
+def solveLinear(matrix, vector):
+    """Solves matrix * x = vector with gaussian elimination and returns x
+
+    Keyword arguments:
+        matrix -- n rows of n values
+        vector -- n values
+    """
+    n = len(vector)
+    rows = [[float(value) for value in row] + [float(vector[i])]
+            for i, row in enumerate(matrix)]
+    for column in range(n):
+        pivot = max(range(column, n), key=lambda r: abs(rows[r][column]))
+        if(abs(rows[pivot][column]) < 1e-12):
+            raise ValueError('Linear system has no unique solution')
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        pivotRow = rows[column]
+        for r in range(column + 1, n):
+            factor = rows[r][column] / pivotRow[column]
+            if(factor):
+                row = rows[r]
+                for k in range(column, n + 1):
+                    row[k] -= factor * pivotRow[k]
+    result = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        row = rows[r]
+        total = row[n] - sum(row[k] * result[k] for k in range(r + 1, n))
+        result[r] = total / row[r]
+    return result
+
+
+class Homography:
+    """Perspective transform of the plane, given by a 3x3 matrix"""
+
+    def __init__(self, matrix):
+        self.matrix = tuple(tuple(float(value) for value in row)
+                            for row in matrix)
+
+    def apply(self, points):
+        """Returns the transformed points as list of (x, y)
+
+        Keyword arguments:
+            points -- iterable of (x, y)
+        """
+        (a, b, c), (d, e, f), (g, h, i) = self.matrix
+        transformed = []
+        for x, y in points:
+            w = g * x + h * y + i
+            transformed.append(((a * x + b * y + c) / w,
+                                (d * x + e * y + f) / w))
+        return transformed
+
+    def inverse(self):
+        """Returns the inverse transform"""
+        (a, b, c), (d, e, f), (g, h, i) = self.matrix
+        # adjugate matrix, the scale of a homography does not matter
+        return Homography((
+            (e * i - f * h, c * h - b * i, b * f - c * e),
+            (f * g - d * i, a * i - c * g, c * d - a * f),
+            (d * h - e * g, b * g - a * h, a * e - b * d)))
+
+
+def fitHomography(sourcePoints, targetPoints):
+    """Fits the homography that maps the source points onto the target
+    points (least squares, at least 4 point pairs)
+
+    Keyword arguments:
+        sourcePoints -- list of (x, y)
+        targetPoints -- list of (x, y), same length as sourcePoints
+    """
+    if(len(sourcePoints) != len(targetPoints) or len(sourcePoints) < 4):
+        raise ValueError('At least 4 pairs of points are needed')
+    # every pair gives two equations for the 8 unknown matrix entries
+    # (the last entry is fixed to 1), solved via the normal equations
+    normalMatrix = [[0.0] * 8 for dummy in range(8)]
+    normalVector = [0.0] * 8
+    for (x, y), (u, v) in zip(sourcePoints, targetPoints):
+        for row, value in (([x, y, 1.0, 0.0, 0.0, 0.0, -u * x, -u * y], u),
+                           ([0.0, 0.0, 0.0, x, y, 1.0, -v * x, -v * y], v)):
+            for j in range(8):
+                if(row[j]):
+                    normalVector[j] += row[j] * value
+                    for k in range(8):
+                        normalMatrix[j][k] += row[j] * row[k]
+    h = solveLinear(normalMatrix, normalVector)
+    return Homography(((h[0], h[1], h[2]), (h[3], h[4], h[5]),
+                       (h[6], h[7], 1.0)))
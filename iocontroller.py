@@ -14,32 +14,108 @@
 #
 
 import os
+import time
+from threading import Condition, Thread
 
 
-class Singleton(type):
-    """Singleton pattern metaclass"""
-    _instances = {}
+class IOController:
+    """Handles the writing of files.
+    Overlay files for the stream are collected by updateFile and written by
+    a background thread at most frameRate times per second.
+    Filenames are relative to the output directory, so several bots can
+    write their files side by side"""
 
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(
-                Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
+    def __init__(self, outputDir=''):
+        """Creates the output directory if needed
 
+        Keyword arguments:
+            outputDir -- Directory of the written files, '' for the current
+            directory
+        """
+        self.outputDir = outputDir
+        if(outputDir):
+            os.makedirs(outputDir, exist_ok=True)
+        # filename -> latest text that still needs to be written
+        self.pending = {}
+        # filename -> text that was written last
+        self.published = {}
+        self.condition = Condition()
+        self.writer = None
+        self.frameRate = 10
+
+    def start(self, frameRate=10):
+        """Starts the background writer for the overlay files
 
-class IOController(metaclass=Singleton):
-    """Handles the writing of files"""
+        Keyword arguments:
+            frameRate -- Maximum number of writes per file and second
+        """
+        if(frameRate <= 0):
+            raise ValueError('Overlay rate must be positive: {0}'.format(
+                frameRate))
+        self.frameRate = frameRate
+        if(self.writer is None):
+            self.writer = Thread(target=self.run, daemon=True)
+            self.writer.start()
 
     def writeFile(self, filename, message):
         """Writes textfiles to use for chat representation and execution.
+        The text is written to a temporary file first which then replaces the
+        file, so readers (OBS) never see a half written file.
 
         Keyword arguments:
             filename -- Filename of file to be written
-            message -- Text to write
+            message -- Text to write (or anything that str() turns into it)
         """
-        with open(filename, "w") as f:
+        message = str(message)
+        path = os.path.join(self.outputDir, filename)
+        tempFilename = path + '.tmp'
+        with open(tempFilename, "w") as f:
             f.write(message)
-        pass
+        os.replace(tempFilename, path)
+        self.published[filename] = message
+
+    def updateFile(self, filename, message):
+        """Schedules an overlay file to be written by the background writer.
+        Only the latest text of each file is written. Writes immediately if
+        the background writer is not running.
+
+        Keyword arguments:
+            filename -- Filename of file to be written
+            message -- Text to write or an object that is turned into it
+            with str() when it is written (see commandhistory)
+        """
+        with self.condition:
+            if(self.writer is None):
+                self.writeFile(filename, message)
+                return
+            self.pending[filename] = message
+            self.condition.notify()
+
+    def flush(self):
+        """Writes all pending overlay files now. A file that cannot be
+        written (full disk, file locked) is skipped with a message, the
+        next update tries again"""
+        with self.condition:
+            pending = self.pending
+            self.pending = {}
+        for filename, message in pending.items():
+            message = str(message)
+            # nothing to do if the file already shows this text
+            if(self.published.get(filename) == message):
+                continue
+            try:
+                self.writeFile(filename, message)
+            except OSError as error:
+                print('Could not write {0}: {1}'.format(filename, error))
+
+    def run(self):
+        """Background writer: writes pending files, then waits a frame"""
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+            self.flush()
+            time.sleep(1.0 / self.frameRate)
 
     def resetFile(self, filename=None):
         """Clears specific file or all files by overwriting them with an empty string.
@@ -49,9 +125,9 @@ class IOController(metaclass=Singleton):
             be cleared.
         """
         if(filename):
-            self.writeFile(filename, '')
+            self.updateFile(filename, '')
         else:
-            self.writeFile('lastsaid.txt', '')
-            self.writeFile('most_common_commands.txt', '')
-            self.writeFile('ragequit.txt', '')
-            self.writeFile('commands.txt', '')
+            self.updateFile('lastsaid.txt', '')
+            self.updateFile('most_common_commands.txt', '')
+            self.updateFile('ragequit.txt', '')
+            self.updateFile('commands.txt', '')
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+# ircserver.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import asyncio
+import itertools
+import sys
+import time
+
+SERVERNAME = 'tmi.twitch.tv'
+# capabilities the server acknowledges (see CAP REQ)
+CAPABILITIES = ('twitch.tv/tags', 'twitch.tv/commands',
+                'twitch.tv/membership')
+
+
+class ChatConnection:
+    """One client connected to the LocalTwitchServer"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        # set when the connection is handled completely
+        self.closed = asyncio.Event()
+        self.password = None
+        self.nick = None
+        self.channels = set()
+        self.capabilities = set()
+
+    def send(self, line):
+        """Queues a raw IRC line for sending
+
+        Keyword arguments:
+            line -- IRC line without line ending
+        """
+        self.writer.write(bytes(line + "\r\n", "UTF-8"))
+
+
+class LocalTwitchServer:
+    """Stand-in for the Twitch chat server (IRC) to test the bot without
+    Twitch. Answers login (PASS/NICK/USER), JOIN and PING like Twitch does,
+    sends PINGs itself and forwards chat messages to the joined clients.
+
+    Attributes:
+        received -- (nick, channel, text) of the chat messages of clients
+        pongs -- Number of PONGs received from clients
+        silent -- Ignore everything the clients send (a dead connection)
+    """
+
+    def __init__(self, host='127.0.0.1', port=6667, pingInterval=300):
+        """Creates the server, start() starts listening
+
+        Keyword arguments:
+            host -- Address to listen on
+            port -- Port to listen on, 0 for any free port
+            pingInterval -- Seconds between PINGs to the clients
+        """
+        self.host = host
+        self.port = port
+        self.pingInterval = pingInterval
+        self.connections = []
+        self.received = []
+        self.pongs = 0
+        self.silent = False
+        self.server = None
+        self.pinger = None
+        self.joined = None
+        self.messageIds = itertools.count(1)
+        # user name -> user id of the (fake) users
+        self.userIds = {}
+
+    async def start(self):
+        """Starts listening. The actual port is stored in port"""
+        self.joined = asyncio.Event()
+        self.server = await asyncio.start_server(
+            self.handleClient, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.pinger = asyncio.ensure_future(self.pingClients())
+
+    async def close(self):
+        """Disconnects all clients and stops listening"""
+        self.pinger.cancel()
+        self.server.close()
+        await self.disconnectClients()
+        await self.server.wait_closed()
+
+    async def disconnectClients(self):
+        """Disconnects all clients but keeps listening (a lost
+        connection)"""
+        connections = list(self.connections)
+        for connection in connections:
+            connection.writer.close()
+        for connection in connections:
+            await connection.closed.wait()
+
+    def sendReconnect(self):
+        """Asks all clients to reconnect like Twitch does before a
+        restart"""
+        for connection in self.connections:
+            connection.send(':{0} RECONNECT'.format(SERVERNAME))
+
+    async def waitForJoin(self):
+        """Waits until a client joined a channel"""
+        await self.joined.wait()
+
+    def sendChat(self, channel, user, text, badges='', messageId=None):
+        """Sends a chat message to every client in the channel. Clients
+        that requested twitch.tv/tags get the message tags as well
+
+        Keyword arguments:
+            channel -- Channel name without #
+            user -- Name of the (fake) user writing the message
+            text -- Chat message
+            badges -- Badges of the user, for example 'moderator/1'
+            messageId -- Id of the message, a new one if None
+        """
+        line = ':{0}!{0}@{0}.{1} PRIVMSG #{2} :{3}'.format(
+            user, SERVERNAME, channel, text)
+        tagged = None
+        for connection in self.connections:
+            if(channel not in connection.channels):
+                continue
+            if('twitch.tv/tags' not in connection.capabilities):
+                connection.send(line)
+                continue
+            if(tagged is None):
+                if(messageId is None):
+                    messageId = 'local-{0}'.format(next(self.messageIds))
+                userId = self.userIds.setdefault(
+                    user, len(self.userIds) + 1)
+                tagged = ('@badges={0};display-name={1};id={2};'
+                          'tmi-sent-ts={3};user-id={4} {5}').format(
+                    badges, user, messageId, int(time.time() * 1000), userId,
+                    line)
+            connection.send(tagged)
+
+    async def drain(self):
+        """Waits until the sent lines are handed to the network"""
+        for connection in list(self.connections):
+            await connection.writer.drain()
+
+    async def pingClients(self):
+        """Sends PINGs like Twitch does (about every 5 minutes)"""
+        while True:
+            await asyncio.sleep(self.pingInterval)
+            for connection in self.connections:
+                connection.send('PING :' + SERVERNAME)
+
+    async def handleClient(self, reader, writer):
+        """Handles one client connection until it is closed"""
+        connection = ChatConnection(writer)
+        self.connections.append(connection)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if(self.silent):
+                    continue
+                line = line.decode("UTF-8", errors="ignore").rstrip('\r\n')
+                if not self.handleLine(connection, line):
+                    break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.remove(connection)
+            writer.close()
+            connection.closed.set()
+
+    def handleLine(self, connection, line):
+        """Answers one line of a client. Returns False if the connection
+        has to be closed
+
+        Keyword arguments:
+            connection -- ChatConnection
+            line -- IRC line without line ending
+        """
+        command, dummy, params = line.partition(' ')
+        command = command.upper()
+        nick = connection.nick
+        if(command == 'CAP'):
+            # CAP REQ :twitch.tv/tags twitch.tv/commands
+            subcommand, dummy, requested = params.partition(' ')
+            if(subcommand.upper() == 'REQ'):
+                requested = requested.lstrip(':')
+                if all(capability in CAPABILITIES
+                       for capability in requested.split()):
+                    connection.capabilities.update(requested.split())
+                    answer = 'ACK'
+                else:
+                    answer = 'NAK'
+                connection.send(':{0} CAP * {1} :{2}'.format(
+                    SERVERNAME, answer, requested))
+        elif(command == 'PASS'):
+            connection.password = params
+        elif(command == 'NICK'):
+            if not (connection.password or '').startswith('oauth:'):
+                connection.send(':{0} NOTICE * :Login authentication failed'
+                                .format(SERVERNAME))
+                return False
+            connection.nick = params.lower()
+            nick = connection.nick
+            for number, text in (('001', 'Welcome, GLHF!'),
+                                 ('002', 'Your host is ' + SERVERNAME),
+                                 ('003', 'This server is rather new'),
+                                 ('004', '-'),
+                                 ('375', '-'),
+                                 ('372', 'You are in a maze of twisty ' +
+                                  'passages, all alike.'),
+                                 ('376', '>')):
+                connection.send(':{0} {1} {2} :{3}'.format(
+                    SERVERNAME, number, nick, text))
+        elif(nick is None):
+            # everything else needs a login first
+            pass
+        elif(command == 'JOIN'):
+            for channel in params.split(','):
+                channel = channel.lstrip('#').lower()
+                connection.channels.add(channel)
+                connection.send(':{0}!{0}@{0}.{1} JOIN #{2}'.format(
+                    nick, SERVERNAME, channel))
+                connection.send(':{0}.{1} 353 {0} = #{2} :{0}'.format(
+                    nick, SERVERNAME, channel))
+                connection.send(
+                    ':{0}.{1} 366 {0} #{2} :End of /NAMES list'.format(
+                        nick, SERVERNAME, channel))
+            self.joined.set()
+        elif(command == 'PART'):
+            connection.channels.discard(params.lstrip('#').lower())
+        elif(command == 'PING'):
+            connection.send(':{0} PONG {0} {1}'.format(SERVERNAME, params))
+        elif(command == 'PONG'):
+            self.pongs += 1
+        elif(command == 'PRIVMSG'):
+            channel, dummy, text = params.partition(' :')
+            self.received.append((nick, channel.lstrip('#'), text))
+        elif(command == 'QUIT'):
+            return False
+        return True
+
+
+async def serveStdin(server, channel):
+    """Sends every line typed into the console as chat message of user
+    'local' to the channel"""
+    loop = asyncio.get_event_loop()
+    while True:
+        text = await loop.run_in_executor(None, sys.stdin.readline)
+        if not text:
+            return
+        server.sendChat(channel, 'local', text.rstrip('\n'))
+        await server.drain()
+
+
+async def main(port, channel):
+    server = LocalTwitchServer(port=port)
+    await server.start()
+    print('Listening on {0}:{1}, type chat messages for #{2}'.format(
+        server.host, server.port, channel))
+    try:
+        await serveStdin(server, channel)
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    # usage: python ircserver.py [port] [channel]
+    # then start the bot with HOST = 127.0.0.1 and the same port
+    serverPort = int(sys.argv[1]) if len(sys.argv) > 1 else 6667
+    serverChannel = sys.argv[2].lower() if len(sys.argv) > 2 else 'channel'
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(main(serverPort, serverChannel))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.close()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+
+# loadgen.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+import validator
+import ircserver
+import tpacLaunch
+
+LETTERS = 'abcdefgh'
+
+CHATTER = [
+    'hello everyone', 'LUL', 'PogChamp', 'why would you sell that',
+    'that was a bad move', 'Kappa', 'gg', 'who is playing?',
+    'chat please stop rerolling', 'what does the ! do', 'monkaS',
+    'first time here, how does this work?', 'ResidentSleeper']
+
+# look like commands but are rejected by the validator
+MALFORMED = [
+    '!m aa zz', '!m a1', '!p 9', '!x', '!lol', '!!!!!!!!!!!!!!!!', '!shop',
+    '!shop maybe', '!m aa aa', '!tab9', '!i 0 a1', '!move', '!sell z9']
+
+
+def randomField(rng, rows=4, bench=True):
+    """Returns a random field of the first rows rows or the bench
+
+    Keyword arguments:
+        rng -- random.Random
+        rows -- Number of board rows to choose from
+        bench -- False to choose a board field only
+    """
+    letter = rng.choice(LETTERS)
+    if(bench and rng.random() < 0.3):
+        return letter * 2
+    return letter + str(rng.randint(1, rows))
+
+
+def randomCommand(rng):
+    """Returns a random valid command as a viewer would write it"""
+    kind = rng.randrange(12)
+    if(kind < 3):
+        source = randomField(rng)
+        # the validator takes a bench target only with the letter of the
+        # source, so moves go to the board
+        target = randomField(rng, bench=False)
+        while target == source:
+            target = randomField(rng, bench=False)
+        return '!m {0} {1}'.format(source, target)
+    if(kind == 3):
+        return '!p {0}'.format(rng.randint(1, 5))
+    if(kind == 4):
+        return '!r'
+    if(kind == 5):
+        return '!x {0}'.format(rng.randint(1, 4))
+    if(kind == 6):
+        return '!shop ' + rng.choice(('on', 'off'))
+    if(kind == 7):
+        return '!b {0}{1}'.format(rng.choice(LETTERS), rng.randint(1, 4))
+    if(kind == 8):
+        return '!s ' + randomField(rng, 8)
+    if(kind == 9):
+        return '!tab {0}'.format(rng.randint(1, 8))
+    if(kind == 10):
+        return '!i {0} {1}'.format(rng.randint(1, 9), randomField(rng, 8))
+    return '!run ' + rng.choice(validator.DIRECTIONS)
+
+
+def syntheticChat(rng, commandShare=0.3, malformedShare=0.1):
+    """Endless (user, text) chat lines with a mix of chatter, valid and
+    malformed commands
+
+    Keyword arguments:
+        rng -- random.Random
+        commandShare -- Share of valid commands
+        malformedShare -- Share of malformed commands
+    """
+    while True:
+        user = 'viewer{0}'.format(rng.randrange(500))
+        dice = rng.random()
+        if(dice < commandShare):
+            yield user, randomCommand(rng)
+        elif(dice < commandShare + malformedShare):
+            yield user, rng.choice(MALFORMED)
+        else:
+            yield user, rng.choice(CHATTER)
+
+
+def recordedChat(filename):
+    """Endless (user, text) chat lines of a recording. Each line of the file
+    is a chat message, optionally prefixed with 'user: ' like the lines of
+    commands.txt
+
+    Keyword arguments:
+        filename -- Recorded chat
+    """
+    with open(filename, 'r') as f:
+        lines = [line.rstrip('\n') for line in f if line.strip()]
+    while True:
+        for line in lines:
+            user, separator, text = line.partition(': ')
+            if(not separator or ' ' in user):
+                user, text = 'viewer', line
+            yield user, text
+
+
+def percentile(values, share):
+    """Returns the value below which the given share of values lies"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+class LoadTest:
+    """Sends chat through a LocalTwitchServer to a complete bot (Setup) and
+    measures how it keeps up. The bot runs with a game input backend that
+    does not wait (null or recording), so the numbers show the cost of the
+    bot itself"""
+
+    def __init__(self, chat, rate, duration, backend='null'):
+        """Prepares the load test, run() runs it
+
+        Keyword arguments:
+            chat -- Iterator of (user, text) chat lines
+            rate -- Chat lines per minute
+            duration -- Seconds to send chat
+            backend -- Game input backend of the bot (null or recording)
+        """
+        self.chat = chat
+        self.rate = rate
+        self.duration = duration
+        self.backend = backend
+        self.sent = []
+        # time the bot read each message from the connection
+        self.receiveTimes = {}
+        self.read = 0
+        self.handled = 0
+        self.handlingTime = 0.0
+        self.latencies = []
+        self.queueDepths = []
+
+    def writeSettings(self, directory, port):
+        """Writes the settings of the bot under test and returns the file"""
+        filename = os.path.join(directory, 'settings.txt')
+        with open(filename, 'w') as f:
+            f.write('[Settings]\n'
+                    'HOST = 127.0.0.1\n'
+                    'PORT = {0}\n'
+                    'AUTH = oauth:loadtest\n'
+                    'USERNAME = loadtest\n'
+                    'APP = loadtest\n'
+                    'CHAT_CHANNEL = loadtest\n'
+                    'LENGTH = 10\n'
+                    'HOTKEYS = m,b,s,r,x\n'
+                    'RESOLUTION = 1920x1080\n'
+                    'OUTPUT_DIR = {1}\n'
+                    'MODE = anarchy\n'
+                    'RECONNECT = no\n'
+                    'BACKEND = {2}\n'.format(port, directory, self.backend))
+        return filename
+
+    def instrument(self, setup):
+        """Records receive, handling and actuation times of the bot"""
+        test = self
+        connectToTwitch = setup.connectToTwitch
+        executeCommand = setup.executeCommand
+        current = {}
+
+        class TimedQueue(asyncio.Queue):
+            def put_nowait(self, item):
+                test.receiveTimes[id(item)] = time.perf_counter()
+                super().put_nowait(item)
+
+            async def get(self):
+                # the previous message is handled when the next is asked for
+                if('start' in current):
+                    test.handlingTime += time.perf_counter() - \
+                        current['start']
+                    test.handled += 1
+                item = await super().get()
+                current['start'] = time.perf_counter()
+                current['received'] = test.receiveTimes.pop(
+                    id(item), current['start'])
+                test.read += 1
+                return item
+
+        async def timedConnect():
+            client = await connectToTwitch()
+            client.messages = TimedQueue()
+            return client
+
+        def timedExecute(command, priority=False):
+            test.receiveTimes[id(command)] = current['received']
+            executeCommand(command, priority)
+
+        executeBatch = setup.gc.executeBatch
+
+        def timedBatch(commands):
+            now = time.perf_counter()
+            for command in commands:
+                received = test.receiveTimes.pop(id(command), None)
+                if(received is not None):
+                    test.latencies.append(now - received)
+            executeBatch(commands)
+
+        setup.connectToTwitch = timedConnect
+        setup.executeCommand = timedExecute
+        setup.gc.executeBatch = timedBatch
+
+    async def sendChat(self, server, channel):
+        """Sends the chat lines at the configured rate"""
+        interval = 60.0 / self.rate
+        start = time.perf_counter()
+        end = start + self.duration
+        due = start
+        while due < end:
+            now = time.perf_counter()
+            # send everything that is due, then wait a little
+            while due <= now and due < end:
+                user, text = next(self.chat)
+                server.sendChat(channel, user, text)
+                self.sent.append(text)
+                due += interval
+            await server.drain()
+            await asyncio.sleep(min(0.01, max(0.0, due - now)))
+
+    async def sampleQueue(self, setup):
+        """Samples the number of commands waiting for execution"""
+        while True:
+            executor = getattr(setup, 'executor', None)
+            if(executor is not None):
+                self.queueDepths.append(executor.pending())
+            await asyncio.sleep(0.01)
+
+    async def run(self):
+        """Runs the load test"""
+        server = ircserver.LocalTwitchServer(port=0)
+        await server.start()
+        with tempfile.TemporaryDirectory() as directory:
+            with contextlib.redirect_stdout(io.StringIO()):
+                setup = tpacLaunch.Setup(
+                    self.writeSettings(directory, server.port))
+            self.instrument(setup)
+            setup.myIO.start(setup.overlay_rate)
+            with contextlib.redirect_stdout(io.StringIO()):
+                bot = asyncio.ensure_future(setup.run())
+                sampler = asyncio.ensure_future(self.sampleQueue(setup))
+                await server.waitForJoin()
+                start = time.perf_counter()
+                await self.sendChat(server, setup.CHAT_CHANNEL)
+                # the bot only reads the lines starting with !
+                expected = sum(1 for text in self.sent if text[:1] == '!')
+                # let the bot catch up
+                while (self.read < expected or
+                       setup.executor.pending()) and \
+                        time.perf_counter() - start < self.duration + 10:
+                    await asyncio.sleep(0.01)
+                self.elapsed = time.perf_counter() - start
+                sampler.cancel()
+                await server.close()
+                try:
+                    await bot
+                except ConnectionError:
+                    pass
+            self.dropped = setup.executor.dropped
+            self.limited = setup.limiter.limited
+            self.shed = setup.limiter.shed
+
+    def validationCost(self):
+        """Returns the validation cost per line of the sent chat in
+        microseconds"""
+        lines = self.sent[:10000]
+        start = time.perf_counter()
+        for line in lines:
+            validator.parseCommand(line)
+        return (time.perf_counter() - start) / max(1, len(lines)) * 1e6
+
+    def report(self):
+        """Prints the results"""
+        commands = sum(1 for line in self.sent if validator.validateCommand(
+            line))
+        print('sent lines:          {0} in {1:.1f}s ({2} valid commands)'
+              .format(len(self.sent), self.elapsed, commands))
+        print('ingest throughput:   {0:.0f} lines/s'.format(
+            len(self.sent) / self.elapsed))
+        print('validation cost:     {0:.2f} us/line'.format(
+            self.validationCost()))
+        print('handling cost:       {0:.2f} us/command line'.format(
+            self.handlingTime / max(1, self.handled) * 1e6))
+        print('queue depth:         max {0}, mean {1:.2f}'.format(
+            max(self.queueDepths or [0]),
+            sum(self.queueDepths) / max(1, len(self.queueDepths))))
+        print('dropped commands:    {0}'.format(self.dropped))
+        print('limited/shed:        {0}/{1}'.format(self.limited, self.shed))
+        print('latency receive -> actuation (ms): ' +
+              ', '.join('p{0} {1:.2f}'.format(
+                  int(share * 100), percentile(self.latencies, share) * 1e3)
+                  for share in (0.5, 0.9, 0.99)) +
+              ', max {0:.2f}'.format(max(self.latencies or [0]) * 1e3))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Sends chat to the bot through a local IRC server and '
+        'measures throughput and latency')
+    parser.add_argument('--rate', type=float, default=6000,
+                        help='chat lines per minute (default 6000)')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='seconds to send chat (default 10)')
+    parser.add_argument('--commands', type=float, default=0.3,
+                        help='share of valid commands (default 0.3)')
+    parser.add_argument('--malformed', type=float, default=0.1,
+                        help='share of malformed commands (default 0.1)')
+    parser.add_argument('--replay', help='recorded chat to send instead')
+    parser.add_argument('--backend', default='null',
+                        choices=('null', 'recording'))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if(args.replay):
+        chat = recordedChat(args.replay)
+    else:
+        chat = syntheticChat(random.Random(args.seed), args.commands,
+                             args.malformed)
+    test = LoadTest(chat, args.rate, args.duration, args.backend)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(test.run())
+    finally:
+        loop.close()
+    test.report()
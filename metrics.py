@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+# metrics.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread
+
+# upper bounds of the histogram buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def formatValue(value):
+    """Returns a sample value as Prometheus writes it"""
+    if(value == float('inf')):
+        return '+Inf'
+    if(float(value).is_integer()):
+        return str(int(value))
+    return repr(float(value))
+
+
+def formatLabels(labels):
+    """Returns the label part of a sample line, for example {kind="move"}
+
+    Keyword arguments:
+        labels -- list of (name, value)
+    """
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{0}="{1}"'.format(name, str(value).replace('\\', '\\\\')
+                           .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels) + '}'
+
+
+class Counter:
+    """Value that only goes up, optionally split by one label.
+    Alternatively the value is read from a function when rendered (a dict
+    label -> value if the counter has a label)"""
+    kind = 'counter'
+
+    def __init__(self, name, help, labelName=None, function=None):
+        self.name = name
+        self.help = help
+        self.labelName = labelName
+        self.function = function
+        self.lock = Lock()
+        self.values = {}
+
+    def inc(self, label=None, amount=1):
+        """Increases the value
+
+        Keyword arguments:
+            label -- Value of the label (if the counter has one)
+            amount -- Increase
+        """
+        with self.lock:
+            self.values[label] = self.values.get(label, 0) + amount
+
+    def samples(self):
+        """Returns the sample lines as (name, labels, value)"""
+        if(self.function is not None):
+            if not self.labelName:
+                return [(self.name, [], self.function())]
+            values = sorted(self.function().items(),
+                            key=lambda item: str(item[0]))
+        else:
+            with self.lock:
+                values = sorted(self.values.items(),
+                                key=lambda item: str(item[0]))
+        return [(self.name,
+                 [(self.labelName, label)] if self.labelName else [], value)
+                for label, value in values]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, read from a function or set"""
+    kind = 'gauge'
+
+    def set(self, value, label=None):
+        """Sets the value
+
+        Keyword arguments:
+            value -- New value
+            label -- Value of the label (if the gauge has one)
+        """
+        with self.lock:
+            self.values[label] = value
+
+
+class Histogram:
+    """Distribution of observed values (usually durations in seconds) in
+    cumulative buckets, optionally split by one label"""
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelName=None, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelName = labelName
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.lock = Lock()
+        # label -> [bucket counts..., sum]
+        self.values = {}
+
+    def observe(self, value, label=None):
+        """Counts one observation
+
+        Keyword arguments:
+            value -- Observed value
+            label -- Value of the label (if the histogram has one)
+        """
+        with self.lock:
+            counts = self.values.get(label)
+            if(counts is None):
+                counts = self.values[label] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if(value <= bound):
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+    def samples(self):
+        """Returns the sample lines as (name, labels, value)"""
+        with self.lock:
+            values = sorted(
+                ((label, list(counts)) for label, counts in
+                 self.values.items()), key=lambda item: str(item[0]))
+        samples = []
+        for label, counts in values:
+            labels = [(self.labelName, label)] if self.labelName else []
+            total = 0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                samples.append((self.name + '_bucket',
+                                labels + [('le', formatValue(bound))], total))
+            samples.append((self.name + '_sum', labels, counts[-1]))
+            samples.append((self.name + '_count', labels, total))
+        return samples
+
+
+class Metrics:
+    """Collection of metrics that can be rendered in the Prometheus text
+    format and served over HTTP"""
+
+    def __init__(self):
+        self.metrics = OrderedDict()
+        self.server = None
+
+    def add(self, metric):
+        """Registers a metric and returns it"""
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Returns all metrics in the Prometheus text format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append('# HELP {0} {1}'.format(metric.name, metric.help))
+            lines.append('# TYPE {0} {1}'.format(metric.name, metric.kind))
+            for name, labels, value in metric.samples():
+                lines.append('{0}{1} {2}'.format(
+                    name, formatLabels(labels), formatValue(value)))
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serves the metrics on http://host:port/metrics in a background
+        thread
+
+        Keyword arguments:
+            port -- Port to listen on
+            host -- Address to listen on, only local by default
+        """
+        self.server = MetricsServer((host, port), MetricsHandler)
+        self.server.metrics = self
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """Stops serving the metrics"""
+        if(self.server is not None):
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class MetricsServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Answers GET /metrics with the metrics of the server"""
+
+    def do_GET(self):
+        if(self.path.split('?')[0] not in ('/metrics', '/')):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # no console output per request
+        pass
+
+
+class BotMetrics(Metrics):
+    """The metrics of one bot (Setup).
+    A command is timed from receiving the chat line over validating it and
+    the start of its execution to the end of its execution"""
+
+    def __init__(self):
+        super().__init__()
+        self.chatMessages = self.add(Counter(
+            'tpac_chat_messages_total', 'Chat messages read'))
+        self.duplicateMessages = self.add(Counter(
+            'tpac_duplicate_messages_total',
+            'Chat messages dropped because their id was seen before'))
+        self.commands = self.add(Counter(
+            'tpac_commands_total', 'Valid commands by kind', 'kind'))
+        self.invalidCommands = self.add(Counter(
+            'tpac_invalid_commands_total',
+            'Chat messages starting with ! that are no valid command'))
+        self.droppedCommands = self.add(Counter(
+            'tpac_dropped_commands_total',
+            'Commands dropped or merged because the queue was full',
+            function=lambda: 0))
+        self.queueDepth = self.add(Gauge(
+            'tpac_queue_depth', 'Commands waiting for or in execution',
+            function=lambda: 0))
+        self.limitedCommands = self.add(Counter(
+            'tpac_limited_commands_total',
+            'Commands not executed because the user sent too many',
+            function=lambda: 0))
+        self.shedCommands = self.add(Counter(
+            'tpac_shed_commands_total',
+            'Commands not executed because too many were waiting',
+            function=lambda: 0))
+        self.coalescedCommands = self.add(Counter(
+            'tpac_coalesced_commands_total',
+            'Commands merged, superseded or folded before execution', 'how',
+            function=lambda: {}))
+        self.deliverySeconds = self.add(Histogram(
+            'tpac_chat_delivery_seconds',
+            'Time from the Twitch server time stamp of a command to reading '
+            'it (needs synchronized clocks)'))
+        self.validateSeconds = self.add(Histogram(
+            'tpac_command_validate_seconds',
+            'Time from receiving a command to validating it'))
+        self.waitSeconds = self.add(Histogram(
+            'tpac_command_wait_seconds',
+            'Time from validating a command to the start of its execution',
+            'kind'))
+        self.executeSeconds = self.add(Histogram(
+            'tpac_command_execute_seconds',
+            'Duration of the execution of the batch containing a command',
+            'kind'))
+        self.latencySeconds = self.add(Histogram(
+            'tpac_command_latency_seconds',
+            'Time from receiving a command to the end of its execution',
+            'kind'))
+        self.democracyRoundSeconds = self.add(Histogram(
+            'tpac_democracy_round_seconds', 'Duration of democracy rounds'))
+
+    def watchExecutor(self, executor):
+        """Reads queue depth and dropped commands from an executor
+
+        Keyword arguments:
+            executor -- executor.CommandExecutor
+        """
+        self.queueDepth.function = executor.pending
+        self.droppedCommands.function = lambda: executor.dropped
+
+    def watchRateLimiter(self, limiter):
+        """Reads limited and shed commands from a rate limiter
+
+        Keyword arguments:
+            limiter -- ratelimit.RateLimiter
+        """
+        self.limitedCommands.function = lambda: limiter.limited
+        self.shedCommands.function = lambda: limiter.shed
+
+    def watchCoalescer(self, coalescer):
+        """Reads merged, superseded and folded commands from a coalescer
+
+        Keyword arguments:
+            coalescer -- coalesce.Coalescer
+        """
+        self.coalescedCommands.function = coalescer.counts
+
+    def commandValidated(self, command):
+        """Counts a valid command (with received and validated set)"""
+        self.commands.inc(command.kind)
+        if(command.received is not None):
+            self.validateSeconds.observe(
+                command.validated - command.received)
+
+    def batchExecuted(self, commands, start, end):
+        """Times the commands of an executed batch
+
+        Keyword arguments:
+            commands -- list of validator.Command
+            start -- Time the execution started
+            end -- Time the execution ended
+        """
+        for command in commands:
+            kind = command.kind
+            self.executeSeconds.observe(end - start, kind)
+            if(command.validated is not None):
+                self.waitSeconds.observe(start - command.validated, kind)
+            if(command.received is not None):
+                self.latencySeconds.observe(end - command.received, kind)
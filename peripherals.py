@@ -13,23 +13,138 @@
 # GNU General Public License for more details.
 #
 
-import time
 from enum import Enum
 
-from pynput.mouse import Button as MouseButton
-from pynput.mouse import Controller as MouseController
-from pynput.keyboard import Key as KeyboardKey
-from pynput.keyboard import Controller as KeyboardController
+import actionplan
+import clocks
+import timing
+
+
+class PynputBackend:
+    """Sends the input to the desktop via pynput (needs a display)"""
+
+    def __init__(self, clock=None):
+        self.clock = clock or clocks.Clock()
+        # imported here so the other backends work without a display
+        from pynput.mouse import Button as MouseButton
+        from pynput.mouse import Controller as MouseController
+        from pynput.keyboard import Controller as KeyboardController
+        self.mouse = MouseController()
+        self.mouseButtons = [MouseButton.left, MouseButton.middle,
+                             MouseButton.right]
+        self.keyboard = KeyboardController()
+
+    def move(self, x, y):
+        self.mouse.position = (x, y)
+
+    def click(self, clickType):
+        self.mouse.click(self.mouseButtons[int(clickType)-1])
+
+    def hold(self, clickType):
+        self.mouse.press(self.mouseButtons[int(clickType)-1])
+
+    def release(self, clickType):
+        self.mouse.release(self.mouseButtons[int(clickType)-1])
+
+    def pressKey(self, key):
+        self.keyboard.press(key)
+        self.keyboard.release(key)
+
+    def wait(self, seconds):
+        self.clock.sleep(seconds)
+
+
+class NullBackend:
+    """Drops all input and does not wait. For benchmarks and load tests"""
+
+    def move(self, x, y):
+        pass
+
+    def click(self, clickType):
+        pass
+
+    def hold(self, clickType):
+        pass
+
+    def release(self, clickType):
+        pass
+
+    def pressKey(self, key):
+        pass
+
+    def wait(self, seconds):
+        pass
+
+
+class RecordingBackend:
+    """Records the input instead of sending it.
+    Each recorded action is a tuple (time, kind, value) with the time of
+    the clock. By default the clock is virtual, so waiting costs no real
+    time and the times show when the actions would have happened
+
+    Attributes:
+        actions -- list of recorded actions
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or clocks.VirtualClock()
+        self.actions = []
+
+    def move(self, x, y):
+        self.actions.append((self.clock.time(), actionplan.MOVE, (x, y)))
+
+    def click(self, clickType):
+        self.actions.append((self.clock.time(), actionplan.CLICK, clickType))
+
+    def hold(self, clickType):
+        self.actions.append((self.clock.time(), actionplan.HOLD, clickType))
+
+    def release(self, clickType):
+        self.actions.append(
+            (self.clock.time(), actionplan.RELEASE, clickType))
+
+    def pressKey(self, key):
+        self.actions.append((self.clock.time(), actionplan.KEY, key))
+
+    def wait(self, seconds):
+        self.clock.sleep(seconds)
+
+    def clear(self):
+        """Forgets all recorded actions"""
+        self.actions = []
+
+
+# backend name (BACKEND in settings.txt) -> backend class
+BACKENDS = {
+    'pynput': PynputBackend,
+    'null': NullBackend,
+    'recording': RecordingBackend
+}
+
+
+def createBackend(name, clock=None):
+    """Returns a new backend
+
+    Keyword arguments:
+        name -- Name of the backend (see BACKENDS)
+        clock -- Clock the pynput backend waits with (see clocks). The other
+        backends never wait for real
+    """
+    if(name not in BACKENDS):
+        raise ValueError('Unknown peripheral backend: {0}'.format(name))
+    if(name == 'pynput'):
+        return PynputBackend(clock)
+    return BACKENDS[name]()
 
 
 class Peripherals:
+    """Performs mouse and keyboard input with a backend (see BACKENDS)"""
 
-    mouse = MouseController()
-    mouseButtons = [MouseButton.left, MouseButton.middle, MouseButton.right]
-    keyboard = KeyboardController()
-    # default delay after each peripheral action. Needs to be > 0 to make sure
-    # that the actions are finished properly
-    sleepAfterMouseMove = 0.5
+    def __init__(self, timingProfiles=None, backend=None, clock=None):
+        # delay after each peripheral action. Needs to be > 0 to make sure
+        # that the actions are finished properly
+        self.timing = timingProfiles or timing.TimingProfiles()
+        self.backend = backend or PynputBackend(clock)
 
     def moveMouse(self, x, y, clickType=None):
         """Move the mouse to the desired coordinates and optionally click at
@@ -41,10 +156,12 @@ class Peripherals:
             clickType -- 1: leftclick, 2: middleclick, 3: rightclick
         """
         # print('trying to click: ' + clickType)
-        self.mouse.position = (int(x), int(y))
+        self.backend.move(int(x), int(y))
         if(clickType):
             self.clickMouse(clickType)
-        time.sleep(self.sleepAfterMouseMove)
+            self.backend.wait(self.timing.get('click'))
+        else:
+            self.backend.wait(self.timing.get('move'))
 
     def clickMouse(self, clickType):
         """Clicks the specified mousebutton
@@ -52,10 +169,45 @@ class Peripherals:
         Keyword arguments:
             clickType -- 1: leftclick, 2: middleclick, 3: rightclick
         """
-        self.mouse.click(self.mouseButtons[int(clickType)-1])
+        self.backend.click(clickType)
 
     def holdMouse(self, clickType):
-        self.mouse.press(self.mouseButtons[int(clickType)-1])
+        self.backend.hold(clickType)
 
     def releaseMouse(self, clickType):
-        self.mouse.release(self.mouseButtons[int(clickType)-1])
+        self.backend.release(clickType)
+
+    def pressKey(self, key):
+        """Presses and releases a key
+
+        Keyword arguments:
+            key -- Keyboard key (character or pynput Key)
+        """
+        self.backend.pressKey(key)
+
+    def run(self, plan):
+        """Performs the actions of an action plan one after another.
+        After each action the settle time of the timing profile is waited
+
+        Keyword arguments:
+            plan -- list of actionplan.Action
+        """
+        backend = self.backend
+        for action in plan:
+            if(action.kind == actionplan.WAIT):
+                backend.wait(action.duration)
+                continue
+            if(action.kind == actionplan.CLICK):
+                backend.move(action.x, action.y)
+                backend.click(action.button)
+            elif(action.kind == actionplan.MOVE):
+                backend.move(action.x, action.y)
+            elif(action.kind == actionplan.HOLD):
+                backend.hold(action.button)
+            elif(action.kind == actionplan.RELEASE):
+                backend.release(action.button)
+            elif(action.kind == actionplan.KEY):
+                backend.pressKey(action.key)
+            settle = self.timing.settle(action)
+            if(settle > 0):
+                backend.wait(settle)
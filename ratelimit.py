@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# ratelimit.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+from collections import OrderedDict
+
+import clocks
+
+# reasons why a command is not executed
+LIMITED = 'limited'
+SHED = 'shed'
+
+
+class RateLimiter:
+    """Token bucket per user in front of the command execution.
+    Every user may send burst commands at once and gets refill new ones per
+    second. Only the most recently active users are tracked, the least
+    recently active one is forgotten when there are too many (a forgotten
+    user starts again with a full bucket).
+    Independent of the users, new commands are shed while the executor has
+    too many commands waiting"""
+
+    def __init__(self, burst=5, refill=1.0, maxUsers=50000, shedBacklog=0,
+                 clock=None):
+        """Creates the limiter
+
+        Keyword arguments:
+            burst -- Commands a user may send at once, 0 for no limit
+            refill -- Commands per second a user gets back
+            maxUsers -- Users tracked at most
+            shedBacklog -- Waiting commands from which new ones are shed,
+            0 to never shed
+            clock -- Clock for the refill (see clocks), real time if None
+        """
+        self.burst = burst
+        self.refill = refill
+        self.maxUsers = max(1, maxUsers)
+        self.shedBacklog = shedBacklog
+        self.clock = clock or clocks.Clock()
+        # user -> [tokens, time of the last update], least recently active
+        # user first
+        self.buckets = OrderedDict()
+        self.limited = 0
+        self.shed = 0
+
+    def check(self, user, backlog=0):
+        """Takes a token of the user. Returns None if the command may be
+        executed, otherwise why not (LIMITED or SHED)
+
+        Keyword arguments:
+            user -- twitch username
+            backlog -- Number of commands waiting for execution
+        """
+        # shedding does not cost the user a token
+        if(self.shedBacklog and backlog >= self.shedBacklog):
+            self.shed += 1
+            return SHED
+        if(self.burst <= 0):
+            return None
+        now = self.clock.time()
+        buckets = self.buckets
+        bucket = buckets.get(user)
+        if(bucket is None):
+            if(len(buckets) >= self.maxUsers):
+                buckets.popitem(last=False)
+            bucket = buckets[user] = [float(self.burst), now]
+        else:
+            buckets.move_to_end(user)
+            tokens, last = bucket
+            bucket[0] = min(float(self.burst),
+                            tokens + (now - last) * self.refill)
+            bucket[1] = now
+        if(bucket[0] < 1.0):
+            self.limited += 1
+            return LIMITED
+        bucket[0] -= 1.0
+        return None
+
+    def __len__(self):
+        return len(self.buckets)
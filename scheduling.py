@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+# scheduling.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import asyncio
+import heapq
+import itertools
+import traceback
+from threading import Lock
+
+import clocks
+
+
+class Timer:
+    """A scheduled call, returned by Scheduler.schedule to cancel it.
+
+    Attributes:
+        deadline -- Time of the next call (see clocks)
+        interval -- Seconds between repeated calls, None for a single call
+        cancelled -- Is the timer cancelled?
+    """
+    __slots__ = ('deadline', 'ticket', 'callback', 'args', 'interval',
+                 'cancelled')
+
+    def __init__(self, deadline, ticket, callback, args, interval):
+        self.deadline = deadline
+        self.ticket = ticket
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.deadline, self.ticket) < (other.deadline, other.ticket)
+
+    def cancel(self):
+        """Stops the timer. It is dropped when its deadline is reached"""
+        self.cancelled = True
+
+
+class Scheduler:
+    """Runs every countdown, democracy round and delayed action of a bot.
+    The timers are kept in a heap by deadline and run() sleeps until the
+    earliest one is due, so there is no polling. Repeated timers are
+    scheduled from their previous deadline instead of the time they ran,
+    so they do not drift.
+    Timers can be scheduled from any thread, the calls happen in the event
+    loop that runs run() and must not block"""
+
+    def __init__(self, clock=None):
+        """Creates the scheduler, run() runs the timers
+
+        Keyword arguments:
+            clock -- Clock for all deadlines (see clocks), real time if None
+        """
+        self.clock = clock or clocks.Clock()
+        self.lock = Lock()
+        self.timers = []
+        self.tickets = itertools.count()
+        self.loop = None
+        # set when a timer is due earlier than the one run() waits for
+        self.changed = None
+
+    def schedule(self, delay, callback, *args, interval=None):
+        """Calls callback(*args) after delay seconds and returns the Timer
+
+        Keyword arguments:
+            delay -- Seconds until the (first) call
+            callback -- Function to call
+            args -- Arguments of the callback
+            interval -- Seconds between further calls, None to call once
+        """
+        timer = Timer(self.clock.time() + max(0.0, delay),
+                      next(self.tickets), callback, args, interval)
+        self.push(timer)
+        return timer
+
+    def push(self, timer):
+        """Adds a timer to the heap and wakes run() if it is due first"""
+        with self.lock:
+            heapq.heappush(self.timers, timer)
+            first = self.timers[0] is timer
+            loop = self.loop
+            changed = self.changed
+        if(first and loop is not None):
+            loop.call_soon_threadsafe(changed.set)
+
+    def clear(self):
+        """Drops all timers"""
+        with self.lock:
+            self.timers = []
+
+    def pending(self):
+        """Returns the number of scheduled timers (including cancelled ones
+        that were not dropped yet)"""
+        return len(self.timers)
+
+    def runDue(self):
+        """Calls the timers that are due. Returns the seconds until the
+        next deadline or None if there are no timers"""
+        while True:
+            with self.lock:
+                if not self.timers:
+                    return None
+                timer = self.timers[0]
+                if(timer.cancelled):
+                    heapq.heappop(self.timers)
+                    continue
+                delay = timer.deadline - self.clock.time()
+                if(delay > 0):
+                    return delay
+                heapq.heappop(self.timers)
+                if(timer.interval is not None):
+                    timer.deadline += timer.interval
+                    timer.ticket = next(self.tickets)
+                    heapq.heappush(self.timers, timer)
+            try:
+                timer.callback(*timer.args)
+            except Exception:
+                # a failing timer must not stop the others
+                traceback.print_exc()
+
+    async def run(self):
+        """Runs the timers until cancelled"""
+        # published together, push() reads both under the lock
+        changed = asyncio.Event()
+        with self.lock:
+            self.changed = changed
+            self.loop = asyncio.get_event_loop()
+        try:
+            while True:
+                changed.clear()
+                delay = self.runDue()
+                await self.clock.waitForEvent(changed, delay)
+        finally:
+            with self.lock:
+                self.loop = None
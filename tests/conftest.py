@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+# conftest.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import os
+import sys
+
+# the modules of the bot live in the repository root
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+# test_actionplan.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Peephole optimizer of the action plans"""
+
+import actionplan
+from actionplan import Action
+
+
+def click(tag, x=1, y=1, button='1'):
+    return Action(actionplan.CLICK, x, y, button=button, tag=tag)
+
+
+def wait(seconds):
+    return Action(actionplan.WAIT, duration=seconds)
+
+
+def describe(plan):
+    return [action.tag or action.kind if action.kind != actionplan.WAIT
+            else action.duration for action in plan]
+
+
+def test_waits_in_a_row_are_merged():
+    plan = [wait(0.5), wait(1.0), click('lock'), wait(0), click('lock')]
+    assert describe(actionplan.optimize(plan)) == [1.5, 'lock', 'lock']
+
+
+def test_repeated_idempotent_clicks_are_dropped():
+    plan = [click('nothing'), click('nothing'), click('close'),
+            click('close'), click('lock'), click('lock')]
+    assert describe(actionplan.optimize(plan)) == [
+        'nothing', 'close', 'lock', 'lock']
+
+
+def test_close_open_close_is_one_close():
+    plan = [click('close'), click('shopButton'), click('close'),
+            click('reroll')]
+    assert describe(actionplan.optimize(plan)) == ['close', 'reroll']
+
+
+def test_chicken_reset_is_dropped_until_the_chicken_moves():
+    plan = [click('resetChicken', button='3'), click('close'),
+            click('resetChicken', button='3'), click(None, 5, 5, '3'),
+            click('resetChicken', button='3')]
+    assert describe(actionplan.optimize(plan)) == [
+        'resetChicken', 'close', 'click', 'resetChicken']
+
+
+def test_plan_is_not_modified():
+    plan = [wait(1), wait(1)]
+    actionplan.optimize(plan)
+    assert describe(plan) == [1, 1]
+
+
+def test_reopened_shop_closed_right_away_is_dropped():
+    plan = [click('nothing'), wait(0.5), click('shopButton'), wait(0.25),
+            click('close'), click('resetChicken', button='3')]
+    assert describe(actionplan.optimize(plan)) == [
+        'nothing', 0.75, 'resetChicken']
+
+
+def test_shop_opened_at_the_end_stays_open():
+    plan = [click('close'), click('lock'), click('shopButton')]
+    assert describe(actionplan.optimize(plan)) == [
+        'close', 'lock', 'shopButton']
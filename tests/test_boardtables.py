@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# test_boardtables.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Precomputed coordinate tables of the click targets"""
+
+import pytest
+
+import boardtables
+
+
+@pytest.fixture
+def tables():
+    return boardtables.getTables(1920, 1080)
+
+
+def isPoint(point):
+    return (len(point) == 2 and
+            all(isinstance(value, int) for value in point))
+
+
+def test_table_sizes(tables):
+    assert len(tables.fields) == 72
+    assert len(tables.picks) == 5
+    assert len(tables.players) == 8
+    assert len(tables.abilities) == 5
+    assert len(tables.itemSlots) == 9
+    assert len(tables.itemLocks) == 9
+    assert set(tables.chickenRoutes) == {'left', 'top', 'right', 'bot'}
+    for table in (tables.fields, tables.picks, tables.players,
+                  tables.abilities, tables.itemSlots, tables.itemLocks):
+        assert all(isPoint(point) for point in table)
+    assert all(isPoint(point) for point in tables.buttons.values())
+
+
+def test_tables_are_shared_and_read_only(tables):
+    assert boardtables.getTables(1920, 1080) is tables
+    with pytest.raises(TypeError):
+        tables.buttons['close'] = (0, 0)
+
+
+@pytest.mark.parametrize('width, height, coordmap', boardtables.REFERENCES)
+def test_buttons_of_a_reference_resolution(width, height, coordmap):
+    tables = boardtables.BoardTables(width, height)
+    assert tables.reference[2] is coordmap
+    for name in coordmap:
+        x, y = boardtables.referencePoint(coordmap, name)
+        assert tables.buttons[name] == (int(x), int(y))
+
+
+def test_rows_are_interpolated_between_the_first_and_last_entry(tables):
+    buttons = tables.buttons
+    assert tables.picks[0] == buttons['pickFirst']
+    assert tables.picks[-1] == buttons['pickLast']
+    assert tables.players[0] == buttons['playerPosFirst']
+    assert tables.players[-1] == buttons['playerPosLast']
+    assert tables.abilities[0] == buttons['chickenAbility1']
+    assert tables.abilities[-1] == buttons['chickenAbility5']
+    # 3x3 grid of item slots, rows and columns evenly spaced
+    slots = tables.itemSlots
+    assert slots[0] == buttons['chickSlot1']
+    assert [slot[1] for slot in slots[:3]] == [slots[0][1]] * 3
+    assert [slot[0] for slot in slots[::3]] == [slots[0][0]] * 3
+
+
+def test_item_locks_are_offset_by_row(tables):
+    for slot in range(9):
+        x, y = tables.itemSlots[slot]
+        if(slot < 3):
+            offsetX, offsetY = boardtables.ITEM_LOCK_OFFSET_FIRST_ROW
+        else:
+            offsetX, offsetY = boardtables.ITEM_LOCK_OFFSET_OTHER_ROWS
+        assert tables.itemLocks[slot] == (x + offsetX, y + offsetY)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+# test_coalesce.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Merging, superseding and folding of waiting commands"""
+
+from collections import deque
+
+import coalesce
+import validator
+
+
+def add(coalescer, queue, line, now=0.0):
+    return coalescer.add(queue, validator.parseCommand(line), now)
+
+
+def texts(queue):
+    return [command.text for command in queue]
+
+
+def test_identical_commands_are_merged_within_the_window():
+    coalescer = coalesce.Coalescer(window=1.0)
+    queue = deque()
+    assert add(coalescer, queue, '!m aa a1', 0.0)
+    assert not add(coalescer, queue, '!m aa a1', 0.5)
+    assert add(coalescer, queue, '!m aa a1', 1.5)
+    assert texts(queue) == ['!m aa a1', '!m aa a1']
+    assert coalescer.merged == 1
+
+
+def test_window_0_never_merges():
+    coalescer = coalesce.Coalescer(window=0)
+    queue = deque()
+    assert add(coalescer, queue, '!r')
+    assert add(coalescer, queue, '!r')
+    assert len(queue) == 2
+
+
+def test_stack_is_never_merged():
+    coalescer = coalesce.Coalescer()
+    queue = deque()
+    assert add(coalescer, queue, '!stack !r')
+    assert add(coalescer, queue, '!stack !r')
+    assert coalescer.merged == 0
+
+
+def test_latest_shop_command_supersedes_the_waiting_ones():
+    coalescer = coalesce.Coalescer()
+    queue = deque()
+    add(coalescer, queue, '!r')
+    add(coalescer, queue, '!shop on')
+    add(coalescer, queue, '!shop off')
+    assert texts(queue) == ['!r', '!shop off']
+    assert coalescer.superseded == 1
+
+
+def test_only_the_trailing_run_is_superseded():
+    coalescer = coalesce.Coalescer()
+    queue = deque()
+    add(coalescer, queue, '!tab 1')
+    add(coalescer, queue, '!r')
+    add(coalescer, queue, '!tab 2')
+    add(coalescer, queue, '!tab 3')
+    assert texts(queue) == ['!tab 1', '!r', '!tab 3']
+
+
+def test_internal_commands_are_never_superseded():
+    coalescer = coalesce.Coalescer()
+    queue = deque()
+    # a step of the tab tour of the bot itself
+    tour = validator.Command('tab', (4,), '!tab 4')
+    tour.internal = True
+    queue.append(tour)
+    add(coalescer, queue, '!tab 2')
+    assert texts(queue) == ['!tab 4', '!tab 2']
+    add(coalescer, queue, '!tab 3')
+    assert texts(queue) == ['!tab 4', '!tab 3']
+    assert coalescer.superseded == 1
+
+
+def test_groups_do_not_supersede_each_other():
+    coalescer = coalesce.Coalescer()
+    queue = deque()
+    add(coalescer, queue, '!shop on')
+    add(coalescer, queue, '!tab 2')
+    assert texts(queue) == ['!shop on', '!tab 2']
+
+
+def test_xp_is_folded_up_to_the_maximum():
+    coalescer = coalesce.Coalescer()
+    queue = deque()
+    assert add(coalescer, queue, '!x 1')
+    assert not add(coalescer, queue, '!x 2')
+    assert texts(queue) == ['!x 3']
+    # one fits into the waiting command, the rest stays in the new one
+    assert add(coalescer, queue, '!x 3')
+    assert texts(queue) == ['!x 4', '!x 2']
+    assert coalescer.folded == 1
+
+
+def test_folded_command_keeps_the_timestamps():
+    coalescer = coalesce.Coalescer()
+    queue = deque()
+    first = validator.parseCommand('!x 1')
+    first.received = 1.0
+    first.validated = 2.0
+    coalescer.add(queue, first, 0.0)
+    coalescer.add(queue, validator.parseCommand('!x 1'), 0.0)
+    assert (queue[0].received, queue[0].validated) == (1.0, 2.0)
+    assert queue[0].args == (2,)
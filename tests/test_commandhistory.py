@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+# test_commandhistory.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Recent commands for the stream view"""
+
+import commandhistory
+import iocontroller
+
+
+def test_oldest_line_is_dropped():
+    history = commandhistory.CommandHistory(3)
+    for number in range(5):
+        history.add('user: !p {0}'.format(number))
+    assert len(history) == 3
+    assert list(history) == ['user: !p 2', 'user: !p 3', 'user: !p 4']
+    assert history.text == 'user: !p 2\nuser: !p 3\nuser: !p 4\n'
+    assert str(history) == history.text
+
+
+def test_empty_history():
+    history = commandhistory.CommandHistory(0)
+    assert history.text == ''
+    history.add('a')
+    history.add('b')
+    # at least one line is kept
+    assert list(history) == ['b']
+
+
+def test_rendered_when_the_overlay_is_written(tmp_path):
+    myIO = iocontroller.IOController(str(tmp_path))
+    # pretend the background writer runs, so updates only wait
+    myIO.writer = object()
+    history = commandhistory.CommandHistory(2)
+    history.add('a')
+    myIO.updateFile('commands.txt', history)
+    history.add('b')
+    history.add('c')
+    myIO.flush()
+    with open(str(tmp_path / 'commands.txt')) as f:
+        assert f.read() == 'b\nc\n'
+    assert myIO.published['commands.txt'] == 'b\nc\n'
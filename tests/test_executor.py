@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# test_executor.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Queue and overflow policies of the executor. Most tests do not start
+the worker thread, so the queue can be inspected"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import clocks
+import coalesce
+import executor
+import validator
+
+
+class BlockingController:
+    """Game controller whose batches run until released"""
+
+    def __init__(self):
+        self.clock = clocks.Clock()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.batches = []
+
+    def executeBatch(self, commands):
+        self.batches.append([command.text for command in commands])
+        self.started.set()
+        self.release.wait(5)
+
+
+def createExecutor(maxLength=3, policy='dropoldest', **keywords):
+    gameController = SimpleNamespace(clock=clocks.VirtualClock())
+    return executor.CommandExecutor(gameController, maxLength, policy,
+                                    **keywords)
+
+
+def submit(commandExecutor, line, **keywords):
+    return commandExecutor.submit(validator.parseCommand(line), **keywords)
+
+
+def submitInternal(commandExecutor, kind, *args):
+    """Submits a command of the bot itself like GameController.later"""
+    command = validator.Command(kind, args, ' '.join(
+        ['!' + kind] + [str(arg) for arg in args]))
+    command.internal = True
+    return commandExecutor.submit(command)
+
+
+def texts(commandExecutor):
+    return [command.text for command in commandExecutor.queue]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        createExecutor(policy='dropall')
+
+
+def test_drop_oldest():
+    commandExecutor = createExecutor()
+    for line in ('!p 1', '!p 2', '!p 3'):
+        assert submit(commandExecutor, line)
+    assert submit(commandExecutor, '!p 4')
+    assert texts(commandExecutor) == ['!p 2', '!p 3', '!p 4']
+    assert commandExecutor.dropped == 1
+
+
+def test_drop_newest():
+    commandExecutor = createExecutor(policy='dropnewest')
+    for line in ('!p 1', '!p 2', '!p 3'):
+        submit(commandExecutor, line)
+    assert not submit(commandExecutor, '!p 4')
+    assert texts(commandExecutor) == ['!p 1', '!p 2', '!p 3']
+    assert commandExecutor.dropped == 1
+
+
+def test_coalesce_policy_drops_a_duplicate_first():
+    commandExecutor = createExecutor(policy='coalesce')
+    for line in ('!p 1', '!p 2', '!p 3'):
+        submit(commandExecutor, line)
+    assert not submit(commandExecutor, '!p 2')
+    assert texts(commandExecutor) == ['!p 1', '!p 2', '!p 3']
+    assert submit(commandExecutor, '!p 4')
+    assert texts(commandExecutor) == ['!p 2', '!p 3', '!p 4']
+
+
+def test_priority_goes_first():
+    commandExecutor = createExecutor()
+    submit(commandExecutor, '!p 1')
+    submit(commandExecutor, '!p 2')
+    assert submit(commandExecutor, '!stay', priority=True)
+    assert texts(commandExecutor) == ['!stay', '!p 1', '!p 2']
+
+
+def test_internal_commands_are_never_merged_or_dropped():
+    commandExecutor = createExecutor(
+        policy='dropnewest', coalescer=coalesce.Coalescer())
+    for line in ('!p 1', '!p 2', '!p 3'):
+        submit(commandExecutor, line)
+    assert submitInternal(commandExecutor, 'tab', 2)
+    assert submitInternal(commandExecutor, 'tab', 2)
+    assert texts(commandExecutor) == ['!p 1', '!p 2', '!p 3', '!tab 2',
+                                      '!tab 2']
+    assert commandExecutor.dropped == 0
+
+
+@pytest.mark.parametrize('policy', executor.POLICIES)
+def test_internal_commands_are_not_evicted(policy):
+    commandExecutor = createExecutor(policy=policy)
+    assert submitInternal(commandExecutor, 'quit')
+    for line in ('!p 1', '!p 2', '!p 3'):
+        assert submit(commandExecutor, line)
+    # the quit does not count toward the length
+    assert commandExecutor.dropped == 0
+    submit(commandExecutor, '!p 4')
+    assert commandExecutor.dropped == 1
+    assert texts(commandExecutor)[0] == '!quit'
+    assert len(commandExecutor.queue) == 4
+
+
+def test_coalescer_runs_before_the_policy():
+    commandExecutor = createExecutor(coalescer=coalesce.Coalescer())
+    assert submit(commandExecutor, '!r')
+    assert not submit(commandExecutor, '!r')
+    assert texts(commandExecutor) == ['!r']
+    assert commandExecutor.dropped == 0
+
+
+def test_pending_includes_the_batch_in_execution():
+    gameController = BlockingController()
+    commandExecutor = executor.CommandExecutor(gameController, 10)
+    submit(commandExecutor, '!p 1')
+    submit(commandExecutor, '!p 2')
+    commandExecutor.start()
+    try:
+        assert gameController.started.wait(5)
+        submit(commandExecutor, '!p 3')
+        # two in execution, one waiting
+        assert commandExecutor.pending() == 3
+        gameController.release.set()
+        for dummy in range(500):
+            if(commandExecutor.pending() == 0):
+                break
+            threading.Event().wait(0.01)
+        assert commandExecutor.pending() == 0
+        assert gameController.batches == [['!p 1', '!p 2'], ['!p 3']]
+    finally:
+        gameController.release.set()
+        commandExecutor.stop()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# test_geometry.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Homography fitting and the board model for any resolution"""
+
+import pytest
+
+import boardtables
+import geometry
+import validator
+
+FIELDS = [column + str(row) for column in 'abcdefgh' for row in range(1, 9)]
+
+
+def close(pointA, pointB, tolerance=1e-6):
+    return all(abs(a - b) <= tolerance for a, b in zip(pointA, pointB))
+
+
+def test_solve_linear():
+    assert geometry.solveLinear([[2, 1], [1, 3]], [3, 5]) == \
+        pytest.approx([0.8, 1.4])
+    with pytest.raises(ValueError):
+        geometry.solveLinear([[1, 2], [2, 4]], [1, 2])
+
+
+def test_fit_recovers_a_homography():
+    known = geometry.Homography(((1.2, 0.1, 5.0), (-0.05, 0.9, 3.0),
+                                 (0.001, 0.002, 1.0)))
+    source = [(0, 0), (7, 0), (0, 7), (7, 7), (3, 4), (5, 1)]
+    fitted = geometry.fitHomography(source, known.apply(source))
+    for value, expected in zip(sum(fitted.matrix, ()),
+                               sum(known.matrix, ())):
+        assert value == pytest.approx(expected, abs=1e-6)
+
+
+def test_inverse_round_trip():
+    homography = geometry.Homography(((1.2, 0.1, 5.0), (-0.05, 0.9, 3.0),
+                                      (0.001, 0.002, 1.0)))
+    points = [(1.0, 2.0), (-3.0, 0.5), (100.0, 40.0)]
+    back = homography.inverse().apply(homography.apply(points))
+    assert all(close(a, b) for a, b in zip(points, back))
+
+
+def test_fit_needs_four_pairs():
+    with pytest.raises(ValueError):
+        geometry.fitHomography([(0, 0)] * 3, [(0, 0)] * 3)
+
+
+@pytest.mark.parametrize('width, height, coordmap', boardtables.REFERENCES)
+def test_board_matches_the_captured_fields(width, height, coordmap):
+    tables = boardtables.BoardTables(width, height)
+    for field in FIELDS:
+        if(field in coordmap):
+            captured = boardtables.referencePoint(coordmap, field)
+            computed = tables.fields[validator.fieldToIndex(field)]
+            # hand-captured points are a few pixels off the fitted board
+            assert close(computed, captured, tolerance=8)
+
+
+@pytest.mark.parametrize('width, height', [
+    (2560, 1080), (3440, 1440), (1600, 1200), (3840, 2160), (1366, 768)])
+def test_board_at_other_resolutions(width, height):
+    tables = boardtables.BoardTables(width, height)
+    fields = tables.fields
+    for x, y in fields:
+        assert 0 <= x < width and 0 <= y < height
+    for row in range(8):
+        # columns from left to right
+        xs = [fields[row * 8 + column][0] for column in range(8)]
+        assert xs == sorted(xs)
+    for column in range(8):
+        # rows from bottom to top of the screen
+        ys = [fields[row * 8 + column][1] for row in range(8)]
+        assert ys == sorted(ys, reverse=True)
+    # the board scales with the screen height and stays centered
+    reference = boardtables.BoardTables(1920, 1080)
+    for field in ('a1', 'h8'):
+        index = validator.fieldToIndex(field)
+        u, v = boardtables.normalize(fields[index], width, height)
+        expected = boardtables.normalize(reference.fields[index], 1920, 1080)
+        assert close((u, v), expected, tolerance=0.01)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# test_iocontroller.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Atomic overlay files and the background writer"""
+
+import os
+import shutil
+import time
+
+import pytest
+
+import iocontroller
+
+
+def read(directory, filename):
+    with open(os.path.join(str(directory), filename)) as f:
+        return f.read()
+
+
+def waitFor(condition, seconds=5):
+    end = time.monotonic() + seconds
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_write_file_replaces_the_file(tmp_path):
+    myIO = iocontroller.IOController(str(tmp_path))
+    myIO.writeFile('commands.txt', 'one')
+    myIO.writeFile('commands.txt', 'two')
+    assert read(tmp_path, 'commands.txt') == 'two'
+    # the temporary file is gone
+    assert os.listdir(str(tmp_path)) == ['commands.txt']
+
+
+def test_output_directory_is_created(tmp_path):
+    directory = os.path.join(str(tmp_path), 'bot1')
+    iocontroller.IOController(directory).writeFile('a.txt', 'x')
+    assert read(directory, 'a.txt') == 'x'
+
+
+def test_update_writes_immediately_without_writer(tmp_path):
+    myIO = iocontroller.IOController(str(tmp_path))
+    myIO.updateFile('lastsaid.txt', 'hello')
+    assert read(tmp_path, 'lastsaid.txt') == 'hello'
+
+
+def test_flush_writes_only_the_latest_text(tmp_path, monkeypatch):
+    myIO = iocontroller.IOController(str(tmp_path))
+    written = []
+    writeFile = myIO.writeFile
+    monkeypatch.setattr(myIO, 'writeFile', lambda filename, message: (
+        written.append((filename, message)), writeFile(filename, message)))
+    # pretend the background writer runs, so updates only wait
+    myIO.writer = object()
+    for number in range(10):
+        myIO.updateFile('commands.txt', str(number))
+    myIO.flush()
+    assert written == [('commands.txt', '9')]
+    # unchanged text is not written again
+    myIO.updateFile('commands.txt', '9')
+    myIO.flush()
+    assert written == [('commands.txt', '9')]
+
+
+def test_background_writer(tmp_path):
+    myIO = iocontroller.IOController(str(tmp_path))
+    myIO.start(100)
+    myIO.updateFile('commands.txt', 'first')
+    myIO.updateFile('commands.txt', 'second')
+    assert waitFor(lambda: myIO.published.get('commands.txt') == 'second')
+    assert read(tmp_path, 'commands.txt') == 'second'
+
+
+def test_failing_file_does_not_stop_the_writer(tmp_path):
+    directory = os.path.join(str(tmp_path), 'out')
+    myIO = iocontroller.IOController(directory)
+    myIO.start(100)
+    shutil.rmtree(directory)
+    myIO.updateFile('a.txt', 'lost')
+    assert waitFor(lambda: not myIO.pending)
+    os.makedirs(directory)
+    myIO.updateFile('a.txt', 'back')
+    assert waitFor(lambda: myIO.published.get('a.txt') == 'back')
+    assert myIO.writer.is_alive()
+
+
+def test_rate_has_to_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        iocontroller.IOController(str(tmp_path)).start(0)
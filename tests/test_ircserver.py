@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+# test_ircserver.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Tests of the local Twitch chat server"""
+
+import asyncio
+
+import ircserver
+
+
+def run(test):
+    """Runs the coroutine function test(server) against a started
+    server on a free port"""
+    async def main():
+        server = ircserver.LocalTwitchServer(port=0)
+        await server.start()
+        try:
+            await asyncio.wait_for(test(server), 10)
+        finally:
+            await server.close()
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+async def login(server, password='oauth:test', channel='test'):
+    """Connects a client and joins the channel, returns (reader, writer)"""
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    writer.write('PASS {0}\r\nNICK Tester\r\nJOIN #{1}\r\n'.format(
+        password, channel).encode('UTF-8'))
+    await writer.drain()
+    return reader, writer
+
+
+async def readUntil(reader, text):
+    """Returns the first line containing text"""
+    while True:
+        line = (await reader.readline()).decode('UTF-8')
+        assert line, 'connection closed before ' + text
+        if(text in line):
+            return line.rstrip('\r\n')
+
+
+def test_login_and_join():
+    async def test(server):
+        reader, writer = await login(server)
+        assert ' 001 tester ' in await readUntil(reader, ' 001 ')
+        assert 'JOIN #test' in await readUntil(reader, 'JOIN')
+        await server.waitForJoin()
+        assert server.connections[0].channels == {'test'}
+        writer.close()
+    run(test)
+
+
+def test_login_without_oauth_fails():
+    async def test(server):
+        reader, writer = await login(server, password='secret')
+        assert 'Login authentication failed' in await readUntil(
+            reader, 'NOTICE')
+        assert await reader.read() == b''
+        assert not server.joined.is_set()
+        writer.close()
+    run(test)
+
+
+def test_ping_pong():
+    async def test(server):
+        reader, writer = await login(server)
+        await readUntil(reader, 'JOIN')
+        writer.write(b'PING :tmi.twitch.tv\r\nPONG :tmi.twitch.tv\r\n')
+        assert 'PONG' in await readUntil(reader, 'PONG')
+        writer.write(b'PRIVMSG #test :hello\r\n')
+        await writer.drain()
+        while not server.received:
+            await asyncio.sleep(0.01)
+        assert server.pongs == 1
+        assert server.received == [('tester', 'test', 'hello')]
+        writer.close()
+    run(test)
+
+
+def test_capabilities():
+    async def test(server):
+        reader, writer = await login(server)
+        writer.write(b'CAP REQ :twitch.tv/tags\r\nCAP REQ :example/cap\r\n')
+        assert 'ACK :twitch.tv/tags' in await readUntil(reader, 'CAP')
+        assert 'NAK :example/cap' in await readUntil(reader, 'CAP')
+        assert server.connections[0].capabilities == {'twitch.tv/tags'}
+        writer.close()
+    run(test)
+
+
+def test_chat_with_and_without_tags():
+    async def test(server):
+        plain, plainWriter = await login(server)
+        tagged, taggedWriter = await login(server)
+        taggedWriter.write(b'CAP REQ :twitch.tv/tags\r\n')
+        await readUntil(plain, 'JOIN')
+        await readUntil(tagged, 'ACK')
+        server.sendChat('test', 'viewer', '!m a1 a2', badges='moderator/1',
+                        messageId='abc')
+        server.sendChat('other', 'viewer', 'not joined')
+        server.sendChat('test', 'viewer', '!r')
+        line = await readUntil(plain, 'PRIVMSG')
+        assert line == (':viewer!viewer@viewer.tmi.twitch.tv '
+                        'PRIVMSG #test :!m a1 a2')
+        assert (await readUntil(plain, 'PRIVMSG')).endswith(':!r')
+        line = await readUntil(tagged, 'PRIVMSG')
+        assert line.startswith('@badges=moderator/1;display-name=viewer;'
+                               'id=abc;')
+        assert line.endswith(' PRIVMSG #test :!m a1 a2')
+        line = await readUntil(tagged, 'PRIVMSG')
+        assert ';id=local-1;' in line
+        plainWriter.close()
+        taggedWriter.close()
+    run(test)
+
+
+def test_disconnect_and_reconnect():
+    async def test(server):
+        reader, writer = await login(server)
+        await readUntil(reader, 'JOIN')
+        server.sendReconnect()
+        assert 'RECONNECT' in await readUntil(reader, 'RECONNECT')
+        await server.disconnectClients()
+        assert await reader.read() == b''
+        assert server.connections == []
+        writer.close()
+    run(test)
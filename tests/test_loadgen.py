@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+# test_loadgen.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Tests of the synthetic chat of the load generator"""
+
+import itertools
+import random
+
+import pytest
+
+import loadgen
+import validator
+
+
+@pytest.mark.parametrize('line', loadgen.MALFORMED)
+def test_malformed_is_rejected(line):
+    assert not validator.validateCommand(line)
+
+
+def test_random_commands_are_valid():
+    rng = random.Random(1)
+    for dummy in range(1000):
+        line = loadgen.randomCommand(rng)
+        assert validator.validateCommand(line), line
+
+
+def test_synthetic_chat_mix():
+    rng = random.Random(2)
+    lines = [text for user, text in
+             itertools.islice(loadgen.syntheticChat(rng, 0.5, 0.2), 2000)]
+    commands = sum(1 for text in lines if validator.validateCommand(text))
+    malformed = sum(1 for text in lines if text in loadgen.MALFORMED)
+    assert 900 < commands < 1100
+    assert 300 < malformed < 500
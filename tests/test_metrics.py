@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# test_metrics.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Tests of the Prometheus metrics"""
+
+from types import SimpleNamespace
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+import metrics
+import validator
+
+
+def test_format_value():
+    assert metrics.formatValue(3) == '3'
+    assert metrics.formatValue(2.0) == '2'
+    assert metrics.formatValue(0.25) == '0.25'
+    assert metrics.formatValue(float('inf')) == '+Inf'
+
+
+def test_format_labels_escapes():
+    assert metrics.formatLabels([]) == ''
+    assert metrics.formatLabels([('kind', 'move'), ('le', '+Inf')]) == \
+        '{kind="move",le="+Inf"}'
+    assert metrics.formatLabels([('text', 'a"b\\c\nd')]) == \
+        '{text="a\\"b\\\\c\\nd"}'
+
+
+def test_counter_and_gauge():
+    registry = metrics.Metrics()
+    messages = registry.add(metrics.Counter('messages_total', 'Messages'))
+    commands = registry.add(
+        metrics.Counter('commands_total', 'Commands', 'kind'))
+    depth = registry.add(metrics.Gauge('depth', 'Depth'))
+    messages.inc()
+    messages.inc(amount=2)
+    commands.inc('reroll')
+    commands.inc('move')
+    commands.inc('move')
+    depth.set(5)
+    depth.set(1)
+    assert registry.render() == (
+        '# HELP messages_total Messages\n'
+        '# TYPE messages_total counter\n'
+        'messages_total 3\n'
+        '# HELP commands_total Commands\n'
+        '# TYPE commands_total counter\n'
+        'commands_total{kind="move"} 2\n'
+        'commands_total{kind="reroll"} 1\n'
+        '# HELP depth Depth\n'
+        '# TYPE depth gauge\n'
+        'depth 1\n')
+
+
+def test_function_values():
+    plain = metrics.Counter('plain', 'Plain', function=lambda: 7)
+    labelled = metrics.Counter('labelled', 'Labelled', 'how',
+                               function=lambda: {'merged': 2, 'folded': 1})
+    assert plain.samples() == [('plain', [], 7)]
+    assert labelled.samples() == [('labelled', [('how', 'folded')], 1),
+                                  ('labelled', [('how', 'merged')], 2)]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram('latency', 'Latency', 'kind',
+                                  buckets=(0.1, 1.0))
+    histogram.observe(0.05, 'move')
+    histogram.observe(0.5, 'move')
+    histogram.observe(0.1, 'move')
+    histogram.observe(3, 'move')
+    assert histogram.samples() == [
+        ('latency_bucket', [('kind', 'move'), ('le', '0.1')], 2),
+        ('latency_bucket', [('kind', 'move'), ('le', '1')], 3),
+        ('latency_bucket', [('kind', 'move'), ('le', '+Inf')], 4),
+        ('latency_sum', [('kind', 'move')], 3.65),
+        ('latency_count', [('kind', 'move')], 4)]
+
+
+def test_bot_metrics_times_commands():
+    bot = metrics.BotMetrics()
+    command = validator.parseCommand('!m a1 a2')
+    command.received = 10.0
+    command.validated = 10.5
+    bot.commandValidated(command)
+    bot.batchExecuted([command], 12.0, 13.0)
+    assert bot.commands.samples() == [
+        ('tpac_commands_total', [('kind', 'move')], 1)]
+    assert bot.validateSeconds.samples()[-1] == \
+        ('tpac_command_validate_seconds_count', [], 1)
+    assert bot.waitSeconds.samples()[-2] == \
+        ('tpac_command_wait_seconds_sum', [('kind', 'move')], 1.5)
+    assert bot.executeSeconds.samples()[-2] == \
+        ('tpac_command_execute_seconds_sum', [('kind', 'move')], 1.0)
+    assert bot.latencySeconds.samples()[-2] == \
+        ('tpac_command_latency_seconds_sum', [('kind', 'move')], 3.0)
+
+
+def test_bot_metrics_watch():
+    bot = metrics.BotMetrics()
+    executor = SimpleNamespace(pending=lambda: 4, dropped=2)
+    limiter = SimpleNamespace(limited=3, shed=1)
+    coalescer = SimpleNamespace(counts=lambda: {'merged': 5})
+    bot.watchExecutor(executor)
+    bot.watchRateLimiter(limiter)
+    bot.watchCoalescer(coalescer)
+    text = bot.render()
+    assert 'tpac_queue_depth 4\n' in text
+    assert 'tpac_dropped_commands_total 2\n' in text
+    assert 'tpac_limited_commands_total 3\n' in text
+    assert 'tpac_shed_commands_total 1\n' in text
+    assert 'tpac_coalesced_commands_total{how="merged"} 5\n' in text
+
+
+def test_serve():
+    registry = metrics.Metrics()
+    registry.add(metrics.Counter('served', 'Served')).inc()
+    registry.serve(0)
+    try:
+        url = 'http://127.0.0.1:{0}'.format(registry.server.server_port)
+        with urlopen(url + '/metrics', timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            assert response.read().decode('utf-8') == registry.render()
+        with pytest.raises(HTTPError) as error:
+            urlopen(url + '/other', timeout=5)
+        assert error.value.code == 404
+    finally:
+        registry.stop()
+    assert registry.server is None
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+# test_ratelimit.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Token buckets per user and load shedding"""
+
+import clocks
+import ratelimit
+
+
+def test_burst_then_limited():
+    limiter = ratelimit.RateLimiter(burst=3, refill=1.0,
+                                    clock=clocks.VirtualClock())
+    assert [limiter.check('user') for dummy in range(4)] == [
+        None, None, None, ratelimit.LIMITED]
+    assert limiter.limited == 1
+
+
+def test_tokens_refill_over_time():
+    clock = clocks.VirtualClock()
+    limiter = ratelimit.RateLimiter(burst=2, refill=0.5, clock=clock)
+    limiter.check('user')
+    limiter.check('user')
+    assert limiter.check('user') == ratelimit.LIMITED
+    clock.sleep(1.0)
+    # half a token is not enough
+    assert limiter.check('user') == ratelimit.LIMITED
+    clock.sleep(1.0)
+    assert limiter.check('user') is None
+    # never more than the burst
+    clock.sleep(100.0)
+    assert [limiter.check('user') for dummy in range(3)] == [
+        None, None, ratelimit.LIMITED]
+
+
+def test_users_have_their_own_buckets():
+    limiter = ratelimit.RateLimiter(burst=1, clock=clocks.VirtualClock())
+    assert limiter.check('a') is None
+    assert limiter.check('a') == ratelimit.LIMITED
+    assert limiter.check('b') is None
+
+
+def test_least_recently_active_user_is_forgotten():
+    limiter = ratelimit.RateLimiter(burst=1, maxUsers=2,
+                                    clock=clocks.VirtualClock())
+    limiter.check('a')
+    limiter.check('b')
+    # a is active again, so b is the least recently active one
+    assert limiter.check('a') == ratelimit.LIMITED
+    limiter.check('c')
+    assert len(limiter) == 2
+    assert 'b' not in limiter.buckets
+    # a forgotten user starts with a full bucket
+    assert limiter.check('b') is None
+    assert 'a' not in limiter.buckets
+
+
+def test_burst_0_turns_the_limit_off():
+    limiter = ratelimit.RateLimiter(burst=0, clock=clocks.VirtualClock())
+    assert all(limiter.check('user') is None for dummy in range(100))
+
+
+def test_shedding_does_not_cost_a_token():
+    limiter = ratelimit.RateLimiter(burst=1, shedBacklog=10,
+                                    clock=clocks.VirtualClock())
+    assert limiter.check('user', backlog=10) == ratelimit.SHED
+    assert limiter.check('user', backlog=9) is None
+    assert limiter.shed == 1
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+# test_reconnect.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Keepalive, reconnect requests and the backoff of the twitch
+connection"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import clocks
+import ircserver
+import tpacLaunch
+import twitchclient
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(asyncio.wait_for(coroutine, 10))
+    finally:
+        loop.close()
+
+
+async def startServer():
+    server = ircserver.LocalTwitchServer(port=0)
+    await server.start()
+    return server
+
+
+def createClient(server, keepalive=5):
+    return twitchclient.TwitchClient(server.host, server.port, 'oauth:test',
+                                     'bot', 'test', keepalive=keepalive)
+
+
+class ScriptedClient:
+    """Twitch client whose connections last the scripted seconds.
+    Every connection is (seconds, reconnect requested, failed attempts
+    before it)"""
+
+    def __init__(self, clock, script):
+        self.clock = clock
+        self.script = list(script)
+        self.connects = []
+        self.failures = 0
+        self.reconnectRequested = False
+
+    async def run(self):
+        seconds, self.reconnectRequested, self.failures = self.script.pop(0)
+        await self.clock.wait(seconds)
+        raise ConnectionError('lost')
+
+    async def connect(self, announce=True):
+        assert not announce
+        self.connects.append(self.clock.time())
+        if(self.failures):
+            self.failures -= 1
+            raise ConnectionRefusedError('refused')
+        if not self.script:
+            raise asyncio.CancelledError()
+
+
+def test_backoff(monkeypatch):
+    monkeypatch.setattr(tpacLaunch.random, 'uniform', lambda low, high: 1.0)
+    clock = clocks.VirtualClock()
+    client = ScriptedClient(clock, [
+        (0, False, 0),
+        # lost again right away: twice the wait
+        (0, False, 0),
+        # stable: back to the start, the failed attempt doubles it
+        (100, False, 1),
+        # stable and asked to reconnect: right away
+        (100, True, 0),
+        # asked to reconnect again soon: waits
+        (0, True, 0)])
+    setup = SimpleNamespace(clock=clock, reconnect=True)
+    with pytest.raises(asyncio.CancelledError):
+        run(tpacLaunch.Setup.superviseTwitch(setup, client))
+    assert client.connects == [1, 3, 104, 106, 206, 208]
+
+
+def test_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(tpacLaunch.random, 'uniform', lambda low, high: 1.0)
+    clock = clocks.VirtualClock()
+    client = ScriptedClient(clock, [(0, False, 8)])
+    setup = SimpleNamespace(clock=clock, reconnect=True)
+    with pytest.raises(asyncio.CancelledError):
+        run(tpacLaunch.Setup.superviseTwitch(setup, client))
+    waits = [later - earlier for earlier, later in
+             zip([0] + client.connects, client.connects)]
+    assert waits == [1, 2, 4, 8, 16, 32, 60, 60, 60]
+
+
+def test_lost_connection_without_reconnect_fails():
+    clock = clocks.VirtualClock()
+    client = ScriptedClient(clock, [(0, False, 0)])
+    setup = SimpleNamespace(clock=clock, reconnect=False)
+    with pytest.raises(ConnectionError):
+        run(tpacLaunch.Setup.superviseTwitch(setup, client))
+
+
+def test_reconnect_joins_again(monkeypatch):
+    monkeypatch.setattr(tpacLaunch.random, 'uniform',
+                        lambda low, high: 0.01)
+
+    async def test():
+        server = await startServer()
+        client = createClient(server)
+        setup = SimpleNamespace(clock=clocks.Clock(), reconnect=True)
+        supervisor = None
+        try:
+            await client.connect()
+            await server.waitForJoin()
+            supervisor = asyncio.ensure_future(
+                tpacLaunch.Setup.superviseTwitch(setup, client))
+            server.joined.clear()
+            await server.disconnectClients()
+            await server.waitForJoin()
+            server.sendChat('test', 'viewer', '!r')
+            message = await client.messages.get()
+            assert (message.user, message.text) == ('viewer', '!r')
+            # only the first connection announces itself
+            assert [text for nick, channel, text in server.received] == [
+                'Connected']
+        finally:
+            if(supervisor is not None):
+                supervisor.cancel()
+            await server.close()
+    run(test())
+
+
+def test_server_asks_to_reconnect():
+    async def test():
+        server = await startServer()
+        client = createClient(server)
+        try:
+            await client.connect(announce=False)
+            await server.waitForJoin()
+            server.sendReconnect()
+            with pytest.raises(ConnectionError) as error:
+                await client.run()
+            assert 'reconnect' in str(error.value)
+            assert client.reconnectRequested
+            await client.connect(announce=False)
+            assert not client.reconnectRequested
+        finally:
+            await server.close()
+    run(test())
+
+
+def test_keepalive_gives_up_a_silent_connection():
+    async def test():
+        server = await startServer()
+        client = createClient(server, keepalive=0.1)
+        try:
+            await client.connect(announce=False)
+            await server.waitForJoin()
+            server.silent = True
+            with pytest.raises(ConnectionError) as error:
+                await client.run()
+            assert 'No answer to PING' in str(error.value)
+        finally:
+            await server.close()
+    run(test())
+
+
+def test_keepalive_pings_an_idle_connection():
+    async def test():
+        server = await startServer()
+        client = createClient(server, keepalive=0.05)
+        await client.connect(announce=False)
+        reader = asyncio.ensure_future(client.run())
+        try:
+            await asyncio.sleep(0.3)
+            # the server answers, so the connection stays
+            assert not reader.done()
+        finally:
+            reader.cancel()
+            await server.close()
+    run(test())
+
+
+def test_connect_fails_without_server():
+    async def test():
+        server = await startServer()
+        client = createClient(server)
+        await server.close()
+        with pytest.raises(OSError):
+            await client.connect()
+    run(test())
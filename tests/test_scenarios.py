@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+# test_scenarios.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Whole command scenarios on a virtual clock: they take milliseconds and
+the times of the game input can be asserted exactly"""
+
+import os
+
+import pytest
+
+import actionplan
+import clocks
+import gamecontroller
+import iocontroller
+import peripherals
+import tpacLaunch
+import validator
+
+SETTINGS = """[Settings]
+HOST = 127.0.0.1
+PORT = 6667
+AUTH = oauth:test
+USERNAME = test
+APP = test
+CHAT_CHANNEL = test
+LENGTH = 10
+HOTKEYS = m,b,s,r,x
+RESOLUTION = 1920x1080
+OUTPUT_DIR = {0}
+MODE = democracy
+DEMOCRACY_TIME = 2.5
+BACKEND = null
+"""
+
+
+@pytest.fixture
+def clock():
+    return clocks.VirtualClock()
+
+
+@pytest.fixture
+def recorder(clock):
+    return peripherals.RecordingBackend(clock)
+
+
+@pytest.fixture
+def gc(tmp_path, clock, recorder):
+    return gamecontroller.GameController(
+        'test', ['m', 'b', 's', 'r', 'x'], ['1920', '1080'],
+        ioController=iocontroller.IOController(str(tmp_path)),
+        backend=recorder, clock=clock)
+
+
+def execute(gc, line):
+    gc.findAndExecute(validator.parseCommand(line))
+
+
+def clicks(recorder):
+    return [action for action in recorder.actions
+            if action[1] == actionplan.CLICK]
+
+
+def readOverlay(tmp_path, filename):
+    with open(os.path.join(str(tmp_path), filename)) as f:
+        return f.read()
+
+
+def test_ragequit_counts_down_and_quits_at_20s(tmp_path, gc, clock,
+                                               recorder):
+    execute(gc, '!rq')
+    assert recorder.actions == []
+    gc.runTimers(5.5)
+    # shown at t=5, rounded up
+    assert 'ragequit!: 16' in readOverlay(tmp_path, 'ragequit.txt')
+    gc.runTimers()
+    # the quit is the first input, at the deadline
+    assert recorder.actions[0][0] == 20.0
+    assert len(clicks(recorder)) == 5
+    assert readOverlay(tmp_path, 'ragequit.txt') == ''
+    assert not gc.allowRagequit
+    assert gc.scheduler.pending() == 0
+
+
+def test_second_ragequit_is_ignored(gc, clock, recorder):
+    execute(gc, '!rq')
+    gc.runTimers(10)
+    execute(gc, '!rq')
+    gc.runTimers()
+    assert recorder.actions[0][0] == 20.0
+    assert len(clicks(recorder)) == 5
+
+
+def test_stay_cancels_the_ragequit(tmp_path, gc, clock, recorder):
+    execute(gc, '!rq')
+    gc.runTimers(3)
+    execute(gc, '!stay')
+    gc.runTimers(30)
+    assert recorder.actions == []
+    assert gc.scheduler.pending() == 0
+    assert readOverlay(tmp_path, 'ragequit.txt') == ''
+    # a new ragequit can be started
+    execute(gc, '!rq')
+    assert gc.allowRagequit
+
+
+def test_stay_before_the_queued_quit_runs(gc, clock, recorder):
+    execute(gc, '!rq')
+    clock.sleep(20)
+    # the countdown ended, the quit waits for the game input
+    gc.scheduler.runDue()
+    assert [command.kind for command in gc.delayedCommands] == ['quit']
+    execute(gc, '!stay')
+    gc.runDelayed()
+    assert recorder.actions == []
+    assert not gc.allowRagequit
+
+
+def test_tab_tour_visits_every_player(gc, clock, recorder):
+    execute(gc, '!tab')
+    gc.runTimers()
+    moves = [(when, value) for when, kind, value in recorder.actions
+             if kind == actionplan.MOVE]
+    visited = [position for position in gc.tables.players
+               if any(value == position for when, value in moves)]
+    assert visited == list(gc.tables.players)
+    # the last player is shown 7/8 of the tour after the first one
+    lastVisit = min(when for when, value in moves
+                    if value == gc.tables.players[-1])
+    assert lastVisit >= gc.timing.get('tabtour') * 7 / 8
+
+
+@pytest.fixture
+def setup(tmp_path, clock, monkeypatch):
+    settingsFile = os.path.join(str(tmp_path), 'settings.txt')
+    with open(settingsFile, 'w') as f:
+        f.write(SETTINGS.format(tmp_path))
+    setup = tpacLaunch.Setup(settingsFile, clock)
+    setup.executed = []
+    monkeypatch.setattr(setup, 'executeCommand', lambda command: (
+        setup.executed.append((clock.time(), command.text))))
+    return setup
+
+
+def vote(setup, line, times=1):
+    for dummy in range(times):
+        setup.addToCommandList('viewer', validator.parseCommand(line))
+
+
+def runFor(setup, clock, seconds):
+    end = clock.time() + seconds
+    while True:
+        delay = setup.scheduler.runDue()
+        left = end - clock.time()
+        if(left <= 0):
+            return
+        clock.sleep(left if delay is None else min(delay, left))
+
+
+def test_democracy_executes_the_most_voted_command(setup, clock):
+    setup.democracy()
+    vote(setup, '!p 1')
+    vote(setup, '!p 2', 3)
+    vote(setup, '!r', 2)
+    runFor(setup, clock, 2.5)
+    assert setup.executed == [(2.5, '!p 2')]
+
+
+def test_30_democracy_rounds_do_not_drift(setup, clock):
+    setup.democracy()
+    for number in range(30):
+        vote(setup, '!p {0}'.format(number % 5 + 1))
+        runFor(setup, clock, 2.5)
+    assert len(setup.executed) == 30
+    assert [when for when, text in setup.executed] == [
+        2.5 * (number + 1) for number in range(30)]
+    assert setup.executed[-1][1] == '!p 5'
+
+
+def test_democracy_round_without_votes_executes_nothing(setup, clock):
+    setup.democracy()
+    runFor(setup, clock, 10)
+    assert setup.executed == []
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+# test_scheduling.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Timers of the scheduler"""
+
+import asyncio
+import threading
+
+import clocks
+import scheduling
+
+
+def runFor(scheduler, seconds):
+    """Runs the scheduler on its (virtual) clock for some seconds"""
+    async def main():
+        task = asyncio.ensure_future(scheduler.run())
+        await scheduler.clock.wait(seconds)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def test_due_timers_run_in_deadline_order():
+    clock = clocks.VirtualClock()
+    scheduler = scheduling.Scheduler(clock)
+    calls = []
+    scheduler.schedule(2, calls.append, 'second')
+    scheduler.schedule(1, calls.append, 'first')
+    scheduler.schedule(2, calls.append, 'third')
+    assert scheduler.runDue() == 1
+    assert calls == []
+    clock.now = 2
+    assert scheduler.runDue() is None
+    assert calls == ['first', 'second', 'third']
+    assert scheduler.pending() == 0
+
+
+def test_cancel_and_clear():
+    clock = clocks.VirtualClock()
+    scheduler = scheduling.Scheduler(clock)
+    calls = []
+    timer = scheduler.schedule(1, calls.append, 'cancelled')
+    scheduler.schedule(3, calls.append, 'kept')
+    timer.cancel()
+    assert scheduler.pending() == 2
+    # the cancelled timer is dropped instead of waited for
+    assert scheduler.runDue() == 3
+    assert scheduler.pending() == 1
+    scheduler.clear()
+    clock.now = 5
+    assert scheduler.runDue() is None
+    assert calls == []
+
+
+def test_failing_timer_does_not_stop_the_others(capsys):
+    scheduler = scheduling.Scheduler(clocks.VirtualClock())
+    calls = []
+    scheduler.schedule(0, lambda: 1 / 0)
+    scheduler.schedule(0, calls.append, 'after')
+    scheduler.runDue()
+    assert calls == ['after']
+    assert 'ZeroDivisionError' in capsys.readouterr().err
+
+
+def test_repeated_timer_does_not_drift():
+    clock = clocks.VirtualClock()
+    scheduler = scheduling.Scheduler(clock)
+    times = []
+
+    def tick():
+        times.append(clock.time())
+        # a slow callback must not delay the next deadline
+        clock.now += 0.3
+
+    timer = scheduler.schedule(1, tick, interval=1)
+    runFor(scheduler, 3.5)
+    assert times == [1, 2, 3]
+    timer.cancel()
+    runFor(scheduler, 2)
+    assert times == [1, 2, 3]
+
+
+def test_run_wakes_up_for_timers_of_other_threads():
+    scheduler = scheduling.Scheduler()
+    called = threading.Event()
+
+    async def main():
+        task = asyncio.ensure_future(scheduler.run())
+        # run() waits without a deadline until the timer is pushed
+        while scheduler.loop is None:
+            await asyncio.sleep(0.01)
+        thread = threading.Thread(target=scheduler.schedule,
+                                  args=(0, called.set))
+        thread.start()
+        thread.join()
+        for dummy in range(500):
+            if called.is_set():
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+    assert called.is_set()
+    assert scheduler.loop is None
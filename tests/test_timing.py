@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+# test_timing.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Timing profiles and the search for the smallest working delay"""
+
+import pytest
+
+import actionplan
+import timing
+
+PROFILES = """[fast]
+click = 0.2
+click.resetChicken = 0.9
+menu = 0.5
+"""
+
+
+@pytest.fixture
+def filename(tmp_path):
+    path = tmp_path / 'timing.txt'
+    path.write_text(PROFILES)
+    return str(path)
+
+
+def test_missing_file_uses_the_defaults(tmp_path):
+    profiles = timing.TimingProfiles(str(tmp_path / 'none.txt'))
+    assert profiles.delays == dict(timing.DEFAULTS)
+
+
+def test_profile_overrides_the_defaults(filename):
+    profiles = timing.TimingProfiles(filename, 'fast')
+    assert profiles.get('click') == 0.2
+    assert profiles.get('menu') == 0.5
+    assert profiles.get('drag') == timing.DEFAULTS['drag']
+    profiles.select('default')
+    assert profiles.get('click') == timing.DEFAULTS['click']
+
+
+def test_unknown_profile(filename):
+    with pytest.raises(ValueError):
+        timing.TimingProfiles(filename, 'slow')
+
+
+def test_settle_uses_the_delay_of_the_tag(filename):
+    profiles = timing.TimingProfiles(filename, 'fast')
+    reset = actionplan.Action(actionplan.CLICK, 1, 1, '3',
+                              tag='resetChicken')
+    close = actionplan.Action(actionplan.CLICK, 1, 1, '1', tag='close')
+    key = actionplan.Action(actionplan.KEY, key='a')
+    assert profiles.settle(reset) == 0.9
+    assert profiles.settle(close) == 0.2
+    assert profiles.settle(key) == timing.DEFAULTS['key']
+
+
+def test_save_keeps_the_other_profiles(filename):
+    profiles = timing.TimingProfiles(filename, 'fast')
+    profiles.save('calibrated', {'click': 0.12345, 'click.shopButton': 0.3})
+    reloaded = timing.TimingProfiles(filename, 'calibrated')
+    assert reloaded.get('click') == 0.123
+    assert reloaded.get('click.shopButton') == 0.3
+    reloaded.select('fast')
+    assert reloaded.get('click.resetChicken') == 0.9
+    # the active profile stays selected
+    assert profiles.name == 'fast'
+
+
+def test_find_minimum_delay():
+    tried = []
+
+    def trial(seconds):
+        tried.append(seconds)
+        return seconds >= 0.3
+
+    found = timing.findMinimumDelay(trial, 1.0, resolution=0.01)
+    assert 0.3 <= found <= 0.31
+    assert len(tried) <= 7
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# test_twitchclient.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Parsing of the chat as received from Twitch"""
+
+import metrics
+import twitchclient
+
+
+def line(user, text, tags=None):
+    prefix = '@{0} '.format(tags) if tags else ''
+    return '{0}:{1}!{1}@{1}.tmi.twitch.tv PRIVMSG #channel :{2}\r\n'.format(
+        prefix, user, text).encode('UTF-8')
+
+
+def test_parse_commands_skips_other_lines():
+    data = (b':tmi.twitch.tv 001 bot :Welcome, GLHF!\r\n' +
+            line('alice', 'hello') +
+            line('bob', '!m aa a1') +
+            b'PING :tmi.twitch.tv\r\n' +
+            line('carol', 'what about !r') +
+            line('dave', '!r'))
+    messages = twitchclient.parseCommands(data)
+    assert [(message.user, message.text) for message in messages] == [
+        ('bob', '!m aa a1'), ('dave', '!r')]
+
+
+def test_parse_commands_stops_at_end():
+    data = line('bob', '!r') + line('dave', '!l')
+    messages = twitchclient.parseCommands(data, len(line('bob', '!r')))
+    assert [message.text for message in messages] == ['!r']
+
+
+def test_parse_message():
+    data = line('bob', '!p 1')
+    message = twitchclient.parseMessage(data)
+    assert (message.user, message.text) == ('bob', '!p 1')
+    assert message.userId is None
+    assert message.identity == 'bob'
+    assert not message.priority
+    assert twitchclient.parseMessage(line('bob', 'hi')) is False
+    assert twitchclient.parseMessage(b'PING :tmi.twitch.tv\r\n') is None
+
+
+def test_parse_message_in_place():
+    data = line('alice', 'hello') + line('bob', '!r') + line('carol', '!l')
+    start = len(line('alice', 'hello'))
+    message = twitchclient.parseMessage(data, start,
+                                        start + len(line('bob', '!r')))
+    assert (message.user, message.text) == ('bob', '!r')
+
+
+def test_undecodable_chat_is_skipped():
+    data = (b':alice!alice@alice.tmi.twitch.tv PRIVMSG #channel :caf\xe9\r\n'
+            b'\xff\xfe garbage\r\n' + line('bob', '!r'))
+    messages = twitchclient.parseCommands(data)
+    assert [(message.user, message.text) for message in messages] == [
+        ('bob', '!r')]
+
+
+def test_parse_tags():
+    assert twitchclient.parseTags(
+        'badges=moderator/1,subscriber/12;id=b34c;user-id=1337') == {
+        'badges': 'moderator/1,subscriber/12', 'id': 'b34c',
+        'user-id': '1337'}
+
+
+def test_tagged_message():
+    data = line('bob', '!r', 'badges=moderator/1,subscriber/12;'
+                'display-name=Bob;id=b34c;tmi-sent-ts=1500000000123;'
+                'user-id=1337')
+    message = twitchclient.parseMessage(data)
+    assert (message.user, message.text) == ('bob', '!r')
+    assert message.messageId == 'b34c'
+    assert message.userId == '1337'
+    assert message.identity == '1337'
+    assert message.badges == ('moderator', 'subscriber')
+    assert message.priority
+    assert message.sentAt == 1500000000.123
+
+
+def test_tagged_line_without_command():
+    data = line('bob', 'hello', 'id=1;user-id=2')
+    assert twitchclient.parseMessage(data) is False
+    assert twitchclient.parseCommands(data) == []
+
+
+def test_repeated_message_ids_are_dropped():
+    botMetrics = metrics.BotMetrics()
+    client = twitchclient.TwitchClient('127.0.0.1', 6667, 'oauth:test',
+                                       'bot', 'channel', metrics=botMetrics)
+    data = (line('bob', '!r', 'id=a;user-id=2') +
+            line('bob', '!r', 'id=b;user-id=2') +
+            line('bob', '!r', 'id=a;user-id=2') +
+            line('carol', '!r'))
+    assert not client.handleLines(data, len(data), 5.0)
+    texts = []
+    while not client.messages.empty():
+        message = client.messages.get_nowait()
+        assert message.received == 5.0
+        texts.append((message.messageId, message.user))
+    assert texts == [('a', 'bob'), ('b', 'bob'), (None, 'carol')]
+    assert botMetrics.duplicateMessages.samples() == [
+        ('tpac_duplicate_messages_total', [], 1)]
+    assert botMetrics.chatMessages.samples() == [
+        ('tpac_chat_messages_total', [], 4)]
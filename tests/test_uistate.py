@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+# test_uistate.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Shop and chicken state of the game controller and what it saves in a
+compiled batch"""
+
+import pytest
+
+import gamecontroller
+import peripherals
+import validator
+
+
+@pytest.fixture
+def gc():
+    return gamecontroller.GameController(
+        'test', ['m', 'b', 's', 'r', 'x'], ['1920', '1080'],
+        backend=peripherals.NullBackend())
+
+
+def tags(gc, lines):
+    plan = gc.compileCommands([validator.parseCommand(line)
+                               for line in lines])
+    return [action.tag or action.kind for action in plan]
+
+
+def test_state_is_unknown_at_start(gc):
+    assert gc.ui.shopOpen is None
+    assert gc.ui.chickenHome is None
+
+
+def test_known_closed_shop_is_not_closed_again(gc):
+    assert tags(gc, ['!shop off']) == ['close']
+    assert gc.ui.shopOpen is False
+    assert tags(gc, ['!shop off']) == []
+
+
+def test_open_shop_is_not_toggled(gc):
+    assert tags(gc, ['!shop on']) == ['close', 'shopButton']
+    assert gc.ui.shopOpen
+    assert tags(gc, ['!shop on']) == []
+    assert tags(gc, ['!shop off']) == ['close']
+
+
+def test_chicken_at_home_is_not_reset(gc):
+    gc.ui.chickenHome = True
+    assert 'resetChicken' not in tags(gc, ['!r'])
+    gc.ui.chickenHome = False
+    assert 'resetChicken' in tags(gc, ['!r'])
+    assert gc.ui.chickenHome
+
+
+def test_forget_makes_everything_unknown(gc):
+    tags(gc, ['!shop on'])
+    gc.ui.forget()
+    assert gc.ui.shopOpen is None
+    assert tags(gc, ['!shop on']) == ['close', 'shopButton']
+
+
+def test_batch_does_not_toggle_the_shop_between_commands(gc):
+    batch = tags(gc, ['!m a1 a2', '!m a2 a3', '!s a3', '!r'])
+    # closed once at the start, reopened once at the end
+    assert batch.count('close') == 1
+    assert batch.count('shopButton') == 1
+    assert batch[0] == 'close'
+    assert batch[-1] == 'shopButton'
+    assert gc.ui.shopOpen
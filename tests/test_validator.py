@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# test_validator.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Parsing chat lines into commands and the token table of the validator
+against the linear scan over every pattern it replaced"""
+
+import itertools
+import re
+
+import pytest
+
+import validator
+
+LINES = [
+    '!m aa a1', '!move bb b4', '!m aa aa', '!m a1 a1', '!m left', '!M Top',
+    '!m', '!mx', '!aa', '!aa left', '!hh bot', '!ii', '!g h8', '!grab aa',
+    '!g i1', '!b a2', '!b a5', '!bench h4', '!s g7', '!sell bb', '!rq',
+    '!rqx', '!r', '!reroll', '!reroll now', '!x 3', '!xp 4', '!x 5', '!x',
+    '!shop on', '!shop off', '!shop', '!l', '!lock', '!p 1', '!pick 5',
+    '!p 6', '!i 1 a1', '!item 9 hh', '!i 0 a1', '!tab', '!tab 3', '!tab 9',
+    '!tab 0', '!random', '!search', '!accept', '!decline', '!reconnect',
+    '!calib', '!run left', '!run', '!il 1', '!iul 9', '!itemlock 3',
+    '!il 0', '!stay', '!write', '!write hello', '!exec', '!stack !m aa a1',
+    '!stack !r', '!stack !write', '!stack', '!STAY', '!Shop ON',
+    '!m aa a1 trailing words', '!r  ', '!', '!!', '!nonsense',
+    '!averyveryverylongtokenwithoutspace', 'hello', '', ' !r', 'm aa a1',
+]
+
+
+def test_parse_command():
+    command = validator.parseCommand('!M AA A1')
+    assert command.kind == 'move'
+    assert command.text == '!m aa a1'
+    assert command.args == (validator.fieldToIndex('aa'),
+                            validator.fieldToIndex('a1'))
+    assert command == validator.parseCommand('!m aa a1')
+    assert hash(command) == hash(validator.parseCommand('!m aa a1'))
+
+
+def test_no_command_and_invalid_command():
+    assert validator.parseCommand('hello') is None
+    assert validator.parseCommand('!m aa zz') is False
+    assert validator.parseCommand('!nonsense') is False
+
+
+def test_arguments():
+    assert validator.parseCommand('!x 3').args == (3,)
+    assert validator.parseCommand('!shop on').args == ('on',)
+    assert validator.parseCommand('!tab').args == ()
+    assert validator.parseCommand('!tab 4').args == (4,)
+    assert validator.parseCommand('!i 2 c3').args == (
+        2, validator.fieldToIndex('c3'))
+    assert validator.parseCommand('!bb left').args == (
+        validator.fieldToIndex('bb'), 'left')
+
+
+def test_stacked_command_is_parsed_right_away():
+    stacked = validator.parseCommand('!stack !x 2')
+    assert stacked.args == (validator.parseCommand('!x 2'),)
+    assert validator.parseCommand('!stack !write') is False
+
+
+def test_field_index_round_trip():
+    for index in range(validator.BENCH_OFFSET + 8):
+        assert validator.fieldToIndex(validator.indexToField(index)) == index
+    assert validator.fieldToIndex('a1') == 0
+    assert validator.fieldToIndex('h8') == 63
+    assert validator.fieldToIndex('aa') == validator.BENCH_OFFSET
+
+
+def legacyValidateCommand(command):
+    """Linear scan over every pattern as done before the token table"""
+    if(command[:1] != '!'):
+        return None
+    for pattern in validator.PATTERNS:
+        if(re.match(validator.PATTERNS[pattern], command, re.IGNORECASE)):
+            return pattern
+    return False
+
+
+def generatedLines():
+    """Every token with a few argument variants"""
+    arguments = ['', ' a1', ' aa a1', ' 1', ' 4 hh', ' on', ' left', ' x',
+                 ' !r', ' 9']
+    for token, argument in itertools.product(
+            sorted(validator.COMMANDTOKENS), arguments):
+        yield token + argument
+
+
+@pytest.mark.parametrize('line', LINES + list(generatedLines()))
+def test_token_table_matches_linear_scan(line):
+    expected = legacyValidateCommand(line)
+    if(expected == 'stack'):
+        # the nested command of !stack is validated as well now
+        nested = line[line.find(' ')+1:]
+        expected = 'stack' if legacyValidateCommand(nested) else False
+    assert validator.validateCommand(line) == expected
+
+
+def test_every_pattern_has_a_token():
+    kinds = set(itertools.chain(*validator.COMMANDTOKENS.values()))
+    assert kinds == set(validator.PATTERNS)
+    assert all(len(token) <= validator.MAXTOKENLENGTH
+               for token in validator.COMMANDTOKENS)
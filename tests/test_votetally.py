@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# test_votetally.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+"""Top commands of a democracy round"""
+
+import random
+
+import validator
+import votetally
+
+COMMANDS = ['!p 1', '!p 2', '!p 3', '!p 4', '!p 5', '!r', '!l', '!x 1',
+            '!shop on', '!m aa a1']
+
+
+def vote(tally, line, times=1):
+    for dummy in range(times):
+        tally.vote(validator.parseCommand(line))
+
+
+def texts(commands):
+    return [command.text for command in commands]
+
+
+def test_most_voted_first():
+    tally = votetally.VoteTally()
+    vote(tally, '!p 1')
+    vote(tally, '!r', 3)
+    vote(tally, '!l', 2)
+    assert texts(tally.closeRound()) == ['!r', '!l', '!p 1']
+
+
+def test_ties_keep_the_command_that_got_there_first_in_front():
+    tally = votetally.VoteTally()
+    vote(tally, '!r')
+    vote(tally, '!l')
+    vote(tally, '!l')
+    vote(tally, '!r')
+    # !l had two votes first
+    assert texts(tally.closeRound()) == ['!l', '!r']
+
+
+def test_top_list_matches_a_full_count():
+    rng = random.Random(0)
+    lines = [rng.choice(COMMANDS) for dummy in range(2000)]
+    tally = votetally.VoteTally(topLength=5)
+    counted = {}
+    for line in lines:
+        vote(tally, line)
+        counted[line] = counted.get(line, 0) + 1
+    top = tally.closeRound()
+    assert len(top) == 5
+    counts = [counted[command.text] for command in top]
+    assert counts == sorted(counted.values(), reverse=True)[:5]
+
+
+def test_close_round_starts_a_new_round():
+    tally = votetally.VoteTally()
+    vote(tally, '!r', 2)
+    tally.closeRound()
+    assert tally.votes(validator.parseCommand('!r')) == 0
+    assert tally.closeRound() == []
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+# timing.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import configparser
+import os
+from collections import OrderedDict
+
+# delays in seconds used when the profile file does not set them.
+# The action kinds (see actionplan) are waited for after each action of that
+# kind, the other delays are waits inside the GameController macros.
+# A delay for clicks on one location can be set as click.<tag>, for example
+# click.close = 0.3 or click.resetChicken = 0.9 (case sensitive)
+DEFAULTS = OrderedDict([
+    ('move', 0.5),
+    ('click', 0.5),
+    ('hold', 0.0),
+    ('release', 0.0),
+    ('key', 0.5),
+    # between the screens of the dota menu
+    ('menu', 1.0),
+    # after starting the search until the first lobby pops up
+    ('firstlobby', 5.0),
+    # duration of the tour through all chessboards (!tab)
+    ('tabtour', 5.0),
+    # between buying xp
+    ('xpclick', 0.8),
+    # for the rightclick menu of an item to show up
+    ('rightclickmenu', 0.5),
+    # between the steps of dragging an item
+    ('drag', 1.0),
+    # for the chicken to deliver an item or pick it up
+    ('chickendelivery', 5.0),
+    # for the chicken to reach the start of a !run
+    ('chickenstart', 3.0)
+])
+
+
+class TimingProfiles:
+    """Delays for the game input, read from a profile file.
+    The file has one section per profile, each option is a delay (see
+    DEFAULTS). Missing delays use the defaults. The active profile can be
+    switched at any time"""
+
+    def __init__(self, filename='timing.txt', profile='default'):
+        self.filename = filename
+        self.profiles = {}
+        self.load()
+        self.select(profile)
+
+    def load(self):
+        """(Re)reads the profile file if it exists"""
+        config = configparser.ConfigParser()
+        # tags are camelCase (click.resetChicken)
+        config.optionxform = str
+        if os.path.isfile(self.filename):
+            config.read(self.filename)
+        self.profiles = {'default': dict(DEFAULTS)}
+        for section in config.sections():
+            delays = dict(DEFAULTS)
+            for option in config.options(section):
+                delays[option] = config.getfloat(section, option)
+            self.profiles[section] = delays
+
+    def select(self, profile):
+        """Switches to another profile
+
+        Keyword arguments:
+            profile -- Name of the profile (section in the profile file)
+        """
+        if(profile not in self.profiles):
+            raise ValueError('Unknown timing profile: {0}'.format(profile))
+        self.name = profile
+        self.delays = self.profiles[profile]
+
+    def get(self, delay):
+        """Returns a delay of the active profile in seconds
+
+        Keyword arguments:
+            delay -- Name of the delay (see DEFAULTS)
+        """
+        return self.delays[delay]
+
+    def settle(self, action):
+        """Returns how long to wait after an action
+
+        Keyword arguments:
+            action -- actionplan.Action
+        """
+        delays = self.delays
+        if(action.tag is not None):
+            tagged = delays.get(action.kind + '.' + action.tag)
+            if(tagged is not None):
+                return tagged
+        return delays.get(action.kind, 0.0)
+
+    def save(self, profile, delays):
+        """Writes a profile into the profile file and makes it available
+
+        Keyword arguments:
+            profile -- Name of the profile
+            delays -- dict of delay name -> seconds
+        """
+        config = configparser.ConfigParser()
+        # tags are camelCase (click.resetChicken)
+        config.optionxform = str
+        if os.path.isfile(self.filename):
+            config.read(self.filename)
+        config[profile] = {delay: str(round(seconds, 3))
+                           for delay, seconds in delays.items()}
+        with open(self.filename, 'w') as f:
+            config.write(f)
+        self.load()
+        self.select(self.name)
+
+
+def findMinimumDelay(trial, upper, resolution=0.05):
+    """Searches the smallest delay for which a trial still succeeds.
+    Assumes that every delay above a working delay works as well.
+
+    Keyword arguments:
+        trial -- function that takes a delay and returns if it worked
+        upper -- delay that is known to work
+        resolution -- precision of the result in seconds
+    """
+    lower = 0.0
+    while upper - lower > resolution:
+        middle = (lower + upper) / 2
+        if trial(middle):
+            upper = middle
+        else:
+            lower = middle
+    return upper
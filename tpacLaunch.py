@@ -14,31 +14,79 @@
 # GNU General Public License for more details.
 #
 
+import asyncio
 import configparser
 import os
+import random
 import subprocess
+import sys
 # from screeninfo import get_monitors
-import time
-import socket
-from threading import Thread
 
 import validator
 import iocontroller
 import gamecontroller
+import twitchclient
+import executor
+import peripherals
+import votetally
+import commandhistory
+import timing
+import clocks
+import metrics
+import ratelimit
+import coalesce
+import scheduling
 
 # TODO: split setup/configuration from controller flow
 
 
+def startStations(setups):
+    """Runs several bots (one Setup per settings file) side by side in one
+    event loop until all connections are closed
+
+    Keyword arguments:
+        setups -- list of Setup
+    """
+    for setup in setups:
+        setup.myIO.start(setup.overlay_rate)
+        setup.myIO.resetFile()
+        if(setup.metrics_port):
+            setup.metrics.serve(setup.metrics_port)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        # a failing bot must not stop the others
+        results = loop.run_until_complete(asyncio.gather(
+            *[setup.run() for setup in setups], return_exceptions=True))
+    finally:
+        loop.close()
+    for setup, result in zip(setups, results):
+        # the stream view shows the last state
+        setup.myIO.flush()
+        if isinstance(result, Exception):
+            print('{0} stopped: {1!r}'.format(setup.settingsFile, result))
+
+
 class Setup:
     """
     Configures program and controls flow
     """
-    mode = ''
-    commands = []
-    list_commands = []
-    myIO = iocontroller.IOController()
 
-    def __init__(self):
+    def __init__(self, settingsFile='settings.txt', clock=None):
+        """Reads the settings (asks for them if the file does not exist)
+
+        Keyword arguments:
+            settingsFile -- Settings of this bot
+            clock -- Clock for all timing (see clocks), real time if None
+        """
+        self.settingsFile = settingsFile
+        self.clock = clock or clocks.Clock()
+        # served on METRICS_PORT (if set)
+        self.metrics = metrics.BotMetrics()
+        # votes of the current democracy round
+        self.tally = votetally.VoteTally()
+        # democracy rounds, countdowns and delayed commands
+        self.scheduler = scheduling.Scheduler(self.clock)
         self.config()
 
     def config(self):
@@ -46,9 +94,9 @@ class Setup:
         # TODO: exclude settings and configs outside of controlling
         # programflow -> move programflow to controller class
         while True:
-            if os.path.isfile("settings.txt"):
+            if os.path.isfile(self.settingsFile):
                 config = configparser.ConfigParser()
-                config.read("settings.txt")
+                config.read(self.settingsFile)
                 self.HOST = config.get('Settings', 'HOST')
                 self.PORT = config.getint('Settings', 'PORT')
                 self.AUTH = config.get('Settings', 'AUTH')
@@ -62,6 +110,44 @@ class Setup:
                 self.resolution = config.get(
                     'Settings',
                     'RESOLUTION').split('x')
+                self.queue_length = config.getint(
+                    'Settings', 'QUEUE_LENGTH', fallback=20)
+                self.queue_policy = config.get(
+                    'Settings', 'QUEUE_POLICY', fallback='dropoldest').lower()
+                self.overlay_rate = config.getfloat(
+                    'Settings', 'OVERLAY_RATE', fallback=10)
+                self.timing_file = config.get(
+                    'Settings', 'TIMING_FILE', fallback='timing.txt')
+                self.timing_profile = config.get(
+                    'Settings', 'TIMING_PROFILE', fallback='default')
+                self.output_dir = config.get(
+                    'Settings', 'OUTPUT_DIR', fallback='')
+                self.backend = config.get(
+                    'Settings', 'BACKEND', fallback='pynput').lower()
+                self.metrics_port = config.getint(
+                    'Settings', 'METRICS_PORT', fallback=0)
+                self.reconnect = config.getboolean(
+                    'Settings', 'RECONNECT', fallback=True)
+                self.keepalive = config.getfloat(
+                    'Settings', 'KEEPALIVE', fallback=5)
+                self.stack_depth = config.getint(
+                    'Settings', 'STACK_DEPTH', fallback=10)
+                self.coalesce_window = config.getfloat(
+                    'Settings', 'COALESCE_WINDOW', fallback=1.0)
+                self.rate_burst = config.getint(
+                    'Settings', 'RATE_BURST', fallback=5)
+                self.rate_refill = config.getfloat(
+                    'Settings', 'RATE_REFILL', fallback=1.0)
+                self.rate_users = config.getint(
+                    'Settings', 'RATE_USERS', fallback=50000)
+                self.shed_backlog = config.getint(
+                    'Settings', 'SHED_BACKLOG', fallback=0)
+                # asked for at startup if not set
+                self.mode = config.get('Settings', 'MODE', fallback=None)
+                if(self.mode is not None):
+                    self.mode = self.mode.lower()
+                self.democracy_time = config.getfloat(
+                    'Settings', 'DEMOCRACY_TIME', fallback=0)
                 break
             else:
                 print("Let's make you a config file")
@@ -141,24 +227,112 @@ class Setup:
                     "What's your screen resolution? (default: 1920x1080): ")
                 settings.append("RESOLUTION = " + settings_resolution + "\n")
 
+                settings.append(
+                    "; Maximum number of commands waiting for execution")
+                settings.append("QUEUE_LENGTH = 20\n")
+
+                settings.append(
+                    "; What to do with new commands if the queue is full:" +
+                    "\n; dropoldest, dropnewest or coalesce (merge identical" +
+                    " commands, otherwise drop oldest)")
+                settings.append("QUEUE_POLICY = dropoldest\n")
+
+                settings.append(
+                    "; How often per second the text files for the stream" +
+                    " are updated at most")
+                settings.append("OVERLAY_RATE = 10\n")
+
+                settings.append(
+                    "; File with the delays of the game input and the" +
+                    " profile to use.\n; Missing delays use the built-in" +
+                    " defaults (profile default)")
+                settings.append("TIMING_FILE = timing.txt")
+                settings.append("TIMING_PROFILE = default\n")
+
+                settings.append(
+                    "; Directory of the text files for the stream view" +
+                    " (empty: current directory)")
+                settings.append("OUTPUT_DIR = \n")
+
+                settings.append(
+                    "; Where the game input goes: pynput (the game), null" +
+                    " (nowhere) or\n; recording (kept in memory), the" +
+                    " last two are for testing without a display")
+                settings.append("BACKEND = pynput\n")
+
+                settings.append(
+                    "; Port of the metrics endpoint for Prometheus" +
+                    " (http://127.0.0.1:<port>/metrics), 0 to disable")
+                settings.append("METRICS_PORT = 0\n")
+
+                settings.append(
+                    "; Reconnect to the chat if the connection is lost" +
+                    " (yes/no)")
+                settings.append("RECONNECT = yes")
+                settings.append(
+                    "; Seconds without anything from the chat server" +
+                    " before the bot checks\n; the connection with a PING" +
+                    " (0: never)")
+                settings.append("KEEPALIVE = 5\n")
+
+                settings.append(
+                    "; Commands !stack keeps for !exec at most")
+                settings.append("STACK_DEPTH = 10\n")
+
+                settings.append(
+                    "; Identical commands within this many seconds are" +
+                    " executed once (0: never).\n; Waiting shop/tab" +
+                    " commands are replaced by newer ones, !x are added up")
+                settings.append("COALESCE_WINDOW = 1\n")
+
+                settings.append(
+                    "; Anarchy: commands a user may send at once" +
+                    " (0 for no limit) and\n; commands per second a" +
+                    " user gets back, tracked for this many users at most")
+                settings.append("RATE_BURST = 5")
+                settings.append("RATE_REFILL = 1")
+                settings.append("RATE_USERS = 50000\n")
+
+                settings.append(
+                    "; Anarchy: new commands are dropped while this many" +
+                    " wait for execution\n; (0: never, the queue policy" +
+                    " handles a full queue)")
+                settings.append("SHED_BACKLOG = 0\n")
+
                 allSettings = ''
                 for each_setting in settings:
                     allSettings += each_setting + '\n'
-                self.myIO.writeFile("settings.txt", allSettings)
+                iocontroller.IOController().writeFile(
+                    self.settingsFile, allSettings)
 
+        # text files for the stream view
+        self.myIO = iocontroller.IOController(self.output_dir)
+        # recent commands for the stream view
+        self.commands = commandhistory.CommandHistory(self.command_length)
         self.gc = gamecontroller.GameController(
-            self.CHAT_CHANNEL, self.hotkeys, self.resolution)
+            self.CHAT_CHANNEL, self.hotkeys, self.resolution,
+            timing.TimingProfiles(self.timing_file, self.timing_profile),
+            self.myIO, peripherals.createBackend(self.backend, self.clock),
+            self.clock, self.stack_depth, self.scheduler)
+        # anarchy: keeps single users from flooding the game input
+        self.limiter = ratelimit.RateLimiter(
+            self.rate_burst, self.rate_refill, self.rate_users,
+            self.shed_backlog, self.clock)
+        self.metrics.watchRateLimiter(self.limiter)
         self.configDynamicSettings()
 
     def configDynamicSettings(self):
         """Checks if Dota is running to get dota window ID.
-        Select game type (Democracy/Anarchy)"""
+        Select game type (Democracy/Anarchy) unless set in the settings"""
+        if(self.mode is not None and (self.mode != "democracy" or
+                                      self.democracy_time > 0)):
+            return
         while True:
             # TODO: get window ID cross platform style (maybe with pynput)
             print("Currently available: Democracy, Anarchy\n" +
                   "Democracy: Takes most said command every X " +
                   "second(s)\nAnarchy: Executes every incoming command")
-            self.mode = input("Game type (default Anarchy): ")
+            self.mode = input("Game type (default Anarchy): ").lower()
             if self.mode.lower() == "democracy":
                 print("Takes most said command every X second(s): ")
                 try:
@@ -173,18 +347,63 @@ class Setup:
     def start(self):
         """Starts the main program flow
         Empties the text files for streaming (OBS)
-        Creates parallel threads for democracy if needed
-        Initiates connection to twitch"""
-        self.myIO.resetFile()
+        Runs the twitch connection and the democracy timer in one event
+        loop until the connection is closed"""
+        startStations([self])
+
+    async def run(self):
+        """Connects to twitch and runs the chat reader, the command handling
+        and the democracy timer (if needed) side by side"""
+        # game input blocks for seconds, so it runs in its own worker thread
+        # one command after another
+        coalescer = coalesce.Coalescer(self.coalesce_window)
+        self.executor = executor.CommandExecutor(
+            self.gc, self.queue_length, self.queue_policy, self.metrics,
+            coalescer)
+        self.metrics.watchExecutor(self.executor)
+        self.metrics.watchCoalescer(coalescer)
+        self.executor.start()
+        # delayed commands of the game controller are queued as well
+        self.gc.commandSink = self.executeDelayed
+        client = await self.connectToTwitch()
+        jobs = [self.superviseTwitch(client),
+                self.handleTwitchResponse(client.messages),
+                self.scheduler.run()]
         # Democracy Game Mode?
         if self.mode.lower() == "democracy":
+            self.democracy()
+        jobs = [asyncio.ensure_future(job) for job in jobs]
+        try:
+            await asyncio.gather(*jobs)
+        finally:
+            # stop the remaining jobs if one of them fails (e.g. the
+            # connection was closed)
+            for job in jobs:
+                job.cancel()
+            await asyncio.gather(*jobs, return_exceptions=True)
+            self.scheduler.clear()
+            self.executor.stop()
+
+    def executeCommand(self, command, priority=False):
+        """Hands a command over to the game input worker without waiting
+        for it to finish
+
+        Keyword arguments:
+            command -- parsed command (validator.Command)
+            priority -- Execute it before the waiting commands
+        """
+        if not self.executor.submit(command, priority):
+            print('Merged or dropped: ' + command.text)
 
-            count_job = Thread(target=self.democracy, args=())
-            count_job.start()
+    def executeDelayed(self, command):
+        """Hands a delayed command of the game controller over to the game
+        input worker. It is never merged or dropped (command.internal is
+        set)
 
-        time.sleep(1)
-        twitchSocket = self.connectToTwitch()
-        self.handleTwitchResponse(twitchSocket)
+        Keyword arguments:
+            command -- parsed command (validator.Command)
+        """
+        self.executor.submit(command)
 
     def testing_start(self):
         """Tests most of the programflow/peripherals/gamecontroller.
@@ -198,158 +417,223 @@ class Setup:
                     pass
                 elif('!' in line):
                     print(line)
-                    if(validator.validateCommand(line)):
+                    command = validator.parseCommand(line)
+                    if(command):
                         # self.addToCommandList(user, out)
                         # Write to file for stream view
-                        items = ''
-                        for item in self.commands:
-                            items += item + '\n'
-                        self.myIO.writeFile('commands.txt', items)
-                        lowerCaseOutput = line.lower()
-                        self.gc.findAndExecute(lowerCaseOutput)
-                        # wait after each command test
-                        time.sleep(1)
+                        self.myIO.updateFile(
+                            'commands.txt', self.commands)
+                        self.gc.findAndExecute(command)
+                        # wait after each command test, countdowns and
+                        # delayed commands go on meanwhile
+                        self.gc.runTimers(1)
                 elif('wait' in line):
                     time_to_wait = int(line.split(' ')[1])
                     print(time_to_wait)
-                    time.sleep(time_to_wait)
+                    self.gc.runTimers(time_to_wait)
+        # finish the tab tour, ragequit etc.
+        self.gc.runTimers()
+
+    def calibrate_timing(self):
+        """Searches the smallest working delays together with the streamer.
+        Each trial runs a harmless macro in Dota with a shorter delay and
+        asks whether it worked. The results (plus a safety margin) are saved
+        as timing profile 'calibrated'.
+        Delays of macros that cost gold or leave the game (xp, menu, items)
+        are not calibrated"""
+        safetyMargin = 1.25
+        gc = self.gc
+        profiles = gc.timing
+        delays = dict(profiles.delays)
+
+        def askWorked(question):
+            return input(question + ' (y/n): ').lower().startswith('y')
+
+        def shopTrial():
+            gc.ui.forget()
+            gc.runActions(gc.showSelection, 'on')
+            worked = askWorked('Is the shop open?')
+            gc.ui.forget()
+            gc.runActions(gc.showSelection, 'off')
+            return worked
+
+        def lockItemTrial():
+            gc.runActions(gc.toggleLockItem, 1)
+            worked = askWorked('Was item 1 of the chicken (un)locked?')
+            # undo
+            gc.runActions(gc.toggleLockItem, 1)
+            return worked
+
+        trials = [('click', shopTrial), ('rightclickmenu', lockItemTrial)]
+        input('Focus Dota with the chessboard in view, then press enter')
+        for delay, macro in trials:
+            print('Calibrating {0} (currently {1}s)'.format(
+                delay, delays[delay]))
+
+            def trial(seconds):
+                profiles.delays = dict(delays)
+                profiles.delays[delay] = seconds
+                try:
+                    return macro()
+                finally:
+                    profiles.delays = profiles.profiles[profiles.name]
+            delays[delay] = min(
+                delays[delay],
+                timing.findMinimumDelay(trial, delays[delay]) * safetyMargin)
+            print('{0} = {1}s'.format(delay, delays[delay]))
+
+        profiles.save('calibrated', delays)
+        print('Saved as profile calibrated in ' + profiles.filename +
+              '. Use it with TIMING_PROFILE = calibrated')
 
     def democracy(self):
-        """Runs in parallel thread and counts the most popular commands for a
-        few seconds.
-        After that the most popular command is executed"""
-        list_commands = []
-        last_command = time.time()
-        selected_c = "None"
+        """Counts the most popular commands for a few seconds alongside the
+        chat reader. After that the most popular command is executed.
+        Schedules the end of every round and the countdown (once a second)
+        with the scheduler. Returns the timers"""
+        clock = self.clock
+        # rounds end at fixed deadlines, so they do not drift
+        state = {'start': clock.time(), 'selected': None}
+
+        def closeRound():
+            # Time has run out since last command
+            self.metrics.democracyRoundSeconds.observe(
+                clock.time() - state['start'])
+            state['start'] += self.democracy_time
+            topCommands = self.tally.closeRound()
+            if(len(topCommands) > 0):
+                # Select the most popular command
+                self.showTopCommands(topCommands)
+                selected_c = topCommands[0]
+            else:
+                selected_c = None
+            state['selected'] = selected_c
+            self.myIO.updateFile(
+                "lastsaid.txt",
+                "Selected {0}\nTime left: {1}".format(
+                    selected_c, str(self.democracy_time)[0:1]))
+            if(selected_c is not None):
+                # Do nothing if chat didn't write any commands
+                self.executeCommand(selected_c)
+
+        def showCountdown():
+            self.myIO.updateFile(
+                "lastsaid.txt",
+                "Selected {0}\nTime left: {1}".format(
+                    state['selected'],
+                    str(
+                        1.0 +
+                        state['start'] +
+                        self.democracy_time -
+                        clock.time()
+                    )[0:1]))
+
+        return [self.scheduler.schedule(self.democracy_time, closeRound,
+                                        interval=self.democracy_time),
+                self.scheduler.schedule(0, showCountdown, interval=1)]
+
+    async def connectToTwitch(self):
+        """Connects to twitch by using host, port and user credentials.
+        Returns the connected twitchclient.TwitchClient"""
+        client = twitchclient.TwitchClient(
+            self.HOST, self.PORT, self.AUTH, self.NICK, self.CHAT_CHANNEL,
+            self.clock, self.metrics, self.keepalive)
+        await client.connect()
+        return client
+
+    async def superviseTwitch(self, client):
+        """Runs the twitch connection and connects again (with the channel
+        joined) whenever it is lost. The waiting commands, the democracy
+        round and the timers carry on meanwhile. Waits longer after every
+        failed attempt and every lost connection (with some randomness, so
+        several bots do not reconnect at once) until a connection lasted
+        twitchclient.STABLE_AFTER seconds. If twitch asked for it after a
+        stable connection, the first attempt is made right away
 
+        Keyword arguments:
+            client -- Connected twitchclient.TwitchClient
+        """
+        clock = self.clock
+        backoff = twitchclient.BACKOFF_START
         while True:
-            if time.time() > last_command + self.democracy_time:
-                # Time has run out since last command
-                last_command = time.time()
-                if(len(list_commands) > 0):
-                    # Select the most popular command
-                    selected_c = self.most_common(list_commands)
-                else:
-                    selected_c = 'None'
-                self.myIO.writeFile(
-                    "lastsaid.txt",
-                    "Selected {0}\nTime left: {1}".format(
-                        selected_c, str(self.democracy_time)[0:1]))
-                list_commands = []
-                if(selected_c != 'None'):
-                    # Do nothing if chat didn't write any commands
-                    lowerCaseOutput = selected_c.lower()
-                    self.gc.findAndExecute(lowerCaseOutput)
-            else:
-                self.myIO.writeFile(
-                    "lastsaid.txt",
-                    "Selected {0}\nTime left: {1}".format(
-                        selected_c,
-                        str(
-                            1.0 +
-                            last_command +
-                            self.democracy_time -
-                            time.time()
-                        )[0:1]))
-            time.sleep(1)
-
-    def connectToTwitch(self):
-        """Connects to twitch by using a socket, host, port and user
-        credentials"""
-        s = socket.socket()
-        s.connect((self.HOST, self.PORT))
-
-        s.send(bytes("PASS {0}\r\n".format(self.AUTH), "UTF-8"))
-        s.send(bytes("NICK {0}\r\n".format(self.NICK), "UTF-8"))
-        s.send(bytes("USER {0} {1} bla :{2}\r\n".format(
-            self.NICK, self.HOST, self.NICK), "UTF-8"))
-        s.send(bytes("JOIN #{0}\r\n".format(self.CHAT_CHANNEL), "UTF-8"))
-        s.send(bytes("PRIVMSG #{0} :Connected\r\n".format(
-            self.CHAT_CHANNEL), "UTF-8"))
-        print("Sent connected message to channel {0}".format(
-            self.CHAT_CHANNEL))
-        return s
-
-    def handleTwitchResponse(self, s):
-        """Extracts the relevant info/command from each chat line
+            connected = clock.time()
+            try:
+                await client.run()
+            except OSError as error:
+                if not self.reconnect:
+                    raise
+                print('Connection lost: {0}'.format(error))
+            if(clock.time() - connected >= twitchclient.STABLE_AFTER):
+                # the connection was fine for a while
+                backoff = twitchclient.BACKOFF_START
+            delay = 0.0
+            if not (client.reconnectRequested and
+                    backoff == twitchclient.BACKOFF_START):
+                delay = backoff * random.uniform(0.5, 1.5)
+            # a connection that is lost again soon waits longer next time
+            backoff = min(backoff * 2, twitchclient.BACKOFF_MAX)
+            while True:
+                print('Reconnecting in {0:.1f}s'.format(delay))
+                await clock.wait(delay)
+                try:
+                    await client.connect(announce=False)
+                    break
+                except OSError as error:
+                    print('Reconnect failed: {0}'.format(error))
+                delay = backoff * random.uniform(0.5, 1.5)
+                backoff = min(backoff * 2, twitchclient.BACKOFF_MAX)
+
+    async def handleTwitchResponse(self, messages):
+        """Takes the chat commands read by the twitch client and handles the
+        valid ones
 
         Keyword arguments:
-            s -- socket containing live data
+            messages -- asyncio.Queue with twitchclient.ChatMessage
         """
-        readbuffer = ''
         while True:
-            readbuffer = readbuffer + \
-                s.recv(1024).decode("UTF-8", errors="ignore")
-            temp = str.split(readbuffer, "\n")
-            readbuffer = temp.pop()
-
-            for line in temp:
-                x = 0
-                out = ""
-                line = str.rstrip(line)
-                line = str.split(line)
-
-                # remove username and : in front of each line
-                for index, dummy in enumerate(line):
-                    if x == 0:
-                        user = line[index]
-                        user = user.split('!')[0]
-                        user = user[0:12] + ": "
-                    if x == 3:
-                        out += line[index]
-                        out = out[1:]
-                    if x >= 4:
-                        out += " " + line[index]
-                    x = x + 1
-
-                # Respond to ping, squelch useless feedback given by twitch,
-                # print output and read to list
-                if user == "PING: ":
-                    s.send(bytes("PONG tmi.twitch.tv\r\n", "UTF-8"))
-                elif user == ":tmi.twitch.tv: ":
-                    pass
-                elif user == ":tmi.twitch.: ":
-                    pass
-                elif user == ":{0}.tmi.twitch.tv: ".format(self.NICK):
-                    pass
-                else:
-                    try:
-                        print(user + out)
-                    except UnicodeEncodeError:
-                        print(user)
-
-                # Take in output
-                # sanitize output
-                if(validator.validateCommand(out.lower())):
-                    self.addToCommandList(user, out)
-                    # Write to file for stream view
-                    items = ''
-                    for item in self.commands:
-                        items += item + '\n'
-                    self.myIO.writeFile('commands.txt', items)
-                    if(self.mode != "democracy"):
-                        lowerCaseOutput = out.lower()
-                        self.gc.findAndExecute(lowerCaseOutput)
-
-    def addToCommandList(self, user, out):
-        """Adds all valid commands to a list and removes/pops the first entry
-        if the list gets too long.
-        Additionally adds commands to a democracy list which is used to
-        determine the top 5 commands
+            message = await messages.get()
+            user = message.user
+            out = message.text
+            try:
+                print(user[0:11] + ": " + out)
+            except UnicodeEncodeError:
+                print(user[0:11] + ": ")
+
+            # Take in output
+            # sanitize output
+            command = validator.parseCommand(out)
+            if(command):
+                command.received = message.received
+                command.validated = self.clock.time()
+                self.metrics.commandValidated(command)
+                # moderators are neither limited nor wait behind chat
+                priority = message.priority
+                if(self.mode != "democracy" and not priority and
+                   self.limiter.check(message.identity,
+                                      self.executor.pending())):
+                    # counted by the limiter
+                    continue
+                self.addToCommandList(user, command)
+                # Write to file for stream view (rendered when written)
+                self.myIO.updateFile('commands.txt', self.commands)
+                if(self.mode != "democracy"):
+                    self.executeCommand(command, priority)
+            elif(command is False):
+                self.metrics.invalidCommands.inc()
+
+    def addToCommandList(self, user, command):
+        """Adds all valid commands to the command history which drops the
+        oldest entry if it gets too long.
+        Additionally counts commands as votes in democracy mode which are
+        used to determine the top 5 commands
 
         Keyword arguments:
             user -- twitch username as send by twitch api
-            out -- chatline from user
+            command -- parsed command (validator.Command) from user
         """
-        if len(self.commands) >= self.command_length:
-            del self.commands[0]
-            self.commands.extend([user[1:] + out.lower()])
-            if self.mode.lower() == "democracy":
-                self.list_commands.extend([out.lower()])
-        else:
-            self.commands.extend([user[1:] + out.lower()])
-            if self.mode.lower() == "democracy":
-                self.list_commands.extend([out.lower()])
+        self.commands.add(user[0:11] + ": " + command.text)
+        if self.mode.lower() == "democracy":
+            self.tally.vote(command)
 
     def most_common(self, lst):
         """Return the most common/popular command of a given list.
@@ -357,38 +641,37 @@ class Setup:
         writing it to a file
 
         Keyword arguments:
-            lst -- list of commands to be examined
+            lst -- list of parsed commands (validator.Command) to be examined
         """
-        # Write to file for stream view
-        tempList = lst
-        maxList = []
-        if(len(lst) > 5):
-            # if more than 5 commands are found, only get the top5
-            for dummy in range(5):
-                if(len(tempList) > 0):
-                    tempMax = max(tempList, key=tempList.count)
-                    maxList.append(tempMax)
-                    tempList = list(filter(lambda a: a != tempMax, tempList))
-                else:
-                    break
+        tally = votetally.VoteTally()
+        for command in lst:
+            tally.vote(command)
+        topCommands = tally.closeRound()
+        self.showTopCommands(topCommands)
+        return topCommands[0]
 
-        else:
-            for dummy in range(len(lst)):
-                if(len(tempList) > 0):
-                    tempMax = max(tempList, key=tempList.count)
-                    maxList.append(tempMax)
-                    tempList = list(filter(lambda a: a != tempMax, tempList))
-                else:
-                    break
+    def showTopCommands(self, topCommands):
+        """Writes the top commands to a file for stream view
 
-        topCommands = 'Top commands:\n'
-        for item in maxList:
-            topCommands += item + '\n'
-        self.myIO.writeFile("most_common_commands.txt", topCommands)
-        return maxList[0]
+        Keyword arguments:
+            topCommands -- list of parsed commands, most popular first
+        """
+        text = 'Top commands:\n'
+        for item in topCommands:
+            text += item.text + '\n'
+        self.myIO.updateFile("most_common_commands.txt", text)
 
 
 if __name__ == "__main__":
-    setup = Setup()
-    setup.start()
+    # one bot per settings file, all in this process.
+    # --calibrate calibrates the timing of the first bot instead
+    calibrate = '--calibrate' in sys.argv[1:]
+    settingsFiles = [arg for arg in sys.argv[1:]
+                     if arg != '--calibrate'] or ["settings.txt"]
+    setups = [Setup(settingsFile) for settingsFile in settingsFiles]
+    setup = setups[0]
+    if(calibrate):
+        setup.calibrate_timing()
+    else:
+        startStations(setups)
     #setup.testing_start()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+
+# twitchclient.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+import asyncio
+import time
+from collections import OrderedDict
+
+import clocks
+
+# bytes read from the connection at once
+READ_SIZE = 65536
+# longest line kept while waiting for its end (Twitch lines are shorter)
+MAX_LINE = 16384
+# IRCv3 capabilities requested from Twitch: message tags (user-id, id,
+# badges, tmi-sent-ts) and Twitch specific commands (RECONNECT, NOTICE).
+# Membership (JOIN/PART of every viewer) is not requested
+CAPABILITIES = 'twitch.tv/tags twitch.tv/commands'
+# badges whose commands go first
+PRIORITY_BADGES = ('broadcaster', 'moderator')
+# message ids remembered to drop duplicates
+DEDUPE_SIZE = 4096
+# seconds between reconnect attempts, doubled after every failed attempt
+# or lost connection
+BACKOFF_START = 1.0
+BACKOFF_MAX = 60.0
+# seconds a connection has to last before the backoff starts over
+STABLE_AFTER = 60.0
+# what Twitch sends before it restarts the chat server
+RECONNECT = b':tmi.twitch.tv RECONNECT'
+
+
+class ChatMessage:
+    """A chat command as read from Twitch.
+
+    Attributes:
+        user -- Login name of the user
+        text -- Chat message
+        received -- Time the message was read (see clocks)
+        userId -- Twitch user id (tag user-id), None without tags
+        messageId -- Unique id of the message (tag id), None without tags
+        badges -- Badge names of the user (tag badges)
+        sentAt -- Time the server got the message in seconds since the
+        epoch (tag tmi-sent-ts), None without tags
+    """
+    __slots__ = ('user', 'text', 'received', 'userId', 'messageId',
+                 'badges', 'sentAt')
+
+    def __init__(self, user, text, received=None, tags=None):
+        self.user = user
+        self.text = text
+        self.received = received
+        tags = tags or {}
+        self.userId = tags.get('user-id') or None
+        self.messageId = tags.get('id') or None
+        self.badges = tuple(badge.partition('/')[0] for badge in
+                            tags.get('badges', '').split(',') if badge)
+        sentAt = tags.get('tmi-sent-ts')
+        self.sentAt = int(sentAt) / 1000.0 if sentAt else None
+
+    @property
+    def identity(self):
+        """Stable identity of the user (user id, login name without tags)"""
+        return self.userId or self.user
+
+    @property
+    def priority(self):
+        """Is the message from the broadcaster or a moderator?"""
+        return any(badge in PRIORITY_BADGES for badge in self.badges)
+
+    def __repr__(self):
+        return 'ChatMessage({0!r}, {1!r})'.format(self.user, self.text)
+
+
+def parseTags(tags):
+    """Returns the message tags as dict
+
+    Keyword arguments:
+        tags -- Tag part of an IRC line without @, for example
+        'badges=moderator/1;id=b34ccfc7;user-id=1337'
+    """
+    parsed = {}
+    for tag in tags.split(';'):
+        key, dummy, value = tag.partition('=')
+        parsed[key] = value
+    return parsed
+
+
+def parseMessage(data, start=0, end=None):
+    """Extracts user, text and tags of a chat command from received bytes.
+    The line is searched in place, only user, text and tags of a command
+    are copied and decoded.
+    Returns a ChatMessage, None if the line is no chat message and False if
+    it is a chat message but no command (does not start with !)
+
+    Keyword arguments:
+        data -- bytes containing the IRC line, for example
+        b'@id=1;user-id=5 :user!user@user.tmi.twitch.tv PRIVMSG #ch :!m aa a1'
+        start -- Index of the first byte of the line
+        end -- Index after the line (the line ending may be included)
+    """
+    if(end is None):
+        end = len(data)
+    while end > start and data[end-1] in b'\r\n':
+        end -= 1
+    tagsStart = start
+    if data.startswith(b'@', start, end):
+        start = data.find(b' ', start, end) + 1
+        if(start == 0):
+            return None
+    if not data.startswith(b':', start, end):
+        return None
+    prefixEnd = data.find(b' ', start, end)
+    if(prefixEnd == -1 or
+       not data.startswith(b'PRIVMSG ', prefixEnd+1, end)):
+        return None
+    textStart = data.find(b' :', prefixEnd+9, end)
+    if(textStart == -1):
+        return None
+    if not data.startswith(b'!', textStart+2, end):
+        return False
+    userEnd = data.find(b'!', start+1, prefixEnd)
+    if(userEnd == -1):
+        userEnd = prefixEnd
+    tags = None
+    if(tagsStart != start):
+        tags = parseTags(data[tagsStart+1:start-1].decode(
+            "UTF-8", errors="ignore"))
+    return ChatMessage(
+        data[start+1:userEnd].decode("UTF-8", errors="ignore"),
+        data[textStart+2:end].decode("UTF-8", errors="ignore"), None, tags)
+
+
+def parseCommands(data, end=None):
+    """Returns a ChatMessage for every chat command in received bytes.
+    Only lines containing ' :!' are looked at, the search for it skips all
+    other chat without touching it line by line
+
+    Keyword arguments:
+        data -- bytes with complete IRC lines
+        end -- Index after the last complete line
+    """
+    if(end is None):
+        end = len(data)
+    commands = []
+    find = data.find
+    hit = find(b' :!', 0, end)
+    while hit != -1:
+        start = data.rfind(b'\n', 0, hit) + 1
+        lineEnd = find(b'\n', hit, end)
+        if(lineEnd == -1):
+            lineEnd = end
+        message = parseMessage(data, start, lineEnd)
+        if(message):
+            commands.append(message)
+        hit = find(b' :!', lineEnd, end)
+    return commands
+
+
+class TwitchClient:
+    """Asyncio connection to the Twitch chat (IRC).
+    Answers PINGs on its own and puts every chat command as ChatMessage
+    into the messages queue. Other chat is only counted, repeated messages
+    (same message id) are dropped.
+    After keepalive seconds without anything received the client sends a
+    PING itself and gives the connection up if nothing arrives within
+    another keepalive seconds. connect() can be called again after run()
+    failed, the messages queue stays the same"""
+
+    def __init__(self, host, port, auth, nick, channel, clock=None,
+                 metrics=None, keepalive=5):
+        self.clock = clock or clocks.Clock()
+        # metrics.BotMetrics that counts the chat messages
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.auth = auth
+        self.nick = nick
+        self.channel = channel
+        self.messages = asyncio.Queue()
+        self.reader = None
+        self.writer = None
+        # ids of the latest messages, oldest first
+        self.seen = OrderedDict()
+        # seconds of silence before a PING, 0 to never send one
+        self.keepalive = keepalive
+        # time anything was received last
+        self.lastRead = None
+        # why the client closed the connection itself
+        self.failure = None
+        # did the server ask for a new connection?
+        self.reconnectRequested = False
+
+    async def connect(self, announce=True):
+        """Connects to twitch by using host, port and user credentials and
+        joins the chat channel
+
+        Keyword arguments:
+            announce -- Write a message into the chat when connected
+        """
+        if(self.writer is not None):
+            self.writer.close()
+        self.failure = None
+        self.reconnectRequested = False
+        # a dead host must not keep the bot waiting for minutes
+        timeout = self.keepalive if self.keepalive > 0 else None
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionError('No connection within {0}s'.format(
+                timeout))
+        self.lastRead = self.clock.time()
+
+        # tags have to be requested before the login
+        self.send("CAP REQ :{0}".format(CAPABILITIES))
+        self.send("PASS {0}".format(self.auth))
+        self.send("NICK {0}".format(self.nick))
+        self.send("USER {0} {1} bla :{2}".format(
+            self.nick, self.host, self.nick))
+        self.send("JOIN #{0}".format(self.channel))
+        if(announce):
+            self.sendMessage("Connected")
+        try:
+            await asyncio.wait_for(self.writer.drain(), timeout)
+        except asyncio.TimeoutError:
+            self.writer.close()
+            raise ConnectionError('Login not sent within {0}s'.format(
+                timeout))
+        if(announce):
+            print("Sent connected message to channel {0}".format(
+                self.channel))
+        else:
+            print("Joined channel {0} again".format(self.channel))
+
+    def send(self, line):
+        """Queues a raw IRC line for sending
+
+        Keyword arguments:
+            line -- IRC line without line ending
+        """
+        self.writer.write(bytes(line + "\r\n", "UTF-8"))
+
+    def sendMessage(self, message):
+        """Queues a chat message to the channel for sending
+
+        Keyword arguments:
+            message -- Text to write into the chat
+        """
+        self.send("PRIVMSG #{0} :{1}".format(self.channel, message))
+
+    async def run(self):
+        """Reads the connection until it is closed (ConnectionError).
+        Everything that arrived at once is handled in one go"""
+        watchdog = None
+        if(self.keepalive > 0):
+            watchdog = asyncio.ensure_future(self.keepAlive())
+        try:
+            await self.read()
+        finally:
+            if(watchdog is not None):
+                watchdog.cancel()
+
+    async def read(self):
+        """Reads and handles the received lines until the connection is
+        closed"""
+        rest = b''
+        while True:
+            chunk = await self.reader.read(READ_SIZE)
+            if not chunk:
+                raise ConnectionError(
+                    self.failure or 'Connection closed by server')
+            self.lastRead = self.clock.time()
+            data = rest + chunk if rest else chunk
+            # the last line may be incomplete
+            end = data.rfind(b'\n') + 1
+            rest = data[end:]
+            if(len(rest) > MAX_LINE):
+                rest = b''
+            if(end and self.handleLines(data, end, self.lastRead)):
+                await self.writer.drain()
+            if(end and (data.startswith(RECONNECT) or
+                        data.find(b'\n' + RECONNECT, 0, end) != -1)):
+                self.reconnectRequested = True
+                self.disconnect('Server asked to reconnect')
+
+    async def keepAlive(self):
+        """Sends a PING after keepalive seconds of silence and closes the
+        connection if the PING is not answered in time"""
+        clock = self.clock
+        while True:
+            silence = clock.time() - self.lastRead
+            if(silence < self.keepalive):
+                await clock.wait(self.keepalive - silence)
+                continue
+            pinged = clock.time()
+            self.send('PING :tmi.twitch.tv')
+            await clock.wait(self.keepalive)
+            if(self.lastRead < pinged):
+                self.disconnect('No answer to PING within {0}s'.format(
+                    self.keepalive))
+                return
+
+    def disconnect(self, reason):
+        """Closes the connection, run() fails with the reason
+
+        Keyword arguments:
+            reason -- Why the connection is closed
+        """
+        self.failure = reason
+        self.writer.close()
+
+    def handleLines(self, data, end, received):
+        """Answers PINGs and queues the chat commands of received lines.
+        Returns whether something was answered
+
+        Keyword arguments:
+            data -- Received bytes
+            end -- Index after the last complete line
+            received -- Time the lines were read
+        """
+        answered = False
+        # Respond to ping, everything else except chat is ignored
+        if(data.startswith(b'PING') or data.find(b'\nPING', 0, end) != -1):
+            for line in data[:end].split(b'\n'):
+                if(line.startswith(b'PING')):
+                    self.send('PONG' + line[4:].decode(
+                        "UTF-8", errors="ignore").rstrip('\r'))
+                    answered = True
+        if(self.metrics is not None):
+            # a chat text containing ' PRIVMSG #' is counted twice
+            self.metrics.chatMessages.inc(
+                amount=data.count(b' PRIVMSG #', 0, end))
+        for message in parseCommands(data, end):
+            if(message.messageId is not None):
+                if(message.messageId in self.seen):
+                    if(self.metrics is not None):
+                        self.metrics.duplicateMessages.inc()
+                    continue
+                self.seen[message.messageId] = True
+                if(len(self.seen) > DEDUPE_SIZE):
+                    self.seen.popitem(last=False)
+            message.received = received
+            if(self.metrics is not None and message.sentAt is not None):
+                # the server time stamp is wall clock time
+                self.metrics.deliverySeconds.observe(
+                    max(0.0, time.time() - message.sentAt))
+            self.messages.put_nowait(message)
+        return answered
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+# uistate.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+
+class UIState:
+    """What the game controller knows about the game UI.
+    There is no feedback from the game, so the state is derived from the
+    actions sent to it. Each value is True, False or None if unknown (for
+    example at startup or after leaving the own chessboard)
+
+    Attributes:
+        shopOpen -- Is the shop (piece selection) shown?
+        chickenHome -- Is the chicken/courier at its default position?
+    """
+
+    def __init__(self):
+        self.shopOpen = None
+        self.chickenHome = None
+
+    def forget(self):
+        """Marks the whole state as unknown"""
+        self.shopOpen = None
+        self.chickenHome = None
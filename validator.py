@@ -52,20 +52,239 @@ PATTERNS = {
              r'!random|!search|!accept|!calib|!run|!iu?l|!stay)'
 }
 
+# first token of a command -> kinds of the patterns that can match it.
+# Only these patterns are tried, so a message costs one regex match at most
+# (two for !m/!move)
+COMMANDTOKENS = {
+    '!m': ('move', 'movedirection'),
+    '!move': ('move', 'movedirection'),
+    '!aa': ('movefromslots',),
+    '!bb': ('movefromslots',),
+    '!cc': ('movefromslots',),
+    '!dd': ('movefromslots',),
+    '!ee': ('movefromslots',),
+    '!ff': ('movefromslots',),
+    '!gg': ('movefromslots',),
+    '!hh': ('movefromslots',),
+    '!g': ('grab',),
+    '!grab': ('grab',),
+    '!b': ('bench',),
+    '!bench': ('bench',),
+    '!s': ('sell',),
+    '!sell': ('sell',),
+    '!rq': ('rq',),
+    '!r': ('reroll',),
+    '!reroll': ('reroll',),
+    '!x': ('buyxp',),
+    '!xp': ('buyxp',),
+    '!shop': ('shop',),
+    '!l': ('lock',),
+    '!lock': ('lock',),
+    '!p': ('pick',),
+    '!pick': ('pick',),
+    '!i': ('itemtohero',),
+    '!item': ('itemtohero',),
+    '!tab': ('tab',),
+    '!random': ('random',),
+    '!search': ('search',),
+    '!accept': ('accept',),
+    '!decline': ('decline',),
+    '!reconnect': ('reconnect',),
+    '!calib': ('calib',),
+    '!run': ('run',),
+    '!il': ('lockitem',),
+    '!iul': ('lockitem',),
+    '!itemlock': ('lockitem',),
+    '!stay': ('stay',),
+    '!write': ('write',),
+    '!exec': ('exec',),
+    '!stack': ('stack',)
+}
+# lines are lowercased before matching, so no re.IGNORECASE is needed
+COMPILEDTOKENS = {
+    token: tuple((kind, re.compile(PATTERNS[kind])) for kind in kinds)
+    for token, kinds in COMMANDTOKENS.items()
+}
+# longest token. Lines without a space in the first MAXTOKENLENGTH + 1
+# characters are rejected without looking at the rest of the line
+MAXTOKENLENGTH = max(len(token) for token in COMMANDTOKENS)
 
-def validateCommand(command):
-    '''Validate incoming commands. Returns bool
+
+# bench slots (aa..hh) are numbered after the 64 chessboard fields
+BENCH_OFFSET = 64
+DIRECTIONS = ('left', 'right', 'top', 'bot')
+
+
+class Command:
+    """A parsed chat command. Created once by parseCommand and passed along
+    through voting, stacking and execution.
+
+    Attributes:
+        kind -- Name of the matching pattern (see PATTERNS)
+        args -- Tuple of normalized arguments. Fields are ints (see
+        fieldToIndex), numbers are ints, everything else lowercase strings
+        text -- Lowercase chat line the command was parsed from
+        received -- Time the chat line was read (see clocks), for metrics
+        validated -- Time the command was validated, for metrics
+        internal -- True for a command of the bot itself (for example a
+        step of the tab tour), it is never superseded or dropped
+    """
+    __slots__ = ('kind', 'args', 'text', 'received', 'validated',
+                 'internal')
+
+    def __init__(self, kind, args=(), text=''):
+        self.kind = kind
+        self.args = args
+        self.text = text
+        self.received = None
+        self.validated = None
+        self.internal = False
+
+    def __eq__(self, other):
+        if not isinstance(other, Command):
+            return NotImplemented
+        return self.kind == other.kind and self.args == other.args
+
+    def __hash__(self):
+        return hash((self.kind, self.args))
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return 'Command({0!r}, {1!r})'.format(self.kind, self.args)
+
+
+def fieldToIndex(field):
+    """Returns the index of a field. a1..h8 map to 0..63 (row by row),
+    the bench slots aa..hh map to 64..71.
 
     Keyword arguments:
-        command -- Command (string) to be validated
-    '''
+        field -- Field name (aa,a1..h8), lowercase
+    """
+    column = ord(field[0]) - ord('a')
+    if(field[1] == field[0]):
+        return BENCH_OFFSET + column
+    return (int(field[1]) - 1) * 8 + column
+
+
+def indexToField(index):
+    """Returns the field name (aa,a1..h8) of a field index
+
+    Keyword arguments:
+        index -- Field index as returned by fieldToIndex
+    """
+    if(index >= BENCH_OFFSET):
+        return chr(ord('a') + index - BENCH_OFFSET) * 2
+    return chr(ord('a') + index % 8) + str(index // 8 + 1)
+
+
+def _parseArguments(kind, command, match):
+    """Converts the arguments of an already matched command.
+    Returns a tuple or None if a nested command is invalid.
+
+    Keyword arguments:
+        kind -- Name of the matched pattern
+        command -- Lowercase command string
+        match -- Match object of the pattern
+    """
+    splitted = command.split(' ')
+    if(kind == 'move'):
+        return (fieldToIndex(splitted[1]), fieldToIndex(splitted[2]))
+    elif(kind in ('grab', 'bench', 'sell')):
+        return (fieldToIndex(splitted[1]),)
+    elif(kind in ('buyxp', 'pick', 'lockitem')):
+        return (int(splitted[1]),)
+    elif(kind in ('movedirection', 'shop', 'run')):
+        return (splitted[1],)
+    elif(kind == 'itemtohero'):
+        return (int(splitted[1]), fieldToIndex(splitted[2]))
+    elif(kind == 'movefromslots'):
+        direction = ''
+        if(len(splitted) > 1 and splitted[1] in DIRECTIONS):
+            direction = splitted[1]
+        return (fieldToIndex(splitted[0][1:]), direction)
+    elif(kind == 'tab'):
+        if(match.group(1)):
+            return (int(match.group(1)),)
+        return ()
+    elif(kind == 'write'):
+        return (command[len('!write'):].strip(),)
+    elif(kind == 'stack'):
+        # the nested command is parsed right away so it is stored ready
+        # for execution
+        nested = parseCommand(command[command.find(' ')+1:])
+        if not nested:
+            return None
+        return (nested,)
+    return ()
+
+
+def matchCommand(command):
+    """Matches a chat line against the candidate patterns of its first token.
+    Returns a tuple (kind, match, lowercase line), None if the line is no
+    command at all and False if the command is invalid.
+
+    Keyword arguments:
+        command -- Chat line (string) to be matched
+    """
     # not a command
     if(command[:1] != '!'):
         return None
 
-    # does it match any pattern?
-    for pattern in PATTERNS:
-        if(re.match(PATTERNS[pattern], command, re.IGNORECASE)):
-            return pattern
+    # look up the first token without scanning the rest of the line
+    tokenEnd = command.find(' ', 1, MAXTOKENLENGTH + 1)
+    if(tokenEnd == -1):
+        if(len(command) > MAXTOKENLENGTH):
+            return False
+        tokenEnd = len(command)
+    candidates = COMPILEDTOKENS.get(command[:tokenEnd].lower())
+    if(candidates is None):
+        return False
+
+    command = command.lower()
+    # does it match any of the candidate patterns?
+    for kind, pattern in candidates:
+        match = pattern.match(command)
+        if(match):
+            return kind, match, command
 
     return False
+
+
+def parseCommand(command):
+    """Parses a chat line into a Command. The first token selects the
+    candidate patterns, so at most one or two precompiled patterns are tried.
+    Returns None if the line is no command at all and False if the command
+    is invalid.
+
+    Keyword arguments:
+        command -- Chat line (string) to be parsed
+    """
+    matched = matchCommand(command)
+    if not matched:
+        return matched
+    kind, match, command = matched
+    args = _parseArguments(kind, command, match)
+    if(args is None):
+        return False
+    return Command(kind, args, command)
+
+
+def validateCommand(command):
+    '''Validate incoming commands. Returns the name of the matching pattern,
+    None if the line is no command and False if it is invalid
+
+    Keyword arguments:
+        command -- Command (string) to be validated
+    '''
+    # not a command
+    if(command[:1] != '!'):
+        return None
+    matched = matchCommand(command)
+    if not matched:
+        return matched
+    if(matched[0] == 'stack'):
+        # the nested command has to be valid as well
+        return 'stack' if parseCommand(command) else False
+    return matched[0]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+# votetally.py
+# Copyright (C) 2019 : Carsten Demming
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+
+from threading import Lock
+
+
+class VoteTally:
+    """Counts the votes of a democracy round.
+    Keeps a hashed counter per command and the most voted commands sorted
+    while votes come in, so a vote costs O(topLength) and closing a round
+    only hands over the already sorted list.
+    Votes can come from the chat reader while the round timer closes the
+    round"""
+
+    def __init__(self, topLength=5):
+        self.topLength = topLength
+        self.lock = Lock()
+        self.counts = {}
+        # most voted commands, most popular first. On equal votes the
+        # command that got there first stays in front
+        self.top = []
+
+    def vote(self, command):
+        """Counts one vote
+
+        Keyword arguments:
+            command -- parsed command (validator.Command)
+        """
+        with self.lock:
+            counts = self.counts
+            top = self.top
+            count = counts.get(command, 0) + 1
+            counts[command] = count
+            if command in top:
+                idx = top.index(command)
+            elif len(top) < self.topLength:
+                top.append(command)
+                idx = len(top) - 1
+            elif count > counts[top[-1]]:
+                # every command outside the top list has at most as many
+                # votes as the last entry, so it can only replace that one
+                idx = len(top) - 1
+                top[idx] = command
+            else:
+                return
+            # move up past every command with fewer votes
+            while idx > 0 and counts[top[idx-1]] < count:
+                top[idx] = top[idx-1]
+                idx -= 1
+            top[idx] = command
+
+    def votes(self, command):
+        """Returns the current number of votes of a command
+
+        Keyword arguments:
+            command -- parsed command (validator.Command)
+        """
+        return self.counts.get(command, 0)
+
+    def closeRound(self):
+        """Ends the current round and starts a new one.
+        Returns the most voted commands of the ended round, most popular
+        first"""
+        with self.lock:
+            top = self.top
+            self.counts = {}
+            self.top = []
+        return top